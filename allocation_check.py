@@ -0,0 +1,123 @@
+"""
+Verificación de asignaciones de memoria por paso de simulación
+Mide con tracemalloc la memoria que retiene y la memoria temporal que pide
+cada frame (sensores, control, física, colisiones y checkpoints) y la compara
+con un presupuesto. El paso en régimen estable no debe retener memoria.
+"""
+import sys
+import tracemalloc
+
+from car import Car
+from fuzzy_controller import FuzzyController
+from opponent_controller import OpponentController
+from track import Track
+
+# Presupuesto por paso (bytes)
+# Una fuga real retiene al menos un objeto (>= 16 B) en cada paso; el margen
+# de 1 B/paso solo tolera asignaciones únicas del intérprete durante la medición
+RETAINED_BUDGET = 1        # Memoria retenida promedio por paso
+PEAK_BUDGET = 512          # Memoria temporal máxima dentro de un paso
+
+
+def simulation_step(track, car, controller):
+    """Un frame de simulación para un auto (mismo orden que Game.update_game)"""
+    car.update_sensors(track)
+    steering, throttle = controller.compute(car)
+    car.update_ai_control(steering, throttle)
+    car.apply_physics()
+
+    if track.check_collision(car):
+        car.crashed = True
+        car.speed *= 0.5
+
+    if track.check_checkpoint(car, car.checkpoint_count, (car.prev_x, car.prev_y)):
+        car.checkpoint_count += 1
+
+
+def measure_step_allocations(controller, lane=0, steps=600, warmup=30, warmup_races=1):
+    """
+    Mide las asignaciones por paso de un controlador
+
+    Las carreras se reinician al llegar a la meta; el reinicio, los primeros
+    frames de cada carrera y las primeras carreras completas (cachés que se
+    llenan una sola vez) no se miden.
+
+    Args:
+        controller: Controlador con método compute(car)
+        lane: Carril del auto
+        steps: Pasos medidos
+        warmup: Frames sin medir al comenzar cada carrera
+        warmup_races: Carreras completas sin medir al inicio
+
+    Returns:
+        Tupla (bytes retenidos por paso, pico temporal máximo en bytes)
+    """
+    track = Track(1200, 800)
+    car = Car(0, 0, (0, 0, 0), is_player=False)
+
+    retained = 0
+    peak = 0
+    measured = 0
+    frame = 0
+    races = 0
+    needs_reset = True
+
+    tracemalloc.start()
+    while measured < steps:
+        if needs_reset or car.y >= track.finish_line_y:
+            needs_reset = False
+            x, y, angle = track.get_start_position(lane=lane)
+            car.reset(x, y, angle)
+            car.prev_x, car.prev_y = x, y
+            if hasattr(controller, 'reset'):
+                controller.reset()
+            frame = 0
+            races += 1
+
+        if frame < warmup or races <= warmup_races:
+            simulation_step(track, car, controller)
+            frame += 1
+            continue
+
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        simulation_step(track, car, controller)
+        after, step_peak = tracemalloc.get_traced_memory()
+
+        retained += after - before
+        peak = max(peak, step_peak - before)
+        measured += 1
+        frame += 1
+    tracemalloc.stop()
+
+    return retained / steps, peak
+
+
+def main():
+    print("=" * 60)
+    print("  VERIFICACIÓN DE ASIGNACIONES POR PASO")
+    print("=" * 60)
+    print(f"Presupuesto: {RETAINED_BUDGET} B retenidos/paso, {PEAK_BUDGET} B pico/paso\n")
+
+    controllers = [
+        ('difuso', FuzzyController(), 0),
+        ('oponente', OpponentController('medium'), 1)
+    ]
+
+    all_ok = True
+    for name, controller, lane in controllers:
+        retained, peak = measure_step_allocations(controller, lane=lane)
+        ok = retained <= RETAINED_BUDGET and peak <= PEAK_BUDGET
+        all_ok &= ok
+        print(f"{'✅' if ok else '❌'} {name:<10} retenido {retained:8.1f} B/paso   pico {peak:6d} B")
+
+    print()
+    if all_ok:
+        print("✅ El paso de simulación cumple el presupuesto de memoria")
+    else:
+        print("❌ El paso de simulación supera el presupuesto de memoria")
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Clase Camera - Desplazamiento vertical de la vista sobre pistas largas
+El mundo usa las mismas coordenadas que la simulación; la cámara solo
+decide qué franja vertical se ve en la ventana y con qué escala se dibuja
+(resolución interna reducida, ver Game.set_render_scale).
+"""
+
+
+class Camera:
+    def __init__(self, viewport_width, viewport_height, world_height, lead=0.35):
+        """
+        Inicializa la cámara
+
+        Args:
+            viewport_width: Ancho de la ventana
+            viewport_height: Alto de la ventana
+            world_height: Alto total del mundo (ver Track.world_height)
+            lead: Posición vertical del auto seguido en la ventana (0 = arriba).
+                  Los autos avanzan hacia abajo: un valor bajo muestra más pista adelante
+        """
+        self.viewport_width = viewport_width
+        self.viewport_height = viewport_height
+        self.world_height = world_height
+        self.lead = lead
+
+        # Desplazamiento en píxeles enteros (sin temblor al dibujar)
+        self.offset_y = 0
+
+        # Escala de la superficie de dibujo respecto de la ventana (1.0 = nativa)
+        self.scale = 1.0
+
+    @property
+    def max_offset(self):
+        """Desplazamiento máximo (la ventana no pasa del final del mundo)"""
+        return max(0, self.world_height - self.viewport_height)
+
+    def follow(self, y):
+        """
+        Centra la vista en una posición del mundo
+
+        Args:
+            y: Coordenada Y del objetivo (ej. el auto del jugador)
+        """
+        target = int(y - self.viewport_height * self.lead)
+        self.offset_y = min(max(target, 0), self.max_offset)
+
+    def get_visible_range(self, margin=0):
+        """
+        Franja visible del mundo
+
+        Args:
+            margin: Píxeles extra por arriba y por abajo
+
+        Returns:
+            Tupla (y_superior, y_inferior) en coordenadas del mundo
+        """
+        return (self.offset_y - margin, self.offset_y + self.viewport_height + margin)
+
+    def to_screen(self, x, y):
+        """Convierte una posición del mundo a la superficie de dibujo"""
+        return (x * self.scale, (y - self.offset_y) * self.scale)
+
+    def is_visible(self, x, y, radius):
+        """
+        Verifica si la caja de un objeto toca la vista
+
+        Args:
+            x, y: Centro del objeto en coordenadas del mundo
+            radius: Mitad del lado de la caja que contiene al objeto
+
+        Returns:
+            True si hay que dibujarlo
+        """
+        return (y + radius >= self.offset_y and y - radius <= self.offset_y + self.viewport_height and
+                x + radius >= 0 and x - radius <= self.viewport_width)
+
+    def visible_mask(self, xs, ys, radius):
+        """
+        Versión vectorizada de is_visible para arrays de objetos
+
+        Returns:
+            Array booleano con los objetos que hay que dibujar
+        """
+        return ((ys + radius >= self.offset_y) & (ys - radius <= self.offset_y + self.viewport_height) &
+                (xs + radius >= 0) & (xs - radius <= self.viewport_width))
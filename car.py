@@ -3,9 +3,17 @@ Clase Car - Representa un auto en el juego de carreras
 """
 import pygame
 import math
-import numpy as np
+
+from features import FeatureSpec, SPEED_INDEX, SENSOR_OFFSET
 
 class Car:
+    # Atributos fijos: menos memoria por auto y acceso más rápido en el bucle de simulación
+    __slots__ = ('x', 'y', 'color', 'is_player', 'width', 'height', 'car_image', 'use_image',
+                 'angle', 'speed', 'max_speed', 'acceleration', 'friction', 'turn_speed',
+                 'sensor_distances', 'sensor_angles', 'sensor_length', 'feature_spec', 'features',
+                 'lap_count', 'checkpoint_count', 'total_distance', 'crashed', 'prev_x', 'prev_y',
+                 '_corners_local', '_corners')
+    
     def __init__(self, x, y, color, is_player=True, image_path=None):
         """
         Inicializa un auto
@@ -54,6 +62,16 @@ class Car:
                              180, 202.5, 225, 247.5, 270, 292.5, 315, 337.5]
         self.sensor_length = 150
         
+        # Buffer de observación canónico (ver features.py): los sensores
+        # escriben aquí directamente y el grabador y la red lo leen sin copiar
+        self.feature_spec = FeatureSpec(len(self.sensor_angles))
+        self.features = self.feature_spec.allocate()
+        
+        # Buffers de trabajo reutilizados en cada frame (sin asignaciones en el paso)
+        self._corners_local = ((-self.width/2, -self.height/2), (self.width/2, -self.height/2),
+                               (self.width/2, self.height/2), (-self.width/2, self.height/2))
+        self._corners = [[0.0, 0.0] for _ in range(4)]
+        
         # Estadísticas
         self.lap_count = 0
         self.checkpoint_count = 0
@@ -115,27 +133,23 @@ class Car:
         self.total_distance += abs(self.speed)
         
     def get_corners(self):
-        """Obtiene las coordenadas de las esquinas del auto para colisiones"""
+        """
+        Obtiene las coordenadas de las esquinas del auto para colisiones
+        
+        Returns:
+            Lista de 4 pares [x, y]. Es un buffer reutilizado: se sobrescribe
+            en la siguiente llamada (copiar si se necesita conservarlo)
+        """
         rad = math.radians(self.angle)
         cos_a = math.cos(rad)
         sin_a = math.sin(rad)
         
-        # Esquinas relativas al centro
-        corners_local = [
-            (-self.width/2, -self.height/2),
-            (self.width/2, -self.height/2),
-            (self.width/2, self.height/2),
-            (-self.width/2, self.height/2)
-        ]
-        
-        # Rotar y trasladar esquinas
-        corners = []
-        for lx, ly in corners_local:
-            rx = lx * cos_a - ly * sin_a + self.x
-            ry = lx * sin_a + ly * cos_a + self.y
-            corners.append((rx, ry))
+        # Rotar y trasladar esquinas (relativas al centro)
+        for corner, (lx, ly) in zip(self._corners, self._corners_local):
+            corner[0] = lx * cos_a - ly * sin_a + self.x
+            corner[1] = lx * sin_a + ly * cos_a + self.y
             
-        return corners
+        return self._corners
     
     def update_sensors(self, track):
         """
@@ -145,45 +159,45 @@ class Car:
             track: Objeto Track para detectar colisiones
         """
         for i, sensor_angle in enumerate(self.sensor_angles):
-            # Ángulo absoluto del sensor
+            # Ángulo absoluto del sensor (dirección constante en todo el rayo)
             angle = math.radians(self.angle + sensor_angle)
+            cos_a = math.cos(angle)
+            sin_a = math.sin(angle)
             
             # Buscar distancia hasta el borde
             distance = 0
             step = 5
             while distance < self.sensor_length:
                 distance += step
-                sx = self.x + math.cos(angle) * distance
-                sy = self.y + math.sin(angle) * distance
+                sx = self.x + cos_a * distance
+                sy = self.y + sin_a * distance
                 
                 # Verificar si el punto está fuera de la pista
                 if not track.is_on_track(sx, sy):
                     break
                     
             self.sensor_distances[i] = min(distance, self.sensor_length)
+            self.features[SENSOR_OFFSET + i] = self.sensor_distances[i] / self.sensor_length
     
     def get_state_vector(self):
         """
         Obtiene el vector de estado del auto para los controladores IA
         
+        Devuelve el buffer propio del auto (sin copiar): quien necesite
+        conservarlo entre frames debe copiarlo.
+        
         Returns:
-            numpy array con: [velocidad_normalizada, sensores_normalizados...]
+            numpy array float32 con: [velocidad_normalizada, sensores_normalizados...]
         """
-        # Normalizar velocidad entre -1 y 1
-        speed_norm = self.speed / self.max_speed
-        
-        # Normalizar distancias de sensores entre 0 y 1
-        sensors_norm = [d / self.sensor_length for d in self.sensor_distances]
-        
-        return np.array([speed_norm] + sensors_norm)
+        # Los sensores ya están normalizados en el buffer; solo falta la velocidad
+        self.features[SPEED_INDEX] = self.speed / self.max_speed
+        return self.features
     
-    def draw(self, screen):
-        """Dibuja el auto en la pantalla"""
+    def get_surface(self):
+        """Superficie del auto sin rotar (imagen cargada o dibujo por defecto)"""
         if self.use_image and self.car_image:
             # Usar imagen cargada
-            rotated = pygame.transform.rotate(self.car_image, -self.angle)
-            rect = rotated.get_rect(center=(self.x, self.y))
-            screen.blit(rotated, rect.topleft)
+            return self.car_image
         else:
             # Dibujar forma del carro por defecto
             car_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
@@ -243,28 +257,58 @@ class Car:
             # Spoiler trasero (pequeño detalle)
             pygame.draw.rect(car_surface, dark_color, (5, self.height - 3, self.width - 10, 3))
             
-            # Rotar el auto
-            rotated = pygame.transform.rotate(car_surface, -self.angle)
-            rect = rotated.get_rect(center=(self.x, self.y))
-            
-            # Dibujar en pantalla
-            screen.blit(rotated, rect.topleft)
+            return car_surface
+    
+    def draw(self, screen, camera=None):
+        """
+        Dibuja el auto en la pantalla
         
-    def draw_sensors(self, screen):
-        """Dibuja los sensores del auto (para debugging)"""
-        for i, sensor_angle in enumerate(self.sensor_angles):
+        Args:
+            screen: Superficie de pygame
+            camera: Camera con el desplazamiento de la vista (None = sin desplazamiento)
+        """
+        offset_y = camera.offset_y if camera is not None else 0
+        scale = camera.scale if camera is not None else 1.0
+        
+        # Rotar el auto (y escalarlo si se dibuja a resolución reducida)
+        if scale == 1.0:
+            rotated = pygame.transform.rotate(self.get_surface(), -self.angle)
+        else:
+            rotated = pygame.transform.rotozoom(self.get_surface(), -self.angle, scale)
+        rect = rotated.get_rect(center=(self.x * scale, (self.y - offset_y) * scale))
+        
+        # Dibujar en pantalla
+        screen.blit(rotated, rect.topleft)
+        
+    def draw_sensors(self, screen, camera=None, ray_step=1, markers=True):
+        """
+        Dibuja los sensores del auto (para debugging)
+        
+        Args:
+            screen: Superficie de pygame
+            camera: Camera con el desplazamiento de la vista (None = sin desplazamiento)
+            ray_step: Dibujar 1 de cada ray_step rayos
+            markers: Dibujar el círculo en el extremo de cada rayo
+        """
+        offset_y = camera.offset_y if camera is not None else 0
+        scale = camera.scale if camera is not None else 1.0
+        radius = max(1, round(3 * scale))
+        start = (self.x * scale, (self.y - offset_y) * scale)
+        for i in range(0, len(self.sensor_angles), ray_step):
+            sensor_angle = self.sensor_angles[i]
             angle = math.radians(self.angle + sensor_angle)
             distance = self.sensor_distances[i]
             
-            end_x = self.x + math.cos(angle) * distance
-            end_y = self.y + math.sin(angle) * distance
+            end_x = (self.x + math.cos(angle) * distance) * scale
+            end_y = (self.y + math.sin(angle) * distance - offset_y) * scale
             
             # Color según distancia (rojo cerca, verde lejos)
             intensity = int(255 * (distance / self.sensor_length))
             color = (255 - intensity, intensity, 0)
             
-            pygame.draw.line(screen, color, (self.x, self.y), (end_x, end_y), 1)
-            pygame.draw.circle(screen, color, (int(end_x), int(end_y)), 3)
+            pygame.draw.line(screen, color, start, (end_x, end_y), 1)
+            if markers:
+                pygame.draw.circle(screen, color, (int(end_x), int(end_y)), radius)
     
     def reset(self, x, y, angle=0):
         """Reinicia el auto a una posición inicial"""
@@ -276,3 +320,6 @@ class Car:
         self.checkpoint_count = 0
         self.total_distance = 0
         self.crashed = False
+        for i in range(len(self.sensor_distances)):
+            self.sensor_distances[i] = 0
+        self.features.fill(0)
@@ -0,0 +1,261 @@
+"""
+Clase CarBatch - Estado y física de muchos autos en arrays de NumPy
+Aplica exactamente las mismas reglas que Car (control IA, física, sensores,
+colisiones) pero para N autos a la vez, sin bucles de Python por auto
+"""
+import math
+
+import numpy as np
+
+from car import Car
+from features import SPEED_INDEX, SENSOR_OFFSET
+
+
+def compute_sensor_distances(track, xs, ys, angles, sensor_angles, sensor_length, step=5, out=None):
+    """
+    Raycasting vectorizado equivalente a Car.update_sensors
+
+    Cada rayo avanza en pasos de 'step' px hasta salir de la pista o
+    alcanzar 'sensor_length'. Acepta cualquier forma de entrada (autos,
+    frames de una sesión, ...): el resultado agrega un eje final de sensores.
+
+    Args:
+        track: Objeto Track (usa is_on_track_array)
+        xs, ys: Posiciones (arrays de la misma forma)
+        angles: Ángulo del auto en grados
+        sensor_angles: Ángulos relativos de los sensores en grados
+        sensor_length: Alcance máximo de los sensores
+        step: Paso del rayo en píxeles
+        out: Array opcional donde escribir el resultado
+
+    Returns:
+        Array de forma xs.shape + (num_sensores,) con las distancias en px
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    sensor_angles = np.asarray(sensor_angles, dtype=np.float64)
+
+    # Distancias evaluadas por el bucle de Car.update_sensors: step, 2*step, ...
+    num_steps = int(math.ceil(sensor_length / step))
+    ray_steps = np.arange(1, num_steps + 1, dtype=np.float64) * step
+
+    theta = np.radians(angles[..., None] + sensor_angles)
+    px = xs[..., None, None] + np.cos(theta)[..., None] * ray_steps
+    py = ys[..., None, None] + np.sin(theta)[..., None] * ray_steps
+
+    off_track = ~track.is_on_track_array(px, py)
+    hit = off_track.any(axis=-1)
+    first_hit = off_track.argmax(axis=-1)
+
+    distances = np.where(hit, ray_steps[first_hit], ray_steps[-1])
+    return np.minimum(distances, sensor_length, out=out)
+
+
+class CarBatch:
+    def __init__(self, num_cars, template=None):
+        """
+        Inicializa un lote de autos
+
+        Args:
+            num_cars: Número de autos del lote
+            template: Car del que se copian los parámetros físicos y de sensores
+        """
+        if template is None:
+            template = Car(0, 0, (0, 0, 0), is_player=False)
+
+        self.num_cars = num_cars
+
+        # Parámetros compartidos (mismos valores que Car)
+        self.width = template.width
+        self.height = template.height
+        self.max_speed = template.max_speed
+        self.acceleration = template.acceleration
+        self.friction = template.friction
+        self.turn_speed = template.turn_speed
+        self.sensor_angles = np.array(template.sensor_angles, dtype=np.float64)
+        self.sensor_length = template.sensor_length
+        self.sensor_step = 5
+
+        # Estado por auto
+        self.x = np.zeros(num_cars)
+        self.y = np.zeros(num_cars)
+        self.angle = np.zeros(num_cars)
+        self.speed = np.zeros(num_cars)
+        self.prev_x = np.zeros(num_cars)
+        self.prev_y = np.zeros(num_cars)
+        self.total_distance = np.zeros(num_cars)
+        self.checkpoint_count = np.zeros(num_cars, dtype=np.int64)
+        self.crashed = np.zeros(num_cars, dtype=bool)
+        self.sensor_distances = np.zeros((num_cars, len(self.sensor_angles)))
+
+        # Esquinas del auto relativas al centro (mismo orden que Car.get_corners)
+        self._corners_local = np.array([
+            (-self.width / 2, -self.height / 2),
+            (self.width / 2, -self.height / 2),
+            (self.width / 2, self.height / 2),
+            (-self.width / 2, self.height / 2)
+        ])
+
+    def reset(self, indices, x, y, angle):
+        """
+        Reinicia autos a una posición inicial (equivalente a Car.reset)
+
+        Args:
+            indices: Índices (o máscara booleana) de los autos a reiniciar
+            x, y, angle: Posición y ángulo iniciales (escalares o arrays)
+        """
+        self.x[indices] = x
+        self.y[indices] = y
+        self.angle[indices] = angle
+        self.speed[indices] = 0
+        self.prev_x[indices] = x
+        self.prev_y[indices] = y
+        self.total_distance[indices] = 0
+        self.checkpoint_count[indices] = 0
+        self.crashed[indices] = False
+        self.sensor_distances[indices] = 0
+
+    def update_ai_control(self, steering, throttle, active=None):
+        """
+        Control por IA para todos los autos (ver Car.update_ai_control)
+
+        Args:
+            steering: Array de dirección en [-1, 1]
+            throttle: Array de aceleración en [-1, 1]
+            active: Máscara opcional de autos a actualizar
+        """
+        target_speed = throttle * self.max_speed
+        speed = self.speed
+        new_speed = np.where(speed < target_speed,
+                             np.minimum(speed + self.acceleration, target_speed),
+                             np.where(speed > target_speed,
+                                      np.maximum(speed - self.acceleration, target_speed),
+                                      speed))
+
+        # La dirección se aplica con la velocidad ya actualizada
+        turning = np.abs(new_speed) > 0.5
+        new_angle = np.where(turning, self.angle + steering * self.turn_speed, self.angle)
+
+        if active is None:
+            self.speed = new_speed
+            self.angle = new_angle
+        else:
+            self.speed = np.where(active, new_speed, speed)
+            self.angle = np.where(active, new_angle, self.angle)
+
+    def apply_physics(self, active=None):
+        """
+        Aplica física básica a todos los autos (ver Car.apply_physics)
+
+        Args:
+            active: Máscara opcional de autos a actualizar
+        """
+        if active is None:
+            active = np.ones(self.num_cars, dtype=bool)
+
+        self.prev_x = np.where(active, self.x, self.prev_x)
+        self.prev_y = np.where(active, self.y, self.prev_y)
+
+        # Fricción
+        speed = self.speed
+        speed = np.where(speed > 0, np.maximum(0, speed - self.friction),
+                         np.where(speed < 0, np.minimum(0, speed + self.friction), speed))
+        self.speed = np.where(active, speed, self.speed)
+
+        # Actualizar posición basada en velocidad y ángulo
+        rad = np.radians(self.angle)
+        self.x = np.where(active, self.x + np.sin(rad) * self.speed, self.x)
+        self.y = np.where(active, self.y - np.cos(rad) * self.speed, self.y)
+
+        self.total_distance = np.where(active, self.total_distance + np.abs(self.speed),
+                                       self.total_distance)
+
+    def get_corners(self):
+        """
+        Esquinas de todos los autos
+
+        Returns:
+            Array (N, 4, 2) con las esquinas rotadas y trasladadas
+        """
+        rad = np.radians(self.angle)
+        cos_a = np.cos(rad)[:, None]
+        sin_a = np.sin(rad)[:, None]
+        lx = self._corners_local[:, 0]
+        ly = self._corners_local[:, 1]
+
+        corners = np.empty((self.num_cars, 4, 2))
+        corners[:, :, 0] = lx * cos_a - ly * sin_a + self.x[:, None]
+        corners[:, :, 1] = lx * sin_a + ly * cos_a + self.y[:, None]
+        return corners
+
+    def check_collision(self, track):
+        """
+        Verifica colisiones con el borde de la pista
+
+        Returns:
+            Array booleano (N,) con los autos que tienen alguna esquina fuera
+        """
+        corners = self.get_corners()
+        on_track = track.is_on_track_array(corners[:, :, 0], corners[:, :, 1])
+        return ~on_track.all(axis=1)
+
+    def update_sensors(self, track, active=None):
+        """
+        Actualiza los sensores de todos los autos con raycasting vectorizado
+
+        Args:
+            track: Objeto Track
+            active: Máscara opcional de autos a actualizar
+        """
+        if active is None:
+            compute_sensor_distances(track, self.x, self.y, self.angle, self.sensor_angles,
+                                     self.sensor_length, self.sensor_step, out=self.sensor_distances)
+        else:
+            self.sensor_distances[active] = compute_sensor_distances(
+                track, self.x[active], self.y[active], self.angle[active],
+                self.sensor_angles, self.sensor_length, self.sensor_step)
+
+    def check_checkpoints(self, track, active=None):
+        """
+        Avanza el contador de checkpoints de los autos que cruzaron el suyo
+
+        Returns:
+            Array booleano con los autos que pasaron un checkpoint en este frame
+        """
+        crossed = track.check_checkpoint_array(self.x, self.y, self.prev_x, self.prev_y,
+                                               self.checkpoint_count)
+        if active is not None:
+            crossed &= active
+        self.checkpoint_count += crossed
+        return crossed
+
+    def get_state_vectors(self, out=None):
+        """
+        Vectores de estado de todos los autos (mismo formato que Car.get_state_vector)
+
+        Args:
+            out: Array opcional (N, 1 + num_sensores) donde escribir
+
+        Returns:
+            Array (N, 1 + num_sensores): [velocidad_normalizada, sensores_normalizados...]
+        """
+        if out is None:
+            out = np.empty((self.num_cars, 1 + len(self.sensor_angles)), dtype=np.float32)
+        out[:, SPEED_INDEX] = self.speed / self.max_speed
+        out[:, SENSOR_OFFSET:] = self.sensor_distances / self.sensor_length
+        return out
+
+    def load_from_cars(self, cars):
+        """Copia el estado de una lista de objetos Car al lote"""
+        for i, car in enumerate(cars):
+            self.x[i] = car.x
+            self.y[i] = car.y
+            self.angle[i] = car.angle
+            self.speed[i] = car.speed
+            self.prev_x[i] = car.prev_x
+            self.prev_y[i] = car.prev_y
+            self.total_distance[i] = car.total_distance
+            self.checkpoint_count[i] = car.checkpoint_count
+            self.crashed[i] = car.crashed
+            self.sensor_distances[i] = car.sensor_distances
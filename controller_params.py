@@ -0,0 +1,57 @@
+"""
+Parámetros ajustables de los controladores
+Los umbrales de FuzzyController y las velocidades de OpponentController
+tienen valores por defecto en el código; parameter_search.py puede guardar
+valores ajustados en config/, que los controladores cargan al iniciar.
+"""
+import json
+import os
+from datetime import datetime
+
+CONFIG_DIR = 'config'
+
+
+def load_params(path, defaults):
+    """
+    Carga parámetros ajustados sobre los valores por defecto
+
+    Args:
+        path: Archivo JSON con una clave 'params' (None = solo valores por defecto)
+        defaults: Diccionario con todos los parámetros y sus valores por defecto
+
+    Returns:
+        Diccionario con los mismos claves que defaults
+    """
+    params = dict(defaults)
+    if path is None or not os.path.exists(path):
+        return params
+
+    try:
+        with open(path) as f:
+            stored = json.load(f).get('params', {})
+    except (OSError, ValueError) as e:
+        print(f"⚠ No se pudieron leer los parámetros de {path}: {e}")
+        return params
+
+    unknown = sorted(set(stored) - set(defaults))
+    if unknown:
+        print(f"⚠ Parámetros desconocidos ignorados en {path}: {', '.join(unknown)}")
+    params.update({k: float(v) for k, v in stored.items() if k in defaults})
+    print(f"✓ Parámetros ajustados cargados desde {path}")
+    return params
+
+
+def save_params(path, params, **metadata):
+    """
+    Guarda parámetros ajustados en el formato que lee load_params
+
+    Args:
+        path: Archivo JSON destino
+        params: Diccionario nombre -> valor
+        **metadata: Datos extra de la búsqueda (fitness, semillas, ...)
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    payload = {'params': params, 'created': datetime.now().isoformat(timespec='seconds'), **metadata}
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f"✓ Parámetros guardados en {path}")
@@ -0,0 +1,136 @@
+"""
+Precarga de controladores en segundo plano
+Construir el controlador neuronal importa TensorFlow, carga el modelo y, en
+la primera inferencia, arma el grafo: varios segundos que antes congelaban
+el juego al elegir el modo. Un hilo en segundo plano construye y calienta
+los controladores mientras se muestra el menú, así el primer frame de la
+carrera tarda lo mismo que los demás.
+"""
+import threading
+import time
+
+from car import Car
+
+# Orden de carga: el difuso es rápido y queda listo primero
+CONTROLLER_NAMES = ('fuzzy', 'neural')
+
+
+def _build_fuzzy():
+    """Construye el controlador difuso"""
+    from fuzzy_controller import FuzzyController
+    return FuzzyController()
+
+
+def _build_neural():
+    """Construye el controlador neuronal (importa TensorFlow y carga el modelo)"""
+    from neural_controller import NeuralController
+    # El vigilante del modelo también importa Keras: se deja importado aquí
+    import model_watcher  # noqa: F401
+    controller = NeuralController()
+    if not controller.is_trained:
+        print("⚠ Red neuronal no entrenada. Ejecuta train_network.py primero.")
+    return controller
+
+
+BUILDERS = {
+    'fuzzy': _build_fuzzy,
+    'neural': _build_neural
+}
+
+
+def warm_up(controller):
+    """
+    Ejecuta una inferencia de prueba para que el primer frame no pague la
+    inicialización (grafo de la red, simulación difusa)
+
+    Args:
+        controller: Controlador con método compute(car)
+    """
+    if not getattr(controller, 'is_trained', True):
+        return
+    dummy = Car(0, 0, (0, 0, 0), is_player=False)
+    controller.compute(dummy)
+    if hasattr(controller, 'reset'):
+        controller.reset()
+
+
+class ControllerPreloader:
+    def __init__(self, names=CONTROLLER_NAMES, on_ready=None, builders=None):
+        """
+        Inicializa la precarga
+
+        Args:
+            names: Controladores a precargar, en orden
+            on_ready: Función on_ready(name) llamada desde el hilo de carga cuando
+                      un controlador termina (con o sin error); permite despertar
+                      a quien espera eventos sin consultar el estado en cada frame
+            builders: Constructores por nombre (por defecto BUILDERS)
+        """
+        self.names = tuple(names)
+        self.on_ready = on_ready
+        self.builders = BUILDERS if builders is None else builders
+        self.load_times = {}
+
+        self._controllers = {}
+        self._errors = {}
+        self._events = {name: threading.Event() for name in self.names}
+        self._thread = None
+
+    def start(self):
+        """Inicia la carga en un hilo en segundo plano"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='ControllerPreloader', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Bucle del hilo: construye y calienta cada controlador en orden"""
+        for name in self.names:
+            start = time.perf_counter()
+            try:
+                controller = self.builders[name]()
+                warm_up(controller)
+                self._controllers[name] = controller
+                self.load_times[name] = time.perf_counter() - start
+                print(f"✓ Controlador '{name}' precargado en {self.load_times[name]:.2f}s")
+            except Exception as e:
+                self._errors[name] = e
+                print(f"⚠ No se pudo precargar el controlador '{name}': {e}")
+            finally:
+                self._events[name].set()
+                if self.on_ready is not None:
+                    self.on_ready(name)
+
+    def is_ready(self, name):
+        """True si el controlador terminó de cargar (con o sin error)"""
+        return self._events[name].is_set()
+
+    def get(self, name, timeout=None):
+        """
+        Devuelve el controlador, esperando a que termine de cargar si hace falta
+
+        Args:
+            name: 'fuzzy' o 'neural'
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            El controlador listo para usar
+
+        Raises:
+            TimeoutError: Si no terminó de cargar dentro del tiempo indicado
+            Exception: El error original si la carga falló
+        """
+        self.start()
+        if not self._events[name].wait(timeout):
+            raise TimeoutError(f"El controlador '{name}' sigue cargando")
+        if name in self._errors:
+            raise self._errors[name]
+        return self._controllers[name]
+
+    def get_status_text(self, name):
+        """Texto corto para el indicador de carga del menú"""
+        if name in self._errors:
+            return "error al cargar"
+        if self.is_ready(name):
+            return f"listo ({self.load_times[name]:.1f}s)"
+        return "cargando..."
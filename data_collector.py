@@ -1,14 +1,26 @@
 """
 Data Collector - Captura datos de conducción manual para entrenar la IA
 """
-import csv
 import os
 from datetime import datetime
 
+import numpy as np
+
+from features import DEFAULT_SPEC, LABEL_COLUMNS, POSE_COLUMNS
+
 class DataCollector:
-    def __init__(self):
-        """Inicializa el colector de datos"""
-        self.data_buffer = []
+    def __init__(self, feature_spec=DEFAULT_SPEC, initial_capacity=4096):
+        """
+        Inicializa el colector de datos
+        
+        Args:
+            feature_spec: Especificación de características (orden de columnas)
+            initial_capacity: Filas preasignadas (el buffer crece al doble si se llena)
+        """
+        self.feature_spec = feature_spec
+        self.num_columns = feature_spec.size + len(LABEL_COLUMNS) + len(POSE_COLUMNS)
+        self.initial_capacity = initial_capacity
+        self.data_buffer = np.empty((initial_capacity, self.num_columns))
         self.is_recording = False
         self.filename = None
         self.frames_recorded = 0
@@ -20,7 +32,7 @@ class DataCollector:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.filename = f"training_data_{timestamp}.csv"
         
-        self.data_buffer = []
+        self.data_buffer = np.empty((self.initial_capacity, self.num_columns))
         self.is_recording = True
         self.frames_recorded = 0
         
@@ -34,7 +46,7 @@ class DataCollector:
         
         self.is_recording = False
         
-        if len(self.data_buffer) == 0:
+        if self.frames_recorded == 0:
             print("⚠ No hay datos para guardar")
             return
         
@@ -61,24 +73,23 @@ class DataCollector:
         if abs(car.speed) < self.min_speed_threshold or car.crashed:
             return
         
-        # Construir registro: [16 sensores, velocidad, steering, throttle]
-        # Total: 19 valores
-        record = []
-        
-        # Agregar distancias de los 16 sensores (normalizadas)
-        for dist in car.sensor_distances:
-            normalized_dist = dist / car.sensor_length  # 0 a 1
-            record.append(normalized_dist)
+        # Fila: [velocity, sensores..., steering, throttle, x, y, ángulo]
+        # Las características se leen del buffer canónico del auto (mismo
+        # orden que la entrada de la red)
+        if self.frames_recorded == len(self.data_buffer):
+            self.data_buffer = np.resize(self.data_buffer, (2 * len(self.data_buffer), self.num_columns))
         
-        # Agregar velocidad normalizada
-        normalized_speed = car.speed / car.max_speed  # -1 a 1
-        record.append(normalized_speed)
+        row = self.data_buffer[self.frames_recorded]
+        size = self.feature_spec.size
+        row[:size] = car.get_state_vector()
+        row[size] = steering
+        row[size + 1] = throttle
         
-        # Agregar acciones del jugador
-        record.append(steering)
-        record.append(throttle)
+        # Pose cruda del auto: permite recalcular sensores con otra configuración
+        row[size + 2] = car.x
+        row[size + 3] = car.y
+        row[size + 4] = car.angle
         
-        self.data_buffer.append(record)
         self.frames_recorded += 1
         
     def _save_to_csv(self):
@@ -87,21 +98,11 @@ class DataCollector:
         os.makedirs("training_data", exist_ok=True)
         filepath = os.path.join("training_data", self.filename)
         
-        # Escribir CSV
-        with open(filepath, 'w', newline='') as f:
-            writer = csv.writer(f)
-            
-            # Encabezado
-            header = []
-            for i in range(16):
-                header.append(f"sensor_{i}")
-            header.append("velocity")
-            header.append("steering")
-            header.append("throttle")
-            writer.writerow(header)
-            
-            # Datos
-            writer.writerows(self.data_buffer)
+        # Escribir CSV (características y etiquetas en float32, pose con precisión completa)
+        size = self.feature_spec.size + len(LABEL_COLUMNS)
+        fmt = ['%.9g'] * size + ['%.17g'] * len(POSE_COLUMNS)
+        np.savetxt(filepath, self.data_buffer[:self.frames_recorded], fmt=fmt, delimiter=',',
+                   header=','.join(self.feature_spec.header()), comments='')
         
         print(f"   Archivo guardado en: {filepath}")
         
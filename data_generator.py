@@ -58,8 +58,8 @@ class DataGenerator:
                 # Obtener acción del controlador difuso
                 steering, throttle = fuzzy.compute(car)
                 
-                # Guardar estado y acción
-                state = car.get_state_vector()
+                # Guardar estado y acción (copia: get_state_vector devuelve el buffer del auto)
+                state = car.get_state_vector().copy()
                 action = np.array([steering, throttle])
                 
                 self.data_X.append(state)
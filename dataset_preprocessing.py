@@ -0,0 +1,212 @@
+"""
+Preprocesamiento del dataset antes de entrenar
+Las sesiones grabadas están dominadas por frames casi idénticos en recta
+(steering=0, throttle=1). Este módulo:
+  1. Elimina casi-duplicados: hash de la fila cuantizada (estado + acción).
+     Cada fila conservada lleva como peso cuántas filas representa, así el
+     modelo sigue viendo la distribución original con muchas menos filas.
+  2. (Opcional) Submuestrea por celdas de steering x throttle las celdas con
+     demasiadas filas únicas; las conservadas heredan el peso de las descartadas.
+  3. (Opcional) Limita el peso total de las celdas dominantes para que las
+     maniobras de corrección pesen más.
+Los pasos 2 y 3 cambian la distribución que aprende la red (a propósito):
+el error sobre datos con la distribución original sube. Solo el paso 1 la
+conserva.
+"""
+import numpy as np
+
+# Celda de cuantización por defecto: con las sesiones incluidas, el MSE de
+# validación con deduplicación iguala al del conjunto completo
+DEFAULT_QUANTIZATION_STEP = 0.01
+
+
+def quantized_row_keys(X, y, quantization_step=DEFAULT_QUANTIZATION_STEP):
+    """
+    Claves hashables de cada fila cuantizada
+
+    Args:
+        X: Características (N, F)
+        y: Acciones (N, 2)
+        quantization_step: Tamaño de celda en unidades normalizadas
+
+    Returns:
+        Array (N,) de bytes: filas iguales tras cuantizar tienen la misma clave
+    """
+    rows = np.round(np.hstack([X, y]) / quantization_step).astype(np.int32)
+    rows = np.ascontiguousarray(rows)
+    return rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+
+
+def deduplicate(X, y, quantization_step=DEFAULT_QUANTIZATION_STEP):
+    """
+    Elimina filas casi duplicadas (se conserva la primera aparición)
+
+    Args:
+        X: Características (N, F)
+        y: Acciones (N, 2)
+        quantization_step: Tamaño de celda en unidades normalizadas
+
+    Returns:
+        Tupla (X, y, pesos): el peso es la cantidad de filas que representa cada una
+    """
+    keys = quantized_row_keys(X, y, quantization_step)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    counts = np.bincount(inverse.ravel())
+
+    order = np.argsort(first)
+    keep = first[order]
+    return X[keep], y[keep], counts[order].astype(np.float64)
+
+
+def action_bins(y, steering_bins=5, throttle_bins=5):
+    """
+    Celda de steering x throttle de cada fila
+
+    Returns:
+        Array (N,) con el índice de celda en [0, steering_bins * throttle_bins)
+    """
+    steering = np.clip(((y[:, 0] + 1) / 2 * steering_bins).astype(int), 0, steering_bins - 1)
+    throttle = np.clip(((y[:, 1] + 1) / 2 * throttle_bins).astype(int), 0, throttle_bins - 1)
+    return steering * throttle_bins + throttle
+
+
+def stratify(X, y, weights, steering_bins=5, throttle_bins=5, max_ratio=4.0, subsample=True,
+             cap_mass=True, seed=0):
+    """
+    Submuestreo estratificado y rebalanceo por celdas de acción
+
+    Con subsample, en cada celda se conservan como máximo max_ratio veces la
+    mediana de filas por celda (las filas conservadas heredan el peso de las
+    descartadas). Con cap_mass, el peso total de cada celda se limita a
+    max_ratio veces la mediana de peso por celda.
+
+    Args:
+        X: Características (N, F)
+        y: Acciones (N, 2)
+        weights: Peso de cada fila (ej. de deduplicate)
+        steering_bins: Divisiones de steering en [-1, 1]
+        throttle_bins: Divisiones de throttle en [-1, 1]
+        max_ratio: Tamaño máximo de celda relativo a la mediana
+        subsample: Submuestrear las celdas con demasiadas filas
+        cap_mass: Limitar el peso total de las celdas dominantes
+        seed: Semilla del submuestreo
+
+    Returns:
+        Tupla (X, y, pesos)
+    """
+    bins = action_bins(y, steering_bins, throttle_bins)
+    num_bins = steering_bins * throttle_bins
+    rows = np.bincount(bins, minlength=num_bins)
+    mass = np.bincount(bins, weights=weights, minlength=num_bins)
+    occupied = rows > 0
+
+    row_cap = max(1, int(np.ceil(max_ratio * np.median(rows[occupied]))))
+    mass_cap = max_ratio * np.median(mass[occupied])
+
+    rng = np.random.default_rng(seed)
+    keep = []
+    new_weights = []
+    for b in np.flatnonzero(occupied):
+        members = np.flatnonzero(bins == b)
+        if subsample and len(members) > row_cap:
+            members = np.sort(rng.choice(members, row_cap, replace=False))
+        w = weights[members]
+        # Conservar el peso de la celda (limitado si domina el dataset)
+        w = w * ((min(mass[b], mass_cap) if cap_mass else mass[b]) / w.sum())
+        keep.append(members)
+        new_weights.append(w)
+
+    order = np.argsort(np.concatenate(keep))
+    keep = np.concatenate(keep)[order]
+    return X[keep], y[keep], np.concatenate(new_weights)[order]
+
+
+def preprocess_dataset(X, y, quantization_step=DEFAULT_QUANTIZATION_STEP, rebalance=False,
+                       cap_mass=False, steering_bins=5, throttle_bins=5, max_ratio=4.0, seed=0,
+                       verbose=True):
+    """
+    Deduplicación y rebalanceo opcional, con reporte de lo recortado
+
+    Args:
+        X: Características (N, F)
+        y: Acciones (N, 2)
+        quantization_step: Celda de cuantización para casi-duplicados (None = sin deduplicar)
+        rebalance: Submuestrear las celdas de acción con demasiadas filas
+        cap_mass: Limitar el peso total de las celdas de acción dominantes
+        steering_bins, throttle_bins: Celdas de acción para el rebalanceo
+        max_ratio: Tamaño máximo de celda relativo a la mediana
+        seed: Semilla del submuestreo
+        verbose: Imprimir el reporte
+
+    Returns:
+        Tupla (X, y, pesos, reporte). Los pesos suman N (mismo total que sin
+        preprocesar) y se pasan a NeuralController.train(sample_weight=...)
+    """
+    total = len(X)
+    num_bins = steering_bins * throttle_bins
+    bins_before = np.bincount(action_bins(y, steering_bins, throttle_bins), minlength=num_bins)
+
+    if quantization_step is not None:
+        X_out, y_out, weights = deduplicate(X, y, quantization_step)
+    else:
+        X_out, y_out, weights = X, y, np.ones(total)
+    after_dedup = len(X_out)
+
+    if (rebalance or cap_mass) and len(X_out):
+        X_out, y_out, weights = stratify(X_out, y_out, weights, steering_bins, throttle_bins,
+                                         max_ratio, subsample=rebalance, cap_mass=cap_mass, seed=seed)
+
+    # Normalizar: el peso promedio por muestra original es 1
+    if len(weights):
+        weights = weights * (total / weights.sum())
+
+    bins_after = np.bincount(action_bins(y_out, steering_bins, throttle_bins), minlength=num_bins)
+    mass_after = np.bincount(action_bins(y_out, steering_bins, throttle_bins), weights=weights,
+                             minlength=num_bins)
+
+    report = {
+        'original': total,
+        'after_dedup': after_dedup,
+        'after_stratify': len(X_out),
+        'kept_fraction': len(X_out) / total if total else 0.0,
+        'quantization_step': quantization_step,
+        'rebalance': rebalance,
+        'cap_mass': cap_mass,
+        'bins_before': bins_before.reshape(steering_bins, throttle_bins).tolist(),
+        'bins_after': bins_after.reshape(steering_bins, throttle_bins).tolist(),
+        'weight_after': np.round(mass_after, 1).reshape(steering_bins, throttle_bins).tolist()
+    }
+
+    if verbose:
+        print_report(report)
+
+    return X_out, y_out, weights, report
+
+
+def print_report(report):
+    """Imprime el reporte de preprocesamiento"""
+    total = max(report['original'], 1)
+    print(f"\n🧹 Preprocesamiento del dataset:")
+    print(f"   Original:        {report['original']} muestras")
+    if report['quantization_step'] is not None:
+        print(f"   Sin duplicados:  {report['after_dedup']} "
+              f"(-{100 * (1 - report['after_dedup'] / total):.1f}%, celda {report['quantization_step']})")
+    if report['rebalance']:
+        print(f"   Estratificado:   {report['after_stratify']}")
+    if report['cap_mass']:
+        print("   Peso de las celdas dominantes limitado")
+    print(f"   Se conserva el {100 * report['kept_fraction']:.1f}% de las filas")
+
+    # Celdas ocupadas (steering, throttle en [-1, 1]): filas antes → filas después (peso)
+    steering_bins = len(report['bins_before'])
+    throttle_bins = len(report['bins_before'][0])
+    print("   Celdas steering x throttle: filas antes → después (peso):")
+    for s in range(steering_bins):
+        for t in range(throttle_bins):
+            before = report['bins_before'][s][t]
+            if before == 0:
+                continue
+            s_center = -1 + (2 * s + 1) / steering_bins
+            t_center = -1 + (2 * t + 1) / throttle_bins
+            print(f"      ({s_center:+.1f}, {t_center:+.1f}): {before:>7} → "
+                  f"{report['bins_after'][s][t]:<6} ({report['weight_after'][s][t]:.0f})")
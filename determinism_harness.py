@@ -0,0 +1,470 @@
+"""
+Arnés de determinismo para validar implementaciones optimizadas
+Corre un conjunto fijo de carreras con semilla en la implementación de
+referencia (Car, Track y los controladores tal como los usa RaceSimulator) y
+en una implementación alternativa, y compara las trayectorias frame a frame
+(posición, ángulo, velocidad, checkpoints, choque y cada sensor) dentro de
+una tolerancia. Reporta el primer frame, auto y campo que difieren.
+
+Alternativas:
+  batch      CarBatch (física, sensores, colisiones y checkpoints vectorizados)
+  patched    La referencia con funciones reemplazadas por --patch
+  reference  La referencia contra sí misma (verifica que el arnés es determinista)
+
+Uso:
+  python determinism_harness.py
+  python determinism_harness.py --patch car:Car.update_sensors=fast_sensors:update_sensors
+"""
+import argparse
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from car import Car
+from car_batch import CarBatch
+from opponent_controller import OpponentController
+from race_simulator import RaceSimulator, ManualBaselineController
+from track import Track
+
+CANDIDATES = ('batch', 'patched', 'reference')
+PLAYERS = ('manual', 'fuzzy', 'neural')
+
+# Campos comparados por auto y frame (los sensores van al final, uno por rayo)
+STATE_FIELDS = ('x', 'y', 'angle', 'speed', 'checkpoint_count', 'crashed')
+NUM_SENSORS = len(Car(0, 0, (0, 0, 0), is_player=False).sensor_angles)
+FIELDS = STATE_FIELDS + tuple(f'sensor_{i}' for i in range(NUM_SENSORS))
+SENSOR_COLUMN = len(STATE_FIELDS)
+
+# Carreras por jugador: (dificultad, oponentes, largo de pista, variación de ángulo inicial)
+# Las salidas torcidas en pistas largas fuerzan choques contra el borde y la
+# recuperación del difuso (la parte con azar del controlador)
+SCENARIO_TEMPLATES = (
+    ('medium', 1, None, 2.0),
+    ('hard', 3, 3000, 2.0),
+    ('easy', 1, 3000, 10.0),
+)
+DEFAULT_SEEDS = (1, 2)
+# Tope por carrera: los autos atascados contra el borde no alargan la corrida
+DEFAULT_MAX_TIME = 12.0
+
+# Ventana del juego (las pistas se centran en ella)
+WINDOW_SIZE = (1200, 800)
+
+_MISSING = object()
+
+
+def build_scenarios(players=('fuzzy', 'manual'), seeds=DEFAULT_SEEDS):
+    """
+    Conjunto fijo de carreras con semilla
+
+    Args:
+        players: Controladores del jugador a cubrir
+        seeds: Semillas de cada carrera
+
+    Returns:
+        Lista de diccionarios (name, player, difficulty, opponents, track_length,
+        jitter_angle, seed)
+    """
+    scenarios = []
+    for player in players:
+        for difficulty, opponents, track_length, jitter_angle in SCENARIO_TEMPLATES:
+            for seed in seeds:
+                length = track_length or WINDOW_SIZE[1] - 100
+                scenarios.append({
+                    'name': f"{player}-{difficulty}-{opponents + 1}autos-{length}px-s{seed}",
+                    'player': player,
+                    'difficulty': difficulty,
+                    'opponents': opponents,
+                    'track_length': track_length,
+                    'jitter_angle': jitter_angle,
+                    'seed': seed
+                })
+    return scenarios
+
+
+# Controladores del jugador ya construidos (RaceSimulator.reset reinicia su estado)
+_player_controllers = {}
+
+
+def _get_player_controller(name):
+    """Crea (o reutiliza) el controlador del jugador"""
+    if name not in _player_controllers:
+        if name == 'manual':
+            _player_controllers[name] = ManualBaselineController()
+        elif name == 'fuzzy':
+            from fuzzy_controller import FuzzyController
+            _player_controllers[name] = FuzzyController()
+        elif name == 'neural':
+            from neural_controller import NeuralController
+            _player_controllers[name] = NeuralController()
+        else:
+            raise ValueError(f"Controlador desconocido: {name}")
+    return _player_controllers[name]
+
+
+def build_simulator(scenario, max_time=DEFAULT_MAX_TIME):
+    """
+    Pista (un carril por auto) y simulador de un escenario, reiniciado con su semilla
+
+    Args:
+        scenario: Diccionario de build_scenarios
+        max_time: Tiempo máximo de carrera en segundos
+
+    Returns:
+        RaceSimulator listo para el primer frame
+    """
+    num_cars = scenario['opponents'] + 1
+    track = Track.for_grid(*WINDOW_SIZE, num_cars, num_lanes=max(2, num_cars),
+                           track_length=scenario['track_length'])
+    controllers = [_get_player_controller(scenario['player'])]
+    controllers += [OpponentController(scenario['difficulty']) for _ in range(scenario['opponents'])]
+    simulator = RaceSimulator(track, controllers, max_time=max_time,
+                              jitter_angle=scenario['jitter_angle'])
+    simulator.reset(scenario['seed'])
+    return simulator
+
+
+def _record_cars(cars, out):
+    """Copia el estado de una lista de Car en una fila (autos, campos) de la trayectoria"""
+    for row, car in zip(out, cars):
+        row[0] = car.x
+        row[1] = car.y
+        row[2] = car.angle
+        row[3] = car.speed
+        row[4] = car.checkpoint_count
+        row[5] = car.crashed
+        row[SENSOR_COLUMN:] = car.sensor_distances
+
+
+def _record_batch(batch, out):
+    """Copia el estado de un CarBatch en una fila (autos, campos) de la trayectoria"""
+    out[:, 0] = batch.x
+    out[:, 1] = batch.y
+    out[:, 2] = batch.angle
+    out[:, 3] = batch.speed
+    out[:, 4] = batch.checkpoint_count
+    out[:, 5] = batch.crashed
+    out[:, SENSOR_COLUMN:] = batch.sensor_distances
+
+
+def run_reference(simulator):
+    """
+    Corre una carrera con Car y Track (el camino de RaceSimulator y del juego)
+
+    Args:
+        simulator: RaceSimulator de build_simulator
+
+    Returns:
+        Array (frames + 1, autos, campos): el estado inicial y el de cada frame
+    """
+    trajectory = np.empty((simulator.max_frames + 1, len(simulator.cars), len(FIELDS)))
+    _record_cars(simulator.cars, trajectory[0])
+
+    done = simulator.is_done()
+    while not done:
+        done = simulator.step()
+        _record_cars(simulator.cars, trajectory[simulator.frame])
+    return trajectory[:simulator.frame + 1]
+
+
+class _BatchCarView:
+    """Vista de un auto de un CarBatch con los atributos que leen los controladores"""
+    __slots__ = ('batch', 'index')
+
+    def __init__(self, batch, index):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def x(self):
+        return self.batch.x[self.index]
+
+    @property
+    def y(self):
+        return self.batch.y[self.index]
+
+    @property
+    def angle(self):
+        return self.batch.angle[self.index]
+
+    @property
+    def speed(self):
+        return self.batch.speed[self.index]
+
+    @property
+    def max_speed(self):
+        return self.batch.max_speed
+
+    @property
+    def crashed(self):
+        return self.batch.crashed[self.index]
+
+    @property
+    def sensor_distances(self):
+        return self.batch.sensor_distances[self.index]
+
+    def get_state_vector(self):
+        return self.batch.get_state_vectors()[self.index]
+
+
+def run_batch(simulator):
+    """
+    Corre una carrera con CarBatch, con las mismas reglas que RaceSimulator.step
+
+    La posición inicial y el azar salen del RaceSimulator ya reiniciado con la
+    semilla; los controladores se llaman auto por auto, en el mismo orden.
+
+    Args:
+        simulator: RaceSimulator de build_simulator (solo se usan su estado inicial y controladores)
+
+    Returns:
+        Array (frames + 1, autos, campos), como run_reference
+    """
+    track = simulator.track
+    controllers = simulator.controllers
+    num_cars = len(simulator.cars)
+
+    batch = CarBatch(num_cars, template=simulator.cars[0])
+    batch.load_from_cars(simulator.cars)
+    views = [_BatchCarView(batch, i) for i in range(num_cars)]
+    steering = np.zeros(num_cars)
+    throttle = np.zeros(num_cars)
+    finished = np.zeros(num_cars, dtype=bool)
+
+    trajectory = np.empty((simulator.max_frames + 1, num_cars, len(FIELDS)))
+    _record_batch(batch, trajectory[0])
+
+    frame = 0
+    while frame < simulator.max_frames and not finished.all():
+        active = ~finished
+        batch.update_sensors(track, active=active)
+        for i in np.flatnonzero(active):
+            steering[i], throttle[i] = controllers[i].compute(views[i])
+        batch.update_ai_control(steering, throttle, active=active)
+        batch.apply_physics(active=active)
+
+        colliding = batch.check_collision(track) & active
+        batch.crashed |= colliding
+        batch.speed = np.where(colliding, batch.speed * 0.5, batch.speed)
+
+        batch.check_checkpoints(track, active=active)
+        finished |= active & (batch.y >= track.finish_line_y)
+
+        frame += 1
+        _record_batch(batch, trajectory[frame])
+    return trajectory[:frame + 1]
+
+
+def _resolve(spec):
+    """
+    Resuelve 'modulo:Objeto.atributo'
+
+    Returns:
+        Tupla (objeto padre, nombre del atributo, valor actual)
+    """
+    module_name, _, attr_path = spec.partition(':')
+    if not attr_path:
+        raise ValueError(f"Se esperaba 'modulo:atributo', no '{spec}'")
+    obj = importlib.import_module(module_name)
+    parent = name = None
+    for part in attr_path.split('.'):
+        parent, name = obj, part
+        obj = getattr(obj, part)
+    return parent, name, obj
+
+
+@contextmanager
+def apply_patches(patches):
+    """
+    Reemplaza funciones mientras dura el bloque y las restaura al salir
+
+    Args:
+        patches: Lista de pares ('modulo:destino', 'modulo:reemplazo'),
+                 ej. ('car:Car.update_sensors', 'fast_sensors:update_sensors')
+    """
+    saved = []
+    try:
+        for target, replacement in patches:
+            parent, name, _ = _resolve(target)
+            _, _, new_value = _resolve(replacement)
+            saved.append((parent, name, vars(parent).get(name, _MISSING)))
+            setattr(parent, name, new_value)
+        yield
+    finally:
+        for parent, name, original in reversed(saved):
+            if original is _MISSING:
+                delattr(parent, name)
+            else:
+                setattr(parent, name, original)
+
+
+def compare_trajectories(reference, candidate, atol=1e-9, rtol=0.0):
+    """
+    Busca la primera diferencia entre dos trayectorias
+
+    Args:
+        reference: Array (frames, autos, campos) de la referencia
+        candidate: Array de la alternativa con los mismos autos y campos
+        atol: Tolerancia absoluta por campo
+        rtol: Tolerancia relativa por campo
+
+    Returns:
+        Tupla (divergencia, error máximo). divergencia es None si coinciden o un
+        diccionario con frame, car, field, reference y candidate; una carrera
+        de distinto largo diverge en el primer frame que falta (campo 'frames').
+        Un NaN en cualquiera de las dos nunca coincide. El error máximo es la
+        mayor diferencia absoluta en los frames comunes (NaN si hubo un NaN).
+    """
+    if reference.shape[1:] != candidate.shape[1:]:
+        raise ValueError(f"Trayectorias incompatibles: {reference.shape} y {candidate.shape}")
+
+    frames = min(len(reference), len(candidate))
+    ref = reference[:frames]
+    cand = candidate[:frames]
+    error = np.abs(cand - ref)
+    max_error = float(error.max()) if error.size else 0.0
+
+    # Negado de <=: un NaN (que falla toda comparación) cuenta como diferencia
+    mismatch = ~(error <= atol + rtol * np.abs(ref))
+    if mismatch.any():
+        # argmax sobre el array aplanado: el primero en orden (frame, auto, campo)
+        frame, car, field = np.unravel_index(np.argmax(mismatch), mismatch.shape)
+        divergence = {'frame': int(frame), 'car': int(car), 'field': FIELDS[field],
+                      'reference': float(ref[frame, car, field]),
+                      'candidate': float(cand[frame, car, field])}
+        return divergence, max_error
+
+    if len(reference) != len(candidate):
+        divergence = {'frame': frames, 'car': None, 'field': 'frames',
+                      'reference': len(reference) - 1, 'candidate': len(candidate) - 1}
+        return divergence, max_error
+
+    return None, max_error
+
+
+def run_harness(candidate='batch', patches=(), scenarios=None, max_time=DEFAULT_MAX_TIME,
+                atol=1e-9, rtol=0.0):
+    """
+    Compara la referencia con una alternativa en todos los escenarios
+
+    Args:
+        candidate: 'batch', 'patched' o 'reference' (ver CANDIDATES)
+        patches: Reemplazos de apply_patches (solo para 'patched')
+        scenarios: Lista de build_scenarios (None = conjunto por defecto)
+        max_time: Tiempo máximo de cada carrera en segundos
+        atol, rtol: Tolerancias de compare_trajectories
+
+    Returns:
+        Lista de diccionarios por escenario: name, frames, divergence,
+        max_error y ms por frame de la referencia y de la alternativa
+    """
+    if candidate not in CANDIDATES:
+        raise ValueError(f"Alternativa desconocida: {candidate}")
+    if candidate == 'patched' and not patches:
+        raise ValueError("La alternativa 'patched' necesita al menos un reemplazo (--patch)")
+    if scenarios is None:
+        scenarios = build_scenarios()
+
+    results = []
+    for scenario in scenarios:
+        simulator = build_simulator(scenario, max_time)
+        start = time.perf_counter()
+        reference = run_reference(simulator)
+        reference_ms = (time.perf_counter() - start) * 1000 / max(1, len(reference) - 1)
+
+        # La construcción queda fuera de la medición (pista, controladores, reinicio)
+        with apply_patches(patches if candidate == 'patched' else ()):
+            simulator = build_simulator(scenario, max_time)
+            start = time.perf_counter()
+            trajectory = run_batch(simulator) if candidate == 'batch' else run_reference(simulator)
+        candidate_ms = (time.perf_counter() - start) * 1000 / max(1, len(trajectory) - 1)
+
+        divergence, max_error = compare_trajectories(reference, trajectory, atol, rtol)
+        results.append({
+            'name': scenario['name'],
+            'frames': len(reference) - 1,
+            'divergence': divergence,
+            'max_error': max_error,
+            'reference_ms': reference_ms,
+            'candidate_ms': candidate_ms
+        })
+    return results
+
+
+def print_results(results, candidate):
+    """Imprime la tabla por escenario y el detalle de cada divergencia"""
+    print(f"{'Escenario':<36}{'Frames':>7}{'Error máx':>11}{'Ref ms/f':>10}{'Alt ms/f':>10}  Resultado")
+    print("-" * 90)
+    for r in results:
+        d = r['divergence']
+        if d is None:
+            outcome = "✅ idéntico" if r['max_error'] == 0 else "✅ dentro de tolerancia"
+        else:
+            car = "-" if d['car'] is None else d['car']
+            outcome = f"❌ frame {d['frame']}, auto {car}, {d['field']}"
+        print(f"{r['name']:<36}{r['frames']:>7}{r['max_error']:>11.2e}"
+              f"{r['reference_ms']:>10.3f}{r['candidate_ms']:>10.3f}  {outcome}")
+
+    for r in results:
+        d = r['divergence']
+        if d is not None:
+            print(f"\n❌ {r['name']}: primera diferencia en el frame {d['frame']}"
+                  f" (auto {d['car']}, campo '{d['field']}')")
+            print(f"   referencia = {d['reference']!r}   {candidate} = {d['candidate']!r}")
+
+
+def parse_patch(text):
+    """Convierte 'modulo:destino=modulo:reemplazo' en un par para apply_patches"""
+    target, sep, replacement = text.partition('=')
+    if not sep or not target or not replacement:
+        raise argparse.ArgumentTypeError(f"Se esperaba destino=reemplazo, no '{text}'")
+    return target, replacement
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara una implementación alternativa con la referencia")
+    parser.add_argument('--candidate', choices=CANDIDATES, default=None,
+                        help="Alternativa a validar (por defecto 'patched' si hay --patch, si no 'batch')")
+    parser.add_argument('--patch', type=parse_patch, action='append', default=[],
+                        help="Reemplazo modulo:destino=modulo:reemplazo (repetible), "
+                             "ej. car:Car.update_sensors=fast_sensors:update_sensors")
+    parser.add_argument('--players', nargs='+', choices=PLAYERS, default=['fuzzy', 'manual'],
+                        help="Controladores del jugador a cubrir")
+    parser.add_argument('--seeds', type=int, nargs='+', default=list(DEFAULT_SEEDS),
+                        help="Semillas de las carreras")
+    parser.add_argument('--max-time', type=float, default=DEFAULT_MAX_TIME, help="Tiempo máximo por carrera (s)")
+    parser.add_argument('--atol', type=float, default=1e-9, help="Tolerancia absoluta (0 = bit a bit)")
+    parser.add_argument('--rtol', type=float, default=0.0, help="Tolerancia relativa")
+    args = parser.parse_args()
+
+    candidate = args.candidate or ('patched' if args.patch else 'batch')
+    scenarios = build_scenarios(args.players, args.seeds)
+
+    print("=" * 90)
+    print("  ARNÉS DE DETERMINISMO")
+    print("=" * 90)
+    print(f"Referencia: Car + Track   Alternativa: {candidate}   "
+          f"{len(scenarios)} escenarios   tolerancia atol={args.atol:g} rtol={args.rtol:g}")
+    for target, replacement in args.patch:
+        print(f"   {target} → {replacement}")
+    print()
+
+    start = time.perf_counter()
+    try:
+        results = run_harness(candidate, args.patch, scenarios, args.max_time, args.atol, args.rtol)
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"❌ {e}")
+        return 2
+    print_results(results, candidate)
+
+    failed = sum(r['divergence'] is not None for r in results)
+    print(f"\n{'✅' if not failed else '❌'} {len(results) - failed}/{len(results)} escenarios "
+          f"coinciden ({time.perf_counter() - start:.1f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
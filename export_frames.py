@@ -0,0 +1,194 @@
+"""
+Exportación de repeticiones a secuencias de imágenes
+Re-simula una repetición sin ventana y dibuja cada frame fuera de pantalla
+con el mismo código del juego (Track.draw, Car.draw). Los rangos de frames
+se reparten en un pool de procesos: cada worker salta con seek() al
+keyframe de su rango y escribe sus PNG, así el tiempo baja con los núcleos.
+
+Uso: python export_frames.py replays/replay_xxx.npz --workers 4
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Worker sin ventana: debe definirse antes de importar pygame
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from camera import Camera
+from car import Car
+from replay import Replay, ReplayPlayer
+
+# Apariencia de los autos (mismos colores e imágenes que Game)
+COLOR_PLAYER = (0, 120, 255)
+COLOR_OPPONENT = (255, 80, 80)
+PLAYER_IMAGE = "images/car_player.png"
+OPPONENT_IMAGE = "images/car_opponent.png"
+
+# Estado por proceso: repetición, pista y superficies se crean una vez por worker
+_worker_state = {}
+
+
+def _init_worker(replay_path, scale, show_sensors):
+    """Inicializa un worker del pool (pygame sin ventana, repetición y autos dibujables)"""
+    pygame.init()
+    # Modo de video mínimo: convert_alpha() de las imágenes lo necesita
+    pygame.display.set_mode((1, 1))
+
+    replay = Replay.load(replay_path)
+    player = ReplayPlayer(replay)
+    track = player.track
+
+    camera = Camera(track.width, track.height, track.world_height)
+    camera.scale = scale
+    surface = pygame.Surface((round(track.width * scale), round(track.height * scale))).convert()
+
+    # Autos con imagen para dibujar; copian la pose de los autos re-simulados
+    sprites = [Car(0, 0, COLOR_PLAYER, is_player=True, image_path=PLAYER_IMAGE)]
+    sprites += [Car(0, 0, COLOR_OPPONENT, is_player=False, image_path=OPPONENT_IMAGE)
+                for _ in range(replay.num_cars - 1)]
+
+    _worker_state.update(player=player, track=track, camera=camera, surface=surface,
+                         sprites=sprites, show_sensors=show_sensors,
+                         font=pygame.font.Font(None, max(12, round(28 * scale))),
+                         fps=replay.header.get('fps', 60))
+
+
+def draw_frame(surface, track, camera, player, sprites, show_sensors, font, fps):
+    """
+    Dibuja el estado actual de la re-simulación
+
+    Args:
+        surface: Superficie destino
+        track: Pista de la repetición
+        camera: Cámara (sigue al auto 0, como en el juego)
+        player: ReplayPlayer posicionado en el frame a dibujar
+        sprites: Autos dibujables, uno por auto de la repetición
+        show_sensors: Dibujar los rayos de los sensores
+        font: Fuente del rótulo de frame y tiempo
+        fps: Frames por segundo de la repetición
+    """
+    camera.follow(player.cars[0].y)
+    track.draw(surface, camera)
+
+    for car, sprite in zip(player.cars, sprites):
+        sprite.x, sprite.y, sprite.angle = car.x, car.y, car.angle
+        if show_sensors and camera.is_visible(car.x, car.y, car.sensor_length):
+            # Los sensores no forman parte del estado re-simulado: se miden aquí
+            car.update_sensors(track)
+            sprite.sensor_distances[:] = car.sensor_distances
+            sprite.draw_sensors(surface, camera)
+
+    for sprite in sprites:
+        if camera.is_visible(sprite.x, sprite.y, sprite.height):
+            sprite.draw(surface, camera)
+
+    label = font.render(f"Frame {player.frame}  |  {player.frame / fps:.2f}s", True, (255, 255, 255))
+    surface.blit(label, (10, 10))
+
+
+def export_range(task):
+    """
+    Exporta un rango de frames dentro de un worker
+
+    Args:
+        task: Tupla (primer frame, frame final exclusivo, carpeta de salida)
+
+    Returns:
+        Tupla (primer frame, frames escritos, segundos)
+    """
+    start_frame, end_frame, output_dir = task
+    state = _worker_state
+    player = state['player']
+    start = time.perf_counter()
+
+    player.seek(start_frame)
+    for frame in range(start_frame, end_frame):
+        draw_frame(state['surface'], state['track'], state['camera'], player, state['sprites'],
+                   state['show_sensors'], state['font'], state['fps'])
+        pygame.image.save(state['surface'], os.path.join(output_dir, f"frame_{frame:06d}.png"))
+        player.step()
+
+    return start_frame, end_frame - start_frame, time.perf_counter() - start
+
+
+def split_ranges(start, end, workers, keyframe_interval):
+    """
+    Reparte [start, end) en rangos contiguos alineados a los keyframes
+
+    Hay varios rangos por worker para balancear la carga; alinearlos a los
+    keyframes hace que seek() restaure el estado sin re-simular frames.
+
+    Returns:
+        Lista de tuplas (inicio, fin)
+    """
+    size = max(1, math.ceil((end - start) / (workers * 4)))
+    size = math.ceil(size / keyframe_interval) * keyframe_interval
+    first = start // keyframe_interval * keyframe_interval
+    bounds = [start] + list(range(first + size, end, size)) + [end]
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def export_replay(replay_path, output_dir=None, start=0, end=None, workers=None,
+                  scale=1.0, show_sensors=False):
+    """
+    Exporta una repetición a PNG en un pool de procesos
+
+    Args:
+        replay_path: Archivo .npz de la repetición
+        output_dir: Carpeta de salida (por defecto exports/<nombre de la repetición>)
+        start: Primer frame
+        end: Frame final exclusivo (None = hasta el estado final)
+        workers: Número de procesos (None = todos los núcleos)
+        scale: Escala de las imágenes respecto de la ventana del juego
+        show_sensors: Dibujar los rayos de los sensores
+
+    Returns:
+        Tupla (frames escritos, segundos)
+    """
+    replay = Replay.load(replay_path)
+    # Los estados van del frame 0 al num_frames (estado final) inclusive
+    end = replay.num_frames + 1 if end is None else min(end, replay.num_frames + 1)
+    start = max(0, start)
+    if output_dir is None:
+        name = os.path.splitext(os.path.basename(replay_path))[0]
+        output_dir = os.path.join('exports', name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    keyframe_interval = replay.header.get('keyframe_interval', 60)
+    tasks = [(a, b, output_dir) for a, b in split_ranges(start, end, workers, keyframe_interval)]
+
+    print(f"🎞 Exportando frames {start}-{end - 1} de {replay_path} "
+          f"en {workers} procesos ({len(tasks)} rangos) → {output_dir}")
+    begin = time.perf_counter()
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(replay_path, scale, show_sensors)) as pool:
+        futures = [pool.submit(export_range, task) for task in tasks]
+        for future in as_completed(futures):
+            first, count, seconds = future.result()
+            written += count
+            print(f"   frames {first}-{first + count - 1}: {count / seconds:.1f} frames/s")
+
+    elapsed = time.perf_counter() - begin
+    print(f"✓ {written} frames en {elapsed:.1f}s ({written / elapsed:.1f} frames/s)")
+    return written, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta una repetición a imágenes PNG")
+    parser.add_argument('replay', help="Archivo .npz de la repetición")
+    parser.add_argument('--output', default=None, help="Carpeta de salida (por defecto exports/<repetición>)")
+    parser.add_argument('--start', type=int, default=0, help="Primer frame")
+    parser.add_argument('--end', type=int, default=None, help="Frame final (exclusivo)")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (por defecto: todos los núcleos)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Escala de las imágenes (ej. 0.5)")
+    parser.add_argument('--sensors', action='store_true', help="Dibujar los sensores")
+    args = parser.parse_args()
+
+    export_replay(args.replay, output_dir=args.output, start=args.start, end=args.end,
+                  workers=args.workers, scale=args.scale, show_sensors=args.sensors)
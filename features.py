@@ -0,0 +1,85 @@
+"""
+Especificación canónica de características
+Define una única vez el orden y la normalización del vector de estado que
+comparten los sensores del auto, el grabador de datos y la red neuronal:
+
+    [velocity, sensor_0, ..., sensor_{N-1}]
+
+velocity = velocidad / velocidad máxima (-1 a 1)
+sensor_i = distancia / alcance del sensor (0 a 1)
+"""
+import numpy as np
+
+FEATURE_DTYPE = np.float32
+SPEED_INDEX = 0
+SENSOR_OFFSET = 1
+
+LABEL_COLUMNS = ('steering', 'throttle')
+POSE_COLUMNS = ('x', 'y', 'angle')
+
+
+class FeatureSpec:
+    def __init__(self, num_sensors=16):
+        """
+        Inicializa la especificación
+
+        Args:
+            num_sensors: Cantidad de sensores de distancia
+        """
+        self.num_sensors = num_sensors
+        self.names = ['velocity'] + [f"sensor_{i}" for i in range(num_sensors)]
+        self.size = len(self.names)
+
+    def allocate(self, rows=None):
+        """
+        Buffer de observación preasignado
+
+        Args:
+            rows: Número de filas (None para un solo vector)
+
+        Returns:
+            Array float32 de ceros con forma (size,) o (rows, size)
+        """
+        shape = self.size if rows is None else (rows, self.size)
+        return np.zeros(shape, dtype=FEATURE_DTYPE)
+
+    def header(self):
+        """Encabezado de las sesiones grabadas: características, etiquetas y pose"""
+        return self.names + list(LABEL_COLUMNS) + list(POSE_COLUMNS)
+
+    def column_indices(self, columns):
+        """
+        Valida el esquema de una sesión y devuelve el orden canónico
+
+        Las columnas se buscan por nombre, así que también se leen sesiones
+        antiguas con los sensores antes que la velocidad.
+
+        Args:
+            columns: Nombres de columna del archivo
+
+        Returns:
+            Tupla (índices de características, índices de etiquetas)
+
+        Raises:
+            ValueError: Si faltan columnas o no coincide la cantidad de sensores
+        """
+        columns = list(columns)
+        file_sensors = sum(1 for c in columns if c.startswith('sensor_'))
+        if file_sensors != self.num_sensors:
+            raise ValueError(f"La sesión tiene {file_sensors} sensores, se esperaban {self.num_sensors}")
+
+        missing = [c for c in self.names + list(LABEL_COLUMNS) if c not in columns]
+        if missing:
+            raise ValueError(f"Faltan columnas en la sesión: {', '.join(missing)}")
+
+        features = [columns.index(c) for c in self.names]
+        labels = [columns.index(c) for c in LABEL_COLUMNS]
+        return features, labels
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Especificación que corresponde a los sensores presentes en un encabezado"""
+        return cls(sum(1 for c in columns if c.startswith('sensor_')))
+
+
+DEFAULT_SPEC = FeatureSpec(16)
@@ -2,21 +2,49 @@
 Controlador Difuso para el auto
 Usa lógica difusa para controlar velocidad y dirección basado en sensores
 """
+import math
+import os
+import random
+
 import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 
+from controller_params import CONFIG_DIR, load_params
+
+# Umbrales del control híbrido (ajustables con parameter_search.py)
+DEFAULT_PARAMS = {
+    'edge_hard': 20.0,         # Distancia lateral (px) para la corrección fuerte
+    'edge_soft': 35.0,         # Distancia lateral (px) para la corrección suave
+    'steer_hard': 0.7,         # Giro de la corrección fuerte
+    'steer_soft': 0.3,         # Giro de la corrección suave
+    'edge_slowdown': 18.0,     # Distancia lateral (px) por debajo de la cual se frena
+    'front_blocked': 60.0,     # Distancia frontal (px) que se considera bloqueada
+    'throttle_crashed': 0.2,   # Acelerador tras un choque
+    'throttle_edge': 0.4,      # Acelerador muy cerca de un borde
+    'throttle_blocked': 0.6,   # Acelerador con el frente bloqueado
+    'steer_penalty': 0.8       # Factor del acelerador durante correcciones fuertes
+}
+PARAMS_PATH = os.path.join(CONFIG_DIR, 'fuzzy_params.json')
+
 class FuzzyController:
-    def __init__(self):
-        """Inicializa el sistema de control difuso"""
+    def __init__(self, params=None, params_path=PARAMS_PATH):
+        """
+        Inicializa el sistema de control difuso
+        
+        Args:
+            params: Umbrales a usar (sobre DEFAULT_PARAMS); si se indican no se lee params_path
+            params_path: Archivo con umbrales ajustados (se ignora si no existe)
+        """
+        
+        # Umbrales del control híbrido
+        if params is None:
+            self.set_params(load_params(params_path, DEFAULT_PARAMS))
+        else:
+            self.set_params({**DEFAULT_PARAMS, **params})
         
         # Variables para detección de atasco y recuperación
-        self.stuck_counter = 0
-        self.last_x = 0
-        self.last_y = 0
-        self.reverse_timer = 0
-        self.recovery_direction = 0
-        self.crash_recovery_mode = False
+        self.reset()
         
         # ===== VARIABLES DE ENTRADA =====
         
@@ -104,6 +132,26 @@ class FuzzyController:
         print(f"  - Variables de entrada: front_sensor, left_sensor, right_sensor, speed")
         print(f"  - Variables de salida: throttle, steering")
     
+    def set_params(self, params):
+        """
+        Cambia los umbrales del control híbrido
+        
+        Args:
+            params: Diccionario con las claves de DEFAULT_PARAMS
+        """
+        self.params = dict(params)
+        for name, value in self.params.items():
+            setattr(self, name, value)
+    
+    def reset(self):
+        """Reinicia el estado de detección de atasco (al comenzar una carrera)"""
+        self.stuck_counter = 0
+        self.last_x = 0
+        self.last_y = 0
+        self.reverse_timer = 0
+        self.recovery_direction = 0
+        self.crash_recovery_mode = False
+    
     def compute(self, car):
         """
         Calcula las acciones de control basadas en el estado del auto
@@ -128,9 +176,6 @@ class FuzzyController:
         current_speed = abs(car.speed)
         
         # === DETECCIÓN DE ATASCO ===
-        import math
-        import random
-        
         distance_moved = math.sqrt((car.x - self.last_x)**2 + (car.y - self.last_y)**2)
         
         if distance_moved < 2 and abs(car.speed) < 0.5 and not car.crashed:
@@ -168,19 +213,22 @@ class FuzzyController:
             return (steering, throttle)
         
         # === CONTROL DE DIRECCIÓN PARA PISTA RECTA ===
-        steering = 0
+        steering = 0.0
+        hard_correction = False  # La penalización del acelerador depende de la rama, no del giro
         
         # PRIORIDAD 1: EVITAR COLISIÓN CON BORDES (CRÍTICO)
-        if left < 20:  # Muy cerca del borde izquierdo
-            steering = 0.7  # Girar a la DERECHA para alejarse
-        elif right < 20:  # Muy cerca del borde derecho
-            steering = -0.7  # Girar a la IZQUIERDA para alejarse
+        if left < self.edge_hard:  # Muy cerca del borde izquierdo
+            steering = self.steer_hard  # Girar a la DERECHA para alejarse
+            hard_correction = True
+        elif right < self.edge_hard:  # Muy cerca del borde derecho
+            steering = -self.steer_hard  # Girar a la IZQUIERDA para alejarse
+            hard_correction = True
         
         # PRIORIDAD 2: CORRECCIÓN MODERADA cerca de bordes
-        elif left < 35:  # Cerca del borde izquierdo
-            steering = 0.3  # Corrección suave a la DERECHA
-        elif right < 35:  # Cerca del borde derecho
-            steering = -0.3  # Corrección suave a la IZQUIERDA
+        elif left < self.edge_soft:  # Cerca del borde izquierdo
+            steering = self.steer_soft  # Corrección suave a la DERECHA
+        elif right < self.edge_soft:  # Cerca del borde derecho
+            steering = -self.steer_soft  # Corrección suave a la IZQUIERDA
         
         # PRIORIDAD 3: Ir completamente recto si hay espacio
         else:
@@ -194,23 +242,23 @@ class FuzzyController:
         
         # Reducir velocidad solo si hay riesgo inmediato
         elif car.crashed:
-            throttle = 0.2  # Casi detenerse si chocó
-        elif left < 18 or right < 18:
-            throttle = 0.4  # Reducir si está muy cerca de los bordes
-        elif front < 60:
+            throttle = self.throttle_crashed  # Casi detenerse si chocó
+        elif left < self.edge_slowdown or right < self.edge_slowdown:
+            throttle = self.throttle_edge  # Reducir si está muy cerca de los bordes
+        elif front < self.front_blocked:
             # Frente bloqueado (probablemente otro auto)
-            throttle = 0.6  # Reducir para no chocar
+            throttle = self.throttle_blocked  # Reducir para no chocar
         else:
             # Pista despejada: acelerar
             throttle = 1.0
         
         # Reducir si está haciendo correcciones fuertes
-        if abs(steering) > 0.5:
-            throttle *= 0.8
+        if hard_correction:
+            throttle *= self.steer_penalty
         
-        # Limitar valores
-        steering = np.clip(steering, -1, 1)
-        throttle = np.clip(throttle, -1, 1)
+        # Limitar valores (floats de Python: np.clip devolvería escalares de NumPy)
+        steering = min(max(steering, -1.0), 1.0)
+        throttle = min(max(throttle, -1.0), 1.0)
         
         return steering, throttle
     
@@ -2,17 +2,60 @@
 Clase Game - Gestiona el juego principal
 """
 import pygame
+import math
+import random
 import sys
+import time
+import numpy as np
 from car import Car
+from car_batch import CarBatch
+from camera import Camera
 from track import Track
-from fuzzy_controller import FuzzyController
-from neural_controller import NeuralController
+from controller_preloader import ControllerPreloader
 from opponent_controller import OpponentController
 from data_collector import DataCollector
+from performance_monitor import PerformanceMonitor
+from quality_governor import QualityGovernor
+from replay import ReplayRecorder, encode_keys
+from telemetry import TelemetrySender
+from simulation_process import (SimulationProcess, SENSOR_COLUMN, STATUS_FRAME, STATUS_MODEL_VERSION,
+                                STATUS_STEP_MS, STATUS_WINNER, WINNER_NAMES)
+
+# Escalas de la resolución interna que recorre la tecla [F]
+RENDER_SCALES = (1.0, 0.75, 0.5)
+
+# Evento que publica la precarga cuando un controlador termina de cargar
+CONTROLLER_READY = pygame.event.custom_type()
+
+# Eventos de ventana tras los que hay que volver a presentar una pantalla estática
+WINDOW_REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN,
+                        pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED)
+
+# Intervalo de la animación "Cargando..." del menú (ms)
+LOADING_ANIMATION_MS = 300
 
 class Game:
-    def __init__(self):
-        """Inicializa el juego"""
+    def __init__(self, num_opponents=1, num_lanes=None, track_length=None, render_scale=1.0,
+                 smooth_scaling=False, simulation_process=False, telemetry=None):
+        """
+        Inicializa el juego
+        
+        Args:
+            num_opponents: Cantidad de autos oponentes (CPU)
+            num_lanes: Carriles de la pista (None = según la cantidad de autos)
+            track_length: Largo de la pista en px (None = cabe en la ventana)
+            render_scale: Escala de la resolución interna del mundo (ej. 0.5)
+            smooth_scaling: Ampliar con smoothscale (más suave, más costoso) en vez de scale
+            simulation_process: Simular en un proceso aparte a ritmo fijo (ver simulation_process.py)
+            telemetry: Tupla (host, puerto) a la que enviar telemetría por frame (None = sin telemetría)
+        
+        Raises:
+            ValueError: Si num_opponents es menor que 1 (la carrera necesita un rival)
+                        o render_scale no está en (0, 1]
+        """
+        if num_opponents < 1:
+            raise ValueError(f"Se necesita al menos un oponente, no {num_opponents}")
+        
         pygame.init()
         
         # Configuración de ventana
@@ -29,21 +72,51 @@ class Game:
         self.font_large = pygame.font.Font(None, 48)
         self.font_medium = pygame.font.Font(None, 36)
         self.font_small = pygame.font.Font(None, 24)
+        self.font_mono = pygame.font.SysFont('monospace', 15)
         
         # Estado del juego
         self.state = 'menu'  # 'menu', 'playing', 'finished'
         self.control_mode = None  # 'manual', 'fuzzy', 'neural'
         
-        # Crear objetos del juego
-        self.track = Track(self.width, self.height)
+        # Crear objetos del juego (grilla de salida para jugador + oponentes)
+        self.num_opponents = num_opponents
+        self.track = Track.for_grid(self.width, self.height, num_opponents + 1, num_lanes,
+                                    track_length=track_length)
+        
+        # Cámara que sigue al jugador (pistas más largas que la ventana)
+        self.camera = Camera(self.width, self.height, self.track.world_height)
         
-        # Autos
+        # Autos: el jugador es un Car; los oponentes se simulan en lote (CarBatch)
         self.player_car = None
-        self.opponent_car = None
+        self.opponents = None
+        self.opponent_template = None  # Car del que se toma la imagen de los oponentes
+        self.opponent_sprites = {}     # Imagen rotada por ángulo (grados enteros)
+        self.opponent_base = None      # Imagen de los oponentes a la escala de dibujo
+        self.opponent_leader_checkpoints = 0
         
         # Controladores
         self.fuzzy_controller = None
         self.neural_controller = None
+        self.model_watcher = None  # Recarga en caliente del modelo neuronal
+        
+        # Simulación en otro proceso: este solo dibuja la última instantánea
+        self.simulation = None
+        if simulation_process:
+            self.simulation = SimulationProcess(self.track.get_config(), num_opponents, fps=self.fps,
+                                                on_ready=self.notify_controller_ready)
+            self.simulation.start()
+            print("⚠ Con la simulación en otro proceso no se graban repeticiones ni datos de entrenamiento")
+        
+        # Precarga en segundo plano mientras se muestra el menú: elegir un modo
+        # no congela el juego construyendo el controlador (ver controller_preloader.py).
+        # Con la simulación aparte los controladores se cargan en ese proceso.
+        if self.simulation is not None:
+            self.preloader = self.simulation
+        else:
+            self.preloader = ControllerPreloader(on_ready=self.notify_controller_ready)
+            self.preloader.start()
+        self.pending_mode = None  # Modo elegido que espera a su controlador
+        self.menu_error = None  # Error de carga del último modo elegido (se muestra en el menú)
         
         # Sistema de niveles progresivos
         self.current_level = 1  # Nivel actual (1, 2, 3)
@@ -58,6 +131,44 @@ class Game:
         self.game_time = 0
         self.show_sensors = False
         
+        # Repeticiones: cada carrera terminada se guarda en replays/
+        self.replay_recorder = ReplayRecorder()
+        self.race_seed = None
+        
+        # Monitor de rendimiento (overlay con [P])
+        self.perf = PerformanceMonitor()
+        
+        # Culling contra la vista: objetos (dibujados, descartados) en el último frame
+        self.cull_stats = {'autos': (0, 0), 'sensores': (0, 0)}
+        
+        # Calidad de dibujo adaptativa según el tiempo de frame ([Q] fija la calidad máxima)
+        self.quality = QualityGovernor(target_fps=self.fps)
+        
+        # HUD compuesto en su propia superficie (se recompone cada hud_interval frames)
+        self.hud_surface = None
+        self.hud_age = 0
+        
+        # Resolución interna: pista, autos y sensores se dibujan en render_surface
+        # (más chica que la ventana) y se amplían una vez por frame; el HUD va a
+        # resolución nativa ([F] cambia la escala)
+        self.render_surface = None
+        self.smooth_scaling = smooth_scaling
+        self.set_render_scale(render_scale)
+        
+        # Pantallas estáticas (menú, nivel completado, fin): se componen una vez y
+        # se vuelven a presentar solo ante eventos; static_key identifica el
+        # contenido de la imagen en caché (None = hay que componerla)
+        self.static_screen = None
+        self.static_key = None
+        
+        # Telemetría por UDP para paneles externos (ver telemetry.py)
+        self.telemetry = None
+        if telemetry is not None:
+            self.telemetry = TelemetrySender(telemetry)
+            if self.simulation is not None:
+                print("⚠ Con la simulación en otro proceso no se envía telemetría")
+            print(f"📡 Telemetría hacia {telemetry[0]}:{telemetry[1]}")
+        
         # Colores
         self.COLOR_PLAYER = (0, 120, 255)
         self.COLOR_OPPONENT = (255, 80, 80)
@@ -81,34 +192,63 @@ class Game:
         
     def reset_race(self):
         """Reinicia la carrera"""
-        # Obtener posiciones de inicio desde la pista
-        player_pos = self.track.get_start_position(lane=0)
-        opponent_pos = self.track.get_start_position(lane=1)
+        # Posiciones de la grilla: el jugador sale primero (carril 0, primera fila)
+        grid = self.track.get_grid_positions(self.num_opponents + 1)
+        player_pos = grid[0].tolist()
         
-        # Auto del jugador (lane 0) - con imagen
+        # Auto del jugador - con imagen
         self.player_car = Car(player_pos[0], player_pos[1], self.COLOR_PLAYER, 
                              is_player=True, image_path="images/car_player.png")
         self.player_car.angle = player_pos[2]
-        
-        # Auto oponente (lane 1) - con imagen
-        self.opponent_car = Car(opponent_pos[0], opponent_pos[1], self.COLOR_OPPONENT, 
-                               is_player=False, image_path="images/car_opponent.png")
-        self.opponent_car.angle = opponent_pos[2]
-        
-        # Inicializar controladores si es necesario
-        if self.control_mode == 'fuzzy' and self.fuzzy_controller is None:
-            self.fuzzy_controller = FuzzyController()
-        
-        if self.control_mode == 'neural' and self.neural_controller is None:
-            self.neural_controller = NeuralController()
-            if not self.neural_controller.is_trained:
-                print("⚠ Red neuronal no entrenada. Ejecuta train_network.py primero.")
+        self.camera.follow(self.player_car.y)
+        
+        # Autos oponentes en lote - la imagen se carga una vez y se rota con caché
+        if self.opponents is None:
+            self.opponents = CarBatch(self.num_opponents)
+            self.opponent_template = Car(0, 0, self.COLOR_OPPONENT, is_player=False,
+                                         image_path="images/car_opponent.png")
+        self.opponents.reset(slice(None), grid[1:, 0], grid[1:, 1], grid[1:, 2])
+        self.opponent_leader_checkpoints = 0
+        
+        # Inicializar controladores si es necesario (ya precargados en segundo plano;
+        # con la simulación aparte el controlador y su recarga viven en ese proceso)
+        if self.simulation is None:
+            if self.control_mode == 'fuzzy' and self.fuzzy_controller is None:
+                self.fuzzy_controller = self.preloader.get('fuzzy')
+            elif self.fuzzy_controller is not None:
+                self.fuzzy_controller.reset()
+            
+            if self.control_mode == 'neural' and self.neural_controller is None:
+                from model_watcher import ModelWatcher
+                self.neural_controller = self.preloader.get('neural')
+                self.model_watcher = ModelWatcher(self.neural_controller.model_path,
+                                                  input_size=self.neural_controller.input_size)
+                self.model_watcher.start()
         
         # Reiniciar variables
+        self.menu_error = None
         self.winner = None
         self.game_time = 0
         self.state = 'playing'
         
+        # Cada carrera empieza con calidad máxima; el gobernador vuelve a medir
+        previous_level = self.quality.level
+        self.quality.reset()
+        if self.quality.level != previous_level:
+            self.apply_quality()
+        
+        # Semilla de la carrera (azar de los controladores) y grabación de la repetición
+        self.race_seed = random.randrange(2 ** 31)
+        random.seed(self.race_seed)
+        if self.simulation is not None:
+            self.simulation.start_race(self.control_mode, self.opponent_controller.difficulty, self.race_seed)
+            return
+        player_mode = 'manual' if self.control_mode == 'manual' else 'ai'
+        self.replay_recorder.start([self.player_car, self.opponents],
+                                   [player_mode] + ['ai'] * self.num_opponents,
+                                   seed=self.race_seed, fps=self.fps,
+                                   track_config=self.track.get_config())
+        
         # Iniciar grabación automática en modo manual
         if self.control_mode == 'manual':
             if not self.data_collector.is_recording:
@@ -120,52 +260,163 @@ class Game:
         running = True
         
         while running:
+            if self.state != 'playing':
+                # Pantallas estáticas: dormir hasta el próximo evento (CPU ~0 en reposo)
+                running = self.run_static_frame()
+                continue
+            
+            self.perf.begin_frame()
+            
             # Eventos
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    running = self.handle_keydown(event.key)
+            with self.perf.measure('eventos'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.KEYDOWN:
+                        running = self.handle_keydown(event.key)
             
             # Actualizar
-            if self.state == 'menu':
-                self.update_menu()
-            elif self.state == 'playing':
-                self.update_game()
-            elif self.state == 'level_complete':
-                self.update_level_complete()
-            elif self.state == 'finished':
-                self.update_finished()
+            with self.perf.measure('update'):
+                if self.state == 'playing':
+                    if self.simulation is not None:
+                        self.sync_simulation()
+                    else:
+                        self.update_game()
             
-            # Dibujar
-            self.draw()
+            # Dibujar (si la carrera terminó, la pantalla estática se compone
+            # sobre este último frame)
+            with self.perf.measure('draw'):
+                self.static_key = None
+                self.draw()
+            
+            self.perf.end_frame()
+            
+            # Ajustar la calidad con el tiempo de trabajo del frame (sin la espera del reloj)
+            if self.state == 'playing':
+                frame_ms = (time.perf_counter() - self.perf.frame_start) * 1000
+                if self.quality.record(frame_ms):
+                    self.apply_quality()
             
             # Control de FPS
             self.clock.tick(self.fps)
         
+        # Exportar tiempos de la sesión para analizar caídas de FPS
+        self.perf.export_session()
+        
+        if self.model_watcher is not None:
+            self.model_watcher.stop()
+        
+        if self.simulation is not None:
+            self.simulation.close()
+        
+        if self.telemetry is not None:
+            self.telemetry.close()
+        
         pygame.quit()
         sys.exit()
     
+    def run_static_frame(self):
+        """
+        Un paso del loop en una pantalla estática: espera bloqueante de eventos
+        y nueva presentación solo si el contenido cambió o la ventana lo pide
+        
+        Returns:
+            False si hay que salir del juego
+        """
+        # Presentar antes de dormir si el contenido cambió (ej. se acaba de entrar)
+        if self.get_static_key() != self.static_key:
+            self.draw()
+        
+        # Con un modo pendiente se despierta para animar "Cargando..."; si no,
+        # se espera sin límite (la precarga avisa con CONTROLLER_READY)
+        timeout = LOADING_ANIMATION_MS if self.pending_mode is not None else 0
+        events = [pygame.event.wait(timeout)]
+        events.extend(pygame.event.get())
+        
+        running = True
+        present = False
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                running = self.handle_keydown(event.key) and running
+            elif event.type in WINDOW_REDRAW_EVENTS:
+                present = True
+        
+        if self.state == 'menu':
+            self.update_menu()
+        elif self.state == 'level_complete':
+            self.update_level_complete()
+        elif self.state == 'finished':
+            self.update_finished()
+        
+        # Los cambios de contenido se presentan en el próximo paso; la carrera
+        # se dibuja en el loop normal
+        if present and running and self.state != 'playing':
+            self.draw()
+        return running
+    
+    def notify_controller_ready(self, name):
+        """
+        Despierta al loop cuando la precarga termina un controlador (se llama
+        desde el hilo de carga; pygame.event.post es seguro entre hilos)
+        
+        Args:
+            name: Controlador que terminó de cargar
+        """
+        try:
+            pygame.event.post(pygame.event.Event(CONTROLLER_READY, controller=name))
+        except pygame.error:
+            pass  # El juego ya cerró la ventana
+    
     def handle_keydown(self, key):
         """Maneja eventos de teclado"""
         if self.state == 'menu':
             if key == pygame.K_1:
+                self.pending_mode = None
                 self.control_mode = 'manual'
                 self.reset_race()
             elif key == pygame.K_2:
-                self.control_mode = 'fuzzy'
-                self.reset_race()
+                self.select_mode('fuzzy')
             elif key == pygame.K_3:
-                self.control_mode = 'neural'
-                self.reset_race()
+                self.select_mode('neural')
             elif key == pygame.K_ESCAPE:
                 return False
         
         elif self.state == 'playing':
             if key == pygame.K_ESCAPE:
                 self.state = 'menu'
+                if self.simulation is not None:
+                    self.simulation.stop_race()
             elif key == pygame.K_s:
                 self.show_sensors = not self.show_sensors
+            elif key == pygame.K_p:
+                self.perf.toggle_overlay()
+            elif key == pygame.K_f:
+                # Recorrer las escalas de resolución interna
+                index = RENDER_SCALES.index(self.camera.scale) if self.camera.scale in RENDER_SCALES else -1
+                self.set_render_scale(RENDER_SCALES[(index + 1) % len(RENDER_SCALES)])
+                print(f"✓ Resolución interna: {self.perf.extra_lines['resolucion']}")
+            elif key == pygame.K_q:
+                # Toggle calidad automática / calidad máxima fija
+                self.quality.enabled = not self.quality.enabled
+                if not self.quality.enabled:
+                    self.quality.reset()
+                    self.apply_quality()
+                print(f"✓ Calidad {'automática' if self.quality.enabled else 'fija (máxima)'}")
+            elif key == pygame.K_c and self.control_mode == 'neural' and self.simulation is not None:
+                # La red corre en el proceso de simulación: la caché se cambia allí
+                self.simulation.set_inference_cache(not self.simulation.inference_cache)
+                print(f"✓ Caché de inferencia {'activada' if self.simulation.inference_cache else 'desactivada'}")
+            elif key == pygame.K_c and self.control_mode == 'neural':
+                # Toggle caché de inferencia de la red
+                if self.neural_controller.cache is None:
+                    self.neural_controller.enable_cache(quantization_step=0.01, validate_interval=50)
+                    print("✓ Caché de inferencia activada")
+                else:
+                    self.neural_controller.disable_cache()
+                    self.perf.extra_lines.pop('cache_red', None)
+                    print("✓ Caché de inferencia desactivada")
             elif key == pygame.K_r:
                 self.reset_race()
             elif key == pygame.K_g and self.control_mode == 'manual':
@@ -192,13 +443,39 @@ class Game:
         
         return True
     
+    def select_mode(self, mode):
+        """
+        Inicia la carrera con un modo de IA, o la deja pendiente si su
+        controlador todavía se está cargando en segundo plano
+        
+        Args:
+            mode: 'fuzzy' o 'neural'
+        """
+        if self.preloader.is_ready(mode):
+            self.pending_mode = None
+            try:
+                self.preloader.get(mode)
+            except Exception as e:
+                # La carga falló en segundo plano: quedarse en el menú y mostrar el error
+                names = {'fuzzy': 'el controlador difuso', 'neural': 'la red neuronal'}
+                self.menu_error = f"No se pudo cargar {names[mode]}: {e}"
+                print(f"⚠ {self.menu_error}")
+                return
+            self.control_mode = mode
+            self.reset_race()
+        else:
+            self.menu_error = None
+            self.pending_mode = mode
+    
     def update_menu(self):
-        """Actualiza el menú"""
-        pass  # El menú es estático
+        """Actualiza el menú (arranca el modo pendiente cuando su controlador está listo)"""
+        if self.pending_mode is not None and self.preloader.is_ready(self.pending_mode):
+            self.select_mode(self.pending_mode)
     
     def update_game(self):
         """Actualiza el estado del juego"""
         keys = pygame.key.get_pressed()
+        self.replay_recorder.begin_frame([self.player_car, self.opponents])
         
         # === ACTUALIZAR AUTO DEL JUGADOR ===
         steering = 0
@@ -206,10 +483,8 @@ class Game:
         
         if self.control_mode == 'manual':
             # Actualizar sensores para captura de datos
-            self.player_car.update_sensors(self.track)
-            
-            # Control manual
-            self.player_car.update_manual(keys)
+            with self.perf.measure('sensores'):
+                self.player_car.update_sensors(self.track)
             
             # Calcular steering y throttle equivalentes para grabación
             if keys[pygame.K_LEFT]:
@@ -222,47 +497,110 @@ class Game:
             elif keys[pygame.K_DOWN]:
                 throttle = -0.5
             
-            # Grabar datos si está activo
-            self.data_collector.record_frame(self.player_car, steering, throttle)
+            # Grabar datos si está activo (antes de aplicar el control: la pose
+            # y la velocidad guardadas son las mismas con las que se midieron los sensores)
+            with self.perf.measure('grabacion'):
+                self.data_collector.record_frame(self.player_car, steering, throttle)
+            
+            # Control manual
+            with self.perf.measure('control_jugador'):
+                self.player_car.update_manual(keys)
             
         elif self.control_mode == 'fuzzy':
-            self.player_car.update_sensors(self.track)
-            steering, throttle = self.fuzzy_controller.compute(self.player_car)
+            with self.perf.measure('sensores'):
+                self.player_car.update_sensors(self.track)
+            with self.perf.measure('control_jugador'):
+                steering, throttle = self.fuzzy_controller.compute(self.player_car)
             self.player_car.update_ai_control(steering, throttle)
         elif self.control_mode == 'neural':
-            self.player_car.update_sensors(self.track)
-            steering, throttle = self.neural_controller.compute(self.player_car)
+            # Modelo recargado en segundo plano: se cambia aquí, entre frames
+            self.model_watcher.poll(self.neural_controller)
+            with self.perf.measure('sensores'):
+                self.player_car.update_sensors(self.track)
+            with self.perf.measure('control_jugador'):
+                steering, throttle = self.neural_controller.compute(self.player_car)
             self.player_car.update_ai_control(steering, throttle)
+            if self.neural_controller.cache is not None:
+                stats = self.neural_controller.get_cache_stats()
+                self.perf.extra_lines['cache_red'] = (f"{stats['hit_rate'] * 100:.0f}% aciertos, "
+                                                      f"{stats['size']} celdas, err {stats['max_error']:.3f}")
         
-        self.player_car.apply_physics()
+        if self.control_mode == 'manual':
+            player_input = (encode_keys(keys), 0)
+        else:
+            player_input = (steering, throttle)
         
-        # === ACTUALIZAR AUTO OPONENTE ===
-        self.opponent_car.update_sensors(self.track)
+        with self.perf.measure('fisica'):
+            self.player_car.apply_physics()
         
-        # El oponente (auto rojo) SIEMPRE usa el OpponentController simple
+        # === ACTUALIZAR AUTOS OPONENTES (en lote) ===
+        opponents = self.opponents
+        with self.perf.measure('sensores'):
+            opponents.update_sensors(self.track)
+        
+        # Los oponentes (autos rojos) SIEMPRE usan el OpponentController simple
         # que solo avanza recto a velocidad constante
-        steering, throttle = self.opponent_controller.compute(self.opponent_car)
+        with self.perf.measure('control_oponente'):
+            opp_steering, opp_throttle = self.opponent_controller.compute_batch(opponents)
         
-        self.opponent_car.update_ai_control(steering, throttle)
-        self.opponent_car.apply_physics()
+        opponents.update_ai_control(opp_steering, opp_throttle)
+        with self.perf.measure('fisica'):
+            opponents.apply_physics()
         
         # === VERIFICAR COLISIONES ===
-        if self.track.check_collision(self.player_car):
-            self.player_car.crashed = True
-            self.player_car.speed *= 0.5  # Ralentizar
-        
-        if self.track.check_collision(self.opponent_car):
-            self.opponent_car.crashed = True
-            self.opponent_car.speed *= 0.5
+        with self.perf.measure('colisiones'):
+            if self.track.check_collision(self.player_car):
+                self.player_car.crashed = True
+                self.player_car.speed *= 0.5  # Ralentizar
+            
+            collision = opponents.check_collision(self.track)
+            opponents.crashed |= collision
+            opponents.speed = np.where(collision, opponents.speed * 0.5, opponents.speed)
         
         # === VERIFICAR CHECKPOINTS ===
-        self.check_progress(self.player_car)
-        self.check_progress(self.opponent_car)
+        with self.perf.measure('checkpoints'):
+            self.check_progress(self.player_car)
+            self.check_opponents_progress()
+        
+        # La cámara sigue al jugador
+        self.camera.follow(self.player_car.y)
         
         # === VERIFICAR CONDICIONES DE VICTORIA (llegó a la meta) ===
         if self.player_car.y >= self.track.finish_line_y and not self.winner:
-            self.winner = 'player'
-            
+            self.finish_race('player')
+        elif opponents.y.max() >= self.track.finish_line_y and not self.winner:
+            self.finish_race('opponent')
+        
+        # Actualizar tiempo
+        self.game_time += 1 / self.fps
+        
+        # Telemetría del frame (no bloquea: sin consumidor los datagramas se descartan)
+        if self.telemetry is not None:
+            with self.perf.measure('telemetria'):
+                frames = self.perf.frames
+                self.telemetry.record(self.perf.frame_index, self.game_time, self.control_mode,
+                                      self.player_car, steering, throttle, opponents,
+                                      self.perf.current_frame, frames[-1]['frame'] if frames else 0.0)
+                if self.state != 'playing':
+                    self.telemetry.flush()
+                if self.perf.show_overlay:
+                    self.perf.extra_lines['telemetria'] = self.telemetry.get_status_text()
+        
+        # Entradas del frame para la repetición; se guarda al terminar la carrera
+        if self.replay_recorder.is_recording:
+            self.replay_recorder.end_frame(np.vstack((player_input, np.column_stack((opp_steering, opp_throttle)))))
+        if self.state != 'playing':
+            self.replay_recorder.stop_and_save()
+    
+    def finish_race(self, winner):
+        """
+        Termina la carrera: guarda la grabación y pasa de nivel o al final
+        
+        Args:
+            winner: 'player' u 'opponent'
+        """
+        self.winner = winner
+        if winner == 'player':
             # Guardar grabación automática en modo manual
             if self.control_mode == 'manual' and self.data_collector.is_recording:
                 self.data_collector.stop_recording()
@@ -275,9 +613,7 @@ class Game:
             else:
                 self.state = 'finished'  # Completó todos los niveles
                 print("🏆 ¡FELICITACIONES! ¡COMPLETASTE TODOS LOS NIVELES!")
-        elif self.opponent_car.y >= self.track.finish_line_y and not self.winner:
-            self.winner = 'opponent'
-            
+        else:
             # Guardar grabación incluso si perdió (datos útiles)
             if self.control_mode == 'manual' and self.data_collector.is_recording:
                 self.data_collector.stop_recording()
@@ -285,9 +621,82 @@ class Game:
             
             self.state = 'finished'  # Perdió, no avanza de nivel
             print("🏁 ¡OPONENTE GANÓ! Intenta nuevamente")
-        
-        # Actualizar tiempo
-        self.game_time += 1 / self.fps
+    
+    def sync_simulation(self):
+        """
+        Copia la última instantánea del proceso de simulación a los autos que
+        se dibujan (reemplaza a update_game cuando la simulación corre aparte)
+        """
+        simulation = self.simulation
+        if self.control_mode == 'manual':
+            simulation.set_keys(encode_keys(pygame.key.get_pressed()))
+        
+        advanced = simulation.poll()
+        if not advanced:
+            return
+        
+        cars = simulation.cars
+        status = simulation.status
+        player = self.player_car
+        player.x, player.y, player.angle, player.speed = cars[0, :4].tolist()
+        player.crashed = bool(cars[0, 5])
+        player.sensor_distances[:] = cars[0, SENSOR_COLUMN:].tolist()
+        checkpoints = int(cars[0, 4])
+        if checkpoints > player.checkpoint_count:
+            player.checkpoint_count = checkpoints
+            self.report_checkpoint(player)
+        
+        opponents = self.opponents
+        rows = cars[1:]
+        opponents.x[:] = rows[:, 0]
+        opponents.y[:] = rows[:, 1]
+        opponents.angle[:] = rows[:, 2]
+        opponents.speed[:] = rows[:, 3]
+        opponents.checkpoint_count[:] = rows[:, 4]
+        opponents.crashed[:] = rows[:, 5] != 0
+        opponents.sensor_distances[:] = rows[:, SENSOR_COLUMN:]
+        self.report_opponents_progress()
+        
+        self.camera.follow(player.y)
+        self.game_time = status[STATUS_FRAME] / self.fps
+        self.perf.extra_lines['simulacion'] = (f"proceso: paso {status[STATUS_STEP_MS]:.2f} ms, "
+                                               f"+{advanced} frames por dibujo")
+        
+        winner = int(status[STATUS_WINNER])
+        if winner in WINNER_NAMES and not self.winner:
+            self.finish_race(WINNER_NAMES[winner])
+    
+    def apply_quality(self):
+        """Aplica la configuración del nivel de calidad actual"""
+        settings = self.quality.settings
+        self.track.set_decorations(settings['track_decorations'])
+        self.hud_surface = None  # Recomponer el HUD en el próximo frame
+        print(f"⚙ Calidad de dibujo: {self.quality.get_status_text()}")
+    
+    def set_render_scale(self, scale):
+        """
+        Cambia la escala de la resolución interna del mundo
+        
+        Args:
+            scale: Factor respecto de la ventana (1.0 = dibujar directo en pantalla)
+        
+        Raises:
+            ValueError: Si la escala no está en (0, 1]
+        """
+        if not 0 < scale <= 1:
+            raise ValueError(f"La escala de resolución debe estar en (0, 1], no {scale}")
+        self.camera.scale = scale
+        if scale == 1.0:
+            self.render_surface = None
+        else:
+            size = (round(self.width * scale), round(self.height * scale))
+            self.render_surface = pygame.Surface(size).convert()
+        
+        # Las imágenes de los oponentes se regeneran a la nueva escala
+        self.opponent_base = None
+        self.opponent_sprites.clear()
+        self.perf.extra_lines['resolucion'] = (f"{scale:.2f}x "
+                                               f"({round(self.width * scale)}x{round(self.height * scale)})")
     
     def check_progress(self, car):
         """Verifica el progreso de un auto (checkpoints)"""
@@ -295,8 +704,25 @@ class Game:
         prev_pos = (car.prev_x, car.prev_y)
         if self.track.check_checkpoint(car, car.checkpoint_count, prev_pos):
             car.checkpoint_count += 1
-            progress_percent = (car.checkpoint_count / len(self.track.checkpoints)) * 100
-            print(f"{'🔵 Jugador' if car.is_player else '🔴 Oponente'} - Checkpoint {car.checkpoint_count}/{len(self.track.checkpoints)} ({progress_percent:.0f}%)")
+            self.report_checkpoint(car)
+    
+    def report_checkpoint(self, car):
+        """Informa el checkpoint que acaba de pasar un auto"""
+        progress_percent = (car.checkpoint_count / len(self.track.checkpoints)) * 100
+        print(f"{'🔵 Jugador' if car.is_player else '🔴 Oponente'} - Checkpoint {car.checkpoint_count}/{len(self.track.checkpoints)} ({progress_percent:.0f}%)")
+    
+    def check_opponents_progress(self):
+        """Verifica los checkpoints de todos los oponentes (informa los del líder)"""
+        self.opponents.check_checkpoints(self.track)
+        self.report_opponents_progress()
+    
+    def report_opponents_progress(self):
+        """Informa el checkpoint del oponente líder cuando avanza"""
+        leader = int(self.opponents.checkpoint_count.max())
+        if leader > self.opponent_leader_checkpoints:
+            self.opponent_leader_checkpoints = leader
+            progress_percent = (leader / len(self.track.checkpoints)) * 100
+            print(f"🔴 Oponente - Checkpoint {leader}/{len(self.track.checkpoints)} ({progress_percent:.0f}%)")
     
     def update_level_complete(self):
         """Actualiza pantalla de nivel completado"""
@@ -317,21 +743,64 @@ class Game:
         elif self.state == 'finished':
             self.draw_finished()
         
+        # Overlay de rendimiento (se muestra en cualquier estado)
+        self.perf.draw_overlay(self.screen, self.font_mono)
+        
         pygame.display.flip()
     
+    def get_static_key(self):
+        """
+        Identifica el contenido de la pantalla estática actual: si no cambió,
+        la imagen en caché sigue sirviendo
+        
+        Returns:
+            Tupla con lo que se muestra en la pantalla
+        """
+        if self.state == 'menu':
+            dots = pygame.time.get_ticks() // LOADING_ANIMATION_MS % 4 if self.pending_mode else 0
+            return ('menu', self.preloader.get_status_text('fuzzy'),
+                    self.preloader.get_status_text('neural'), self.pending_mode, dots, self.menu_error)
+        if self.state == 'level_complete':
+            return ('level_complete', self.current_level)
+        return ('finished', self.winner, self.current_level, self.control_mode)
+    
+    def draw_static(self, compose):
+        """
+        Presenta una pantalla estática desde la caché, componiéndola solo si
+        su contenido cambió
+        
+        Args:
+            compose: Método que retorna la pantalla compuesta en una superficie nueva
+        """
+        key = self.get_static_key()
+        if self.static_screen is None or key != self.static_key:
+            self.static_screen = compose()
+            self.static_key = key
+        self.screen.blit(self.static_screen, (0, 0))
+    
     def draw_menu(self):
         """Dibuja el menú principal"""
-        self.screen.fill((20, 20, 40))
+        self.draw_static(self.compose_menu)
+    
+    def compose_menu(self):
+        """
+        Compone el menú principal
+        
+        Returns:
+            Superficie del tamaño de la ventana
+        """
+        surface = pygame.Surface((self.width, self.height)).convert()
+        surface.fill((20, 20, 40))
         
         # Título
         title = self.font_large.render("CARRERA DE AUTOS IA", True, (255, 255, 255))
         title_rect = title.get_rect(center=(self.width // 2, 100))
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         
         # Subtítulo
         subtitle = self.font_small.render("Proyecto de Control Inteligente", True, (200, 200, 200))
         subtitle_rect = subtitle.get_rect(center=(self.width // 2, 150))
-        self.screen.blit(subtitle, subtitle_rect)
+        surface.blit(subtitle, subtitle_rect)
         
         # Opciones
         options_y = 250
@@ -347,45 +816,190 @@ class Game:
             color = (255, 255, 100) if option and option[0].isdigit() else (180, 180, 180)
             text = self.font_medium.render(option, True, color)
             text_rect = text.get_rect(center=(self.width // 2, options_y + i * 60))
-            self.screen.blit(text, text_rect)
+            surface.blit(text, text_rect)
         
         # Información adicional
         info_y = 600
         info_texts = [
             "OBJETIVO: Llega a la META antes que tu oponente",
-            "Durante el juego: [S] Mostrar sensores | [R] Reiniciar | [ESC] Menú",
-            "Modo Manual: [G] Grabar datos para entrenar IA"
+            "Durante el juego: [S] Mostrar sensores | [P] Rendimiento | [R] Reiniciar | [ESC] Menú",
+            "Modo Manual: [G] Grabar datos para entrenar IA | Red Neuronal: [C] Caché de inferencia"
         ]
         
         for i, info in enumerate(info_texts):
             text = self.font_small.render(info, True, (150, 150, 150))
             text_rect = text.get_rect(center=(self.width // 2, info_y + i * 30))
-            self.screen.blit(text, text_rect)
+            surface.blit(text, text_rect)
+        
+        # Indicador de carga de los controladores
+        status = (f"Difuso: {self.preloader.get_status_text('fuzzy')}   |   "
+                  f"Red neuronal: {self.preloader.get_status_text('neural')}")
+        text = self.font_small.render(status, True, (120, 180, 120))
+        text_rect = text.get_rect(center=(self.width // 2, 530))
+        surface.blit(text, text_rect)
+        
+        if self.pending_mode is not None:
+            names = {'fuzzy': 'controlador difuso', 'neural': 'red neuronal'}
+            dots = '.' * (pygame.time.get_ticks() // 300 % 4)
+            text = self.font_medium.render(f"Cargando {names[self.pending_mode]}{dots}", True, (255, 215, 0))
+            text_rect = text.get_rect(center=(self.width // 2, 200))
+            surface.blit(text, text_rect)
+        elif self.menu_error is not None:
+            text = self.font_small.render(self.menu_error, True, (255, 100, 100))
+            text_rect = text.get_rect(center=(self.width // 2, 200))
+            surface.blit(text, text_rect)
+        
+        return surface
     
     def draw_game(self):
         """Dibuja el juego en ejecución"""
-        # Dibujar pista
-        self.track.draw(self.screen)
+        target = self.render_surface if self.render_surface is not None else self.screen
+        with self.perf.measure('dibujo_mundo'):
+            self.draw_world(target)
+        
+        # Ampliar la resolución interna a la ventana (una sola vez por frame)
+        if self.render_surface is not None:
+            with self.perf.measure('escalado'):
+                if self.smooth_scaling:
+                    pygame.transform.smoothscale(self.render_surface, (self.width, self.height), self.screen)
+                else:
+                    pygame.transform.scale(self.render_surface, (self.width, self.height), self.screen)
         
-        # Dibujar sensores si está activado
+        # Dibujar HUD (resolución nativa)
+        self.draw_hud()
+    
+    def draw_world(self, target):
+        """
+        Dibuja pista, sensores y autos en la superficie de dibujo
+        
+        Args:
+            target: Pantalla o superficie de resolución interna
+        """
+        # Dibujar pista (franjas rasterizadas en caché)
+        self.track.draw(target, self.camera)
+        if self.perf.show_overlay:
+            stats = self.track.get_chunk_stats()
+            self.perf.extra_lines['pista'] = (f"{stats['cached']}/{stats['max_chunks']} franjas, "
+                                              f"{stats['rendered']} rasterizadas, "
+                                              f"{stats['memory_bytes'] / 2 ** 20:.1f} MB")
+        
+        # Culling: solo se dibujan los autos y rayos cuya caja toca la vista
+        quality = self.quality.settings
+        camera = self.camera
+        opponents = self.opponents
+        car_radius = math.hypot(opponents.width, opponents.height) / 2  # Auto rotado en cualquier ángulo
+        player_visible = camera.is_visible(self.player_car.x, self.player_car.y, car_radius)
+        cars_visible = camera.visible_mask(opponents.x, opponents.y, car_radius)
+        num_cars = opponents.num_cars + 1
+        
+        # Dibujar sensores si está activado (caja: el rayo más largo + la marca del extremo)
         if self.show_sensors:
-            self.player_car.draw_sensors(self.screen)
-            self.opponent_car.draw_sensors(self.screen)
+            drawn = 0
+            if camera.is_visible(self.player_car.x, self.player_car.y, max(self.player_car.sensor_distances) + 3):
+                self.player_car.draw_sensors(target, camera, quality['sensor_ray_step'],
+                                             quality['sensor_markers'])
+                drawn += 1
+            sensors_visible = camera.visible_mask(opponents.x, opponents.y,
+                                                  opponents.sensor_distances.max(axis=1) + 3)
+            self.draw_opponent_sensors(target, sensors_visible, quality['sensor_ray_step'],
+                                       quality['sensor_markers'])
+            drawn += int(np.count_nonzero(sensors_visible))
+            self.cull_stats['sensores'] = (drawn, num_cars - drawn)
+        else:
+            self.cull_stats['sensores'] = (0, 0)
         
         # Dibujar autos
-        self.player_car.draw(self.screen)
-        self.opponent_car.draw(self.screen)
-        
-        # Dibujar HUD
-        self.draw_hud()
+        if player_visible:
+            self.player_car.draw(target, camera)
+        self.draw_opponents(target, cars_visible, quality['rotation_step'])
+        drawn = int(player_visible) + int(np.count_nonzero(cars_visible))
+        self.cull_stats['autos'] = (drawn, num_cars - drawn)
+        
+        if self.perf.show_overlay:
+            self.perf.extra_lines['culling'] = " | ".join(
+                f"{name} {drawn} dibujados, {culled} descartados"
+                for name, (drawn, culled) in self.cull_stats.items() if drawn + culled)
+            self.perf.extra_lines['calidad'] = self.quality.get_status_text()
+    
+    def draw_opponents(self, target, visible, rotation_step=1):
+        """
+        Dibuja los oponentes visibles con un solo blits (imágenes rotadas en caché)
+        
+        Args:
+            target: Superficie de dibujo
+            visible: Máscara de oponentes dentro de la vista
+            rotation_step: Resolución en grados de las imágenes rotadas
+        """
+        scale = self.camera.scale
+        if self.opponent_base is None:
+            base = self.opponent_template.get_surface()
+            if scale != 1.0:
+                base = pygame.transform.smoothscale(base, (round(base.get_width() * scale),
+                                                           round(base.get_height() * scale)))
+            self.opponent_base = base
+        base = self.opponent_base
+        sprites = self.opponent_sprites
+        offset_y = self.camera.offset_y
+        opponents = self.opponents
+        blits = []
+        for x, y, angle in zip((opponents.x[visible] * scale).tolist(),
+                               ((opponents.y[visible] - offset_y) * scale).tolist(),
+                               opponents.angle[visible].tolist()):
+            key = round(angle / rotation_step) * rotation_step % 360
+            sprite = sprites.get(key)
+            if sprite is None:
+                sprite = sprites[key] = pygame.transform.rotate(base, -key)
+            blits.append((sprite, sprite.get_rect(center=(x, y))))
+        target.blits(blits, doreturn=False)
+    
+    def draw_opponent_sensors(self, target, visible, ray_step=1, markers=True):
+        """
+        Dibuja los sensores de los oponentes visibles (para debugging)
+        
+        Args:
+            target: Superficie de dibujo
+            visible: Máscara de oponentes cuyos rayos tocan la vista
+            ray_step: Dibujar 1 de cada ray_step rayos
+            markers: Dibujar el círculo en el extremo de cada rayo
+        """
+        opponents = self.opponents
+        scale = self.camera.scale
+        radius = max(1, round(3 * scale))
+        xs = opponents.x[visible]
+        ys = opponents.y[visible] - self.camera.offset_y
+        angles = np.radians(opponents.angle[visible][:, None] + opponents.sensor_angles)
+        distances = opponents.sensor_distances[visible]
+        end_x = (xs[:, None] + np.cos(angles) * distances) * scale
+        end_y = (ys[:, None] + np.sin(angles) * distances) * scale
+        xs = xs * scale
+        ys = ys * scale
+        
+        # Color según distancia (rojo cerca, verde lejos)
+        intensity = (255 * (distances / opponents.sensor_length)).astype(int)
+        for i in range(len(xs)):
+            start = (xs[i], ys[i])
+            for j in range(0, len(opponents.sensor_angles), ray_step):
+                color = (255 - intensity[i, j], intensity[i, j], 0)
+                end = (end_x[i, j], end_y[i, j])
+                pygame.draw.line(target, color, start, end, 1)
+                if markers:
+                    pygame.draw.circle(target, color, (int(end[0]), int(end[1])), radius)
     
     def draw_hud(self):
-        """Dibuja el HUD (información en pantalla)"""
+        """Dibuja el HUD (se recompone cada hud_interval frames según la calidad)"""
+        self.hud_age += 1
+        if self.hud_surface is None or self.hud_age >= self.quality.settings['hud_interval']:
+            self.compose_hud()
+            self.hud_age = 0
+        self.screen.blit(self.hud_surface, (0, 0))
+    
+    def compose_hud(self):
+        """Compone el HUD (información en pantalla) en su superficie"""
         # Panel semi-transparente
-        hud_surface = pygame.Surface((self.width, 120))
-        hud_surface.set_alpha(180)
-        hud_surface.fill((20, 20, 40))
-        self.screen.blit(hud_surface, (0, 0))
+        if self.hud_surface is None:
+            self.hud_surface = pygame.Surface((self.width, 120), pygame.SRCALPHA)
+        hud = self.hud_surface
+        hud.fill((20, 20, 40, 180))
         
         # Información del jugador (izquierda)
         y_offset = 10
@@ -393,7 +1007,7 @@ class Game:
         # Nivel actual
         level_text = self.font_large.render(f"NIVEL {self.current_level}/{self.max_level}", True, (255, 215, 0))
         level_rect = level_text.get_rect(center=(self.width // 2, 25))
-        self.screen.blit(level_text, level_rect)
+        hud.blit(level_text, level_rect)
         
         # Modo de control
         mode_names = {
@@ -402,45 +1016,64 @@ class Game:
             'neural': 'RED NEURONAL'
         }
         mode_text = self.font_medium.render(f"Modo: {mode_names[self.control_mode]}", True, self.COLOR_PLAYER)
-        self.screen.blit(mode_text, (20, y_offset))
+        hud.blit(mode_text, (20, y_offset))
         
         # Indicador de grabación en modo manual
         if self.control_mode == 'manual' and self.data_collector.is_recording:
             rec_text = self.font_small.render("● REC", True, (255, 50, 50))
-            self.screen.blit(rec_text, (220, y_offset + 8))
+            hud.blit(rec_text, (220, y_offset + 8))
+        
+        # Versión del modelo neuronal en uso (recarga en caliente)
+        if self.control_mode == 'neural' and self.simulation is not None:
+            version = int(self.simulation.status[STATUS_MODEL_VERSION])
+            model_text = self.font_small.render(f"Modelo v{version} | proceso de simulación", True,
+                                                (150, 220, 255))
+            hud.blit(model_text, (200, y_offset + 40))
+        elif self.control_mode == 'neural' and self.model_watcher is not None:
+            model_text = self.font_small.render(self.model_watcher.get_status_text(), True, (150, 220, 255))
+            hud.blit(model_text, (200, y_offset + 40))
         
         # Progreso del jugador
         player_progress = (self.player_car.checkpoint_count / len(self.track.checkpoints)) * 100 if len(self.track.checkpoints) > 0 else 0
         progress_text = self.font_small.render(f"Progreso: {player_progress:.0f}%", True, (255, 255, 255))
-        self.screen.blit(progress_text, (20, y_offset + 40))
+        hud.blit(progress_text, (20, y_offset + 40))
         
         # Velocidad del jugador
         speed_text = self.font_small.render(f"Velocidad: {abs(self.player_car.speed):.1f}", True, (255, 255, 255))
-        self.screen.blit(speed_text, (20, y_offset + 65))
+        hud.blit(speed_text, (20, y_offset + 65))
         
         # Estado
         if self.player_car.crashed:
             crash_text = self.font_small.render("¡COLISIÓN!", True, (255, 100, 100))
-            self.screen.blit(crash_text, (20, y_offset + 90))
+            hud.blit(crash_text, (20, y_offset + 90))
         
-        # Información del oponente (derecha)
-        opp_title = self.font_medium.render("Oponente", True, self.COLOR_OPPONENT)
+        # Información del oponente líder (derecha)
+        leader = int(np.argmax(self.opponents.y))
+        title = "Oponente" if self.num_opponents == 1 else f"Oponentes ({self.num_opponents})"
+        opp_title = self.font_medium.render(title, True, self.COLOR_OPPONENT)
         opp_rect = opp_title.get_rect(topright=(self.width - 20, y_offset))
-        self.screen.blit(opp_title, opp_rect)
+        hud.blit(opp_title, opp_rect)
         
-        opp_progress = (self.opponent_car.checkpoint_count / len(self.track.checkpoints)) * 100 if len(self.track.checkpoints) > 0 else 0
+        opp_progress = (self.opponents.checkpoint_count[leader] / len(self.track.checkpoints)) * 100 if len(self.track.checkpoints) > 0 else 0
         opp_progress_text = self.font_small.render(f"Progreso: {opp_progress:.0f}%", True, (255, 255, 255))
         opp_progress_rect = opp_progress_text.get_rect(topright=(self.width - 20, y_offset + 40))
-        self.screen.blit(opp_progress_text, opp_progress_rect)
+        hud.blit(opp_progress_text, opp_progress_rect)
         
-        opp_speed = self.font_small.render(f"Velocidad: {abs(self.opponent_car.speed):.1f}", True, (255, 255, 255))
+        opp_speed = self.font_small.render(f"Velocidad: {abs(self.opponents.speed[leader]):.1f}", True, (255, 255, 255))
         opp_speed_rect = opp_speed.get_rect(topright=(self.width - 20, y_offset + 65))
-        self.screen.blit(opp_speed, opp_speed_rect)
+        hud.blit(opp_speed, opp_speed_rect)
+        
+        # Posición del jugador en la carrera
+        if self.num_opponents > 1:
+            position = 1 + int(np.count_nonzero(self.opponents.y > self.player_car.y))
+            pos_text = self.font_small.render(f"Posición: {position}/{self.num_opponents + 1}", True, (255, 255, 255))
+            pos_rect = pos_text.get_rect(topright=(self.width - 20, y_offset + 90))
+            hud.blit(pos_text, pos_rect)
         
         # Tiempo (centro)
         time_text = self.font_medium.render(f"Tiempo: {self.game_time:.1f}s", True, (255, 255, 100))
         time_rect = time_text.get_rect(center=(self.width // 2, 30))
-        self.screen.blit(time_text, time_rect)
+        hud.blit(time_text, time_rect)
         
         # Estado de grabación (solo en modo manual)
         if self.control_mode == 'manual':
@@ -448,54 +1081,81 @@ class Game:
             color = (255, 80, 80) if self.data_collector.is_recording else (150, 150, 150)
             rec_text = self.font_small.render(recording_status, True, color)
             rec_rect = rec_text.get_rect(center=(self.width // 2, 85))
-            self.screen.blit(rec_text, rec_rect)
+            hud.blit(rec_text, rec_rect)
     
     def draw_level_complete(self):
         """Dibuja la pantalla de nivel completado"""
-        # Dibujar juego de fondo
-        self.draw_game()
+        self.draw_static(self.compose_level_complete)
+    
+    def compose_race_background(self, color):
+        """
+        Compone el último frame de la carrera oscurecido, fondo de las
+        pantallas de nivel completado y fin
+        
+        Args:
+            color: Color del velo semi-transparente
         
-        # Overlay semi-transparente
+        Returns:
+            Superficie del tamaño de la ventana
+        """
+        self.draw_game()
+        surface = self.screen.copy()
         overlay = pygame.Surface((self.width, self.height))
         overlay.set_alpha(200)
-        overlay.fill((0, 50, 0))  # Verde oscuro
-        self.screen.blit(overlay, (0, 0))
+        overlay.fill(color)
+        surface.blit(overlay, (0, 0))
+        return surface
+    
+    def compose_level_complete(self):
+        """
+        Compone la pantalla de nivel completado
+        
+        Returns:
+            Superficie del tamaño de la ventana
+        """
+        # Juego de fondo con velo verde oscuro
+        surface = self.compose_race_background((0, 50, 0))
         
         # Mensaje de nivel completado
         message = f"¡NIVEL {self.current_level - 1} COMPLETADO!"
         title = self.font_large.render(message, True, (100, 255, 100))
         title_rect = title.get_rect(center=(self.width // 2, self.height // 2 - 120))
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         
         # Siguiente nivel
         next_level_text = f"SIGUIENTE: NIVEL {self.current_level}"
         next_level = self.font_large.render(next_level_text, True, (255, 215, 0))
         next_level_rect = next_level.get_rect(center=(self.width // 2, self.height // 2 - 50))
-        self.screen.blit(next_level, next_level_rect)
+        surface.blit(next_level, next_level_rect)
         
         # Descripción de dificultad
         difficulties = {1: "FÁCIL", 2: "MEDIO", 3: "DIFÍCIL"}
         diff_text = f"Dificultad: {difficulties[self.current_level]}"
         diff = self.font_medium.render(diff_text, True, (255, 255, 255))
         diff_rect = diff.get_rect(center=(self.width // 2, self.height // 2 + 20))
-        self.screen.blit(diff, diff_rect)
+        surface.blit(diff, diff_rect)
         
         # Instrucción
         instruction = "PRESIONA ESPACIO PARA CONTINUAR"
         inst_text = self.font_medium.render(instruction, True, (255, 255, 255))
         inst_rect = inst_text.get_rect(center=(self.width // 2, self.height // 2 + 100))
-        self.screen.blit(inst_text, inst_rect)
+        surface.blit(inst_text, inst_rect)
+        
+        return surface
     
     def draw_finished(self):
         """Dibuja la pantalla de finalización"""
-        # Dibujar juego de fondo
-        self.draw_game()
+        self.draw_static(self.compose_finished)
+    
+    def compose_finished(self):
+        """
+        Compone la pantalla de finalización
         
-        # Overlay semi-transparente
-        overlay = pygame.Surface((self.width, self.height))
-        overlay.set_alpha(200)
-        overlay.fill((0, 0, 0))
-        self.screen.blit(overlay, (0, 0))
+        Returns:
+            Superficie del tamaño de la ventana
+        """
+        # Juego de fondo con velo oscuro
+        surface = self.compose_race_background((0, 0, 0))
         
         # Mensaje de victoria/derrota
         if self.winner == 'player':
@@ -507,7 +1167,7 @@ class Game:
         
         title = self.font_large.render(message, True, color)
         title_rect = title.get_rect(center=(self.width // 2, self.height // 2 - 100))
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         
         # Estadísticas
         if self.winner == 'player':
@@ -531,7 +1191,9 @@ class Game:
         for i, stat in enumerate(stats):
             text = self.font_medium.render(stat, True, (255, 255, 255))
             text_rect = text.get_rect(center=(self.width // 2, y_offset + i * 50))
-            self.screen.blit(text, text_rect)
+            surface.blit(text, text_rect)
+        
+        return surface
 
 if __name__ == "__main__":
     game = Game()
@@ -0,0 +1,268 @@
+"""
+Barrido de hiperparámetros de la red neuronal en paralelo
+Entrena candidatos (búsqueda en rejilla o aleatoria) en procesos separados,
+cada uno con un número fijo de hilos de TensorFlow. Los resultados se
+guardan en caché por hash de configuración: repetir el barrido omite los
+candidatos ya entrenados. Salida: tabla ordenada por pérdida de validación.
+"""
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+# Espacio de búsqueda por defecto (la primera opción de cada lista es la configuración actual)
+DEFAULT_SPACE = {
+    'hidden_units': [[32, 24, 16], [64, 32, 16], [16, 16], [64, 64]],
+    'dropout': [0.2, 0.0, 0.1],
+    'learning_rate': [0.001, 0.003, 0.0003],
+    'batch_size': [32, 128, 512]
+}
+
+_worker_state = {}
+
+
+def config_hash(config, epochs, data_fingerprint):
+    """Hash estable de un candidato (configuración + épocas + datos)"""
+    payload = json.dumps({'config': config, 'epochs': epochs, 'data': data_fingerprint}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def grid_configs(space):
+    """Todas las combinaciones del espacio de búsqueda"""
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_configs(space, num_trials, seed=0):
+    """
+    Muestras aleatorias del espacio de búsqueda
+
+    Cada parámetro puede ser una lista de opciones o un rango
+    {"min": a, "max": b, "log": true/false}
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(num_trials):
+        config = {}
+        for key in sorted(space):
+            options = space[key]
+            if isinstance(options, dict):
+                low, high = options['min'], options['max']
+                if options.get('log'):
+                    config[key] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+                elif isinstance(low, int) and isinstance(high, int):
+                    config[key] = rng.randint(low, high)
+                else:
+                    config[key] = rng.uniform(low, high)
+            else:
+                config[key] = rng.choice(options)
+        configs.append(config)
+    return configs
+
+
+def _init_worker(data_path, threads):
+    """Inicializa un worker: fija los hilos antes de importar TensorFlow y carga los datos"""
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    with np.load(data_path) as data:
+        _worker_state['data'] = {k: data[k] for k in data.files}
+
+
+def _run_trial(trial):
+    """Entrena un candidato dentro de un worker y guarda su resultado en caché"""
+    from neural_controller import NeuralController
+
+    config, epochs, trial_hash, output_dir = trial
+    data = _worker_state['data']
+    model_path = os.path.join(output_dir, 'models', f"{trial_hash}.h5")
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        controller = NeuralController(model_path=model_path, input_size=data['X_train'].shape[1])
+        controller.create_model(hidden_units=tuple(config['hidden_units']),
+                                dropout=config['dropout'],
+                                learning_rate=config['learning_rate'],
+                                verbose=False)
+        history = controller.train(data['X_train'], data['y_train'], data['X_val'], data['y_val'],
+                                   epochs=epochs, batch_size=config['batch_size'], verbose=0)
+    train_time = time.perf_counter() - start
+
+    result = {
+        'hash': trial_hash,
+        'config': config,
+        'epochs': epochs,
+        'epochs_run': len(history.history['loss']),
+        'val_loss': float(min(history.history['val_loss'])),
+        'val_mae': float(min(history.history['val_mae'])),
+        'train_time': train_time,
+        'model_path': model_path
+    }
+
+    with open(os.path.join(output_dir, 'cache', f"{trial_hash}.json"), 'w') as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def load_sweep_data(data_dir='training_data', synthetic=False, seed=0):
+    """Carga y divide los datos una sola vez para todo el barrido"""
+    from data_generator import DataGenerator, split_data
+
+    if synthetic:
+        generator = DataGenerator()
+        X, y = generator.load_training_data('data/training_data.pkl')
+        if X is None:
+            X, y = generator.generate_training_data(num_samples=5000)
+    else:
+        from train_network import load_real_data
+        X, y = load_real_data(data_dir)
+        if X is None:
+            raise FileNotFoundError(f"No hay sesiones en {data_dir}/")
+
+    np.random.seed(seed)
+    X_train, y_train, X_val, y_val, _, _ = split_data(X, y, train_ratio=0.8, val_ratio=0.1)
+    return {'X_train': X_train.astype(np.float32), 'y_train': y_train.astype(np.float32),
+            'X_val': X_val.astype(np.float32), 'y_val': y_val.astype(np.float32)}
+
+
+def print_ranking(results, top=20):
+    """Imprime la tabla ordenada por pérdida de validación"""
+    ranked = sorted(results, key=lambda r: r['val_loss'])
+    print("\n" + "=" * 92)
+    print(f"{'#':>3}  {'Capas':<14}{'Dropout':>8}{'LR':>9}{'Lote':>6}{'Épocas':>8}"
+          f"{'Val loss':>11}{'Val MAE':>9}{'Tiempo':>9}  Hash")
+    print("-" * 92)
+    for i, r in enumerate(ranked[:top], 1):
+        c = r['config']
+        layers = "-".join(str(u) for u in c['hidden_units'])
+        print(f"{i:>3}  {layers:<14}{c['dropout']:>8.2f}{c['learning_rate']:>9.5f}{c['batch_size']:>6}"
+              f"{r['epochs_run']:>8}{r['val_loss']:>11.5f}{r['val_mae']:>9.4f}{r['train_time']:>8.1f}s  {r['hash']}")
+    print("=" * 92)
+    return ranked
+
+
+def run_sweep(space=None, mode='grid', num_trials=20, epochs=100, workers=None, threads_per_worker=1,
+              data_dir='training_data', synthetic=False, output_dir='sweeps', seed=0):
+    """
+    Ejecuta el barrido de hiperparámetros
+
+    Args:
+        space: Espacio de búsqueda (por defecto DEFAULT_SPACE)
+        mode: 'grid' o 'random'
+        num_trials: Candidatos en modo aleatorio
+        epochs: Épocas máximas por candidato
+        workers: Procesos en paralelo (por defecto núcleos / hilos por worker)
+        threads_per_worker: Hilos de TensorFlow fijos por worker
+        data_dir: Directorio de sesiones
+        synthetic: Usar datos sintéticos en vez de sesiones reales
+        output_dir: Directorio de caché, modelos y resultados
+        seed: Semilla de la división de datos y del muestreo aleatorio
+
+    Returns:
+        Lista de resultados ordenada por pérdida de validación
+    """
+    space = space or DEFAULT_SPACE
+    configs = grid_configs(space) if mode == 'grid' else random_configs(space, num_trials, seed)
+
+    os.makedirs(os.path.join(output_dir, 'cache'), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, 'models'), exist_ok=True)
+
+    data = load_sweep_data(data_dir, synthetic, seed)
+    fingerprint = hashlib.sha1(b''.join(np.ascontiguousarray(data[k]).tobytes()
+                                        for k in sorted(data))).hexdigest()[:16]
+    data_path = os.path.join(output_dir, f"data_{fingerprint}.npz")
+    if not os.path.exists(data_path):
+        np.savez(data_path, **data)
+
+    # Separar candidatos ya entrenados (caché) de los pendientes; el muestreo
+    # aleatorio puede repetir configuraciones en un espacio chico: se entrenan una vez
+    results = []
+    pending = []
+    seen = set()
+    for config in configs:
+        trial_hash = config_hash(config, epochs, fingerprint)
+        if trial_hash in seen:
+            continue
+        seen.add(trial_hash)
+        cache_path = os.path.join(output_dir, 'cache', f"{trial_hash}.json")
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                results.append(json.load(f))
+        else:
+            pending.append((config, epochs, trial_hash, output_dir))
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    duplicates = len(configs) - len(seen)
+    print(f"\n🔬 Barrido {mode}: {len(seen)} candidatos "
+          f"({len(results)} en caché, {len(pending)} por entrenar"
+          f"{f', {duplicates} repetidos omitidos' if duplicates else ''}) "
+          f"en {workers} procesos x {threads_per_worker} hilos")
+
+    if pending:
+        start = time.perf_counter()
+        # 'spawn': TensorFlow no es seguro tras fork
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(data_path, threads_per_worker)) as pool:
+            futures = [pool.submit(_run_trial, trial) for trial in pending]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                print(f"   [{done}/{len(pending)}] {result['hash']} val_loss={result['val_loss']:.5f} "
+                      f"({result['train_time']:.1f}s)")
+        print(f"✓ Barrido completado en {time.perf_counter() - start:.1f}s")
+
+    ranked = print_ranking(results)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_path = os.path.join(output_dir, f"sweep_{timestamp}.csv")
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['rank', 'hash', 'hidden_units', 'dropout', 'learning_rate', 'batch_size',
+                         'epochs_run', 'val_loss', 'val_mae', 'train_time', 'model_path'])
+        for i, r in enumerate(ranked, 1):
+            c = r['config']
+            writer.writerow([i, r['hash'], "-".join(str(u) for u in c['hidden_units']), c['dropout'],
+                             c['learning_rate'], c['batch_size'], r['epochs_run'], r['val_loss'],
+                             r['val_mae'], r['train_time'], r['model_path']])
+    print(f"✓ Tabla guardada en {csv_path}")
+
+    return ranked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barrido de hiperparámetros de la red neuronal")
+    parser.add_argument('--mode', choices=('grid', 'random'), default='grid')
+    parser.add_argument('--space', default=None, help="JSON con el espacio de búsqueda")
+    parser.add_argument('--trials', type=int, default=20, help="Candidatos en modo aleatorio")
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads', type=int, default=1, help="Hilos de TensorFlow por worker")
+    parser.add_argument('--data-dir', default='training_data')
+    parser.add_argument('--synthetic', action='store_true', help="Usar datos sintéticos")
+    parser.add_argument('--output', default='sweeps')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+
+    run_sweep(space=space, mode=args.mode, num_trials=args.trials, epochs=args.epochs,
+              workers=args.workers, threads_per_worker=args.threads, data_dir=args.data_dir,
+              synthetic=args.synthetic, output_dir=args.output, seed=args.seed)
@@ -1,10 +1,45 @@
 """
 Main - Punto de entrada del juego
 """
+import argparse
+
 from game import Game
+from telemetry import DEFAULT_HOST, DEFAULT_PORT, parse_address
+
+def positive_int(text):
+    """Entero mayor o igual que 1 para argparse"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"Se esperaba un entero mayor o igual que 1, no {text}")
+    return value
+
+def render_scale(text):
+    """Escala de resolución para argparse: número en (0, 1]"""
+    value = float(text)
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError(f"Se esperaba una escala en (0, 1], no {text}")
+    return value
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Carrera de autos con IA")
+    parser.add_argument('--opponents', type=positive_int, default=1,
+                        help="Cantidad de autos oponentes (se simulan en lote)")
+    parser.add_argument('--lanes', type=int, default=None,
+                        help="Carriles de la pista (por defecto según la cantidad de autos)")
+    parser.add_argument('--track-length', type=int, default=None,
+                        help="Largo de la pista en px (por defecto cabe en la ventana)")
+    parser.add_argument('--render-scale', type=render_scale, default=1.0,
+                        help="Escala de la resolución interna del mundo (ej. 0.5 o 0.75)")
+    parser.add_argument('--smooth-scaling', action='store_true',
+                        help="Ampliar la resolución interna con smoothscale (más suave, más costoso)")
+    parser.add_argument('--sim-process', action='store_true',
+                        help="Simular en un proceso aparte a ritmo fijo (sin repeticiones ni captura de datos)")
+    parser.add_argument('--telemetry', nargs='?', const=f"{DEFAULT_HOST}:{DEFAULT_PORT}", default=None,
+                        metavar='HOST:PUERTO',
+                        help=f"Enviar telemetría por frame por UDP (por defecto {DEFAULT_HOST}:{DEFAULT_PORT})")
+    args = parser.parse_args()
+    
     print("="*60)
     print("  CARRERA DE AUTOS CON IA")
     print("  Proyecto de Control Inteligente")
@@ -12,7 +47,10 @@ def main():
     print("\nIniciando juego...\n")
     
     # Crear y ejecutar juego
-    game = Game()
+    game = Game(num_opponents=args.opponents, num_lanes=args.lanes, track_length=args.track_length,
+                render_scale=args.render_scale, smooth_scaling=args.smooth_scaling,
+                simulation_process=args.sim_process,
+                telemetry=parse_address(args.telemetry) if args.telemetry else None)
     game.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+"""
+Recarga en caliente del modelo de la red neuronal
+Un hilo en segundo plano vigila el archivo del modelo; cuando cambia (por
+ejemplo, al terminar train_network.py) lo carga y lo calienta sin bloquear el
+juego. El cambio al modelo nuevo se hace en el hilo del juego, entre frames,
+con poll().
+"""
+import os
+import threading
+import time
+
+import numpy as np
+from tensorflow import keras
+
+
+class ModelWatcher:
+    def __init__(self, model_path='models/neural_controller.h5', input_size=17, poll_interval=1.0):
+        """
+        Inicializa el vigilante del modelo
+
+        Args:
+            model_path: Archivo del modelo a vigilar
+            input_size: Tamaño de entrada esperado (se rechazan modelos distintos)
+            poll_interval: Segundos entre revisiones del archivo
+        """
+        self.model_path = model_path
+        self.input_size = input_size
+        self.poll_interval = poll_interval
+
+        # Versión en uso: 1 es el modelo cargado al iniciar
+        self.version = 1
+        self.swap_time_ms = 0.0
+        self.load_time = 0.0
+        self.last_swap = None
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._pending = None  # (modelo, tiempo de carga) listo para el cambio
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_stat = self._stat()
+
+    def _stat(self):
+        """Firma del archivo (fecha de modificación y tamaño), None si no existe"""
+        try:
+            st = os.stat(self.model_path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def start(self):
+        """Inicia el hilo de vigilancia"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ModelWatcher', daemon=True)
+        self._thread.start()
+        print(f"👁 Vigilando {self.model_path} (recarga en caliente)")
+
+    def stop(self):
+        """Detiene el hilo de vigilancia"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+            self._thread = None
+
+    def _run(self):
+        """Bucle del hilo: detecta cambios, carga y calienta el modelo nuevo"""
+        candidate = None
+        while not self._stop.wait(self.poll_interval):
+            stat = self._stat()
+            if stat is None or stat == self._last_stat:
+                candidate = None
+                continue
+
+            # Esperar a que el archivo deje de cambiar (puede estar escribiéndose)
+            if stat != candidate:
+                candidate = stat
+                continue
+
+            self._last_stat = stat
+            candidate = None
+            self._load(stat)
+
+    def _load(self, stat):
+        """Carga y calienta el modelo en este hilo; lo deja pendiente para poll()"""
+        start = time.perf_counter()
+        try:
+            model = keras.models.load_model(self.model_path, compile=False)
+            if model.input_shape[-1] != self.input_size:
+                raise ValueError(f"entrada de {model.input_shape[-1]} valores, se esperaban {self.input_size}")
+
+            # Calentamiento: la primera llamada construye el grafo de inferencia
+            model(np.zeros((1, self.input_size), dtype=np.float32), training=False)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠ No se pudo recargar el modelo: {e}")
+            return
+
+        with self._lock:
+            self._pending = (model, time.perf_counter() - start)
+
+    def poll(self, controller):
+        """
+        Aplica el modelo pendiente al controlador (llamar una vez por frame)
+
+        Args:
+            controller: NeuralController activo
+
+        Returns:
+            True si se cambió el modelo en este frame
+        """
+        if self._pending is None:
+            return False
+
+        with self._lock:
+            model, load_time = self._pending
+            self._pending = None
+
+        start = time.perf_counter()
+        controller.swap_model(model)
+        self.swap_time_ms = (time.perf_counter() - start) * 1000
+
+        self.version += 1
+        self.load_time = load_time
+        self.last_swap = time.time()
+        self.last_error = None
+        print(f"🔄 Modelo v{self.version} activo (carga {load_time:.2f}s en segundo plano, "
+              f"cambio {self.swap_time_ms:.3f} ms)")
+        return True
+
+    def get_status_text(self):
+        """Texto corto para el HUD"""
+        if self.last_error:
+            return f"Modelo v{self.version} | error al recargar"
+        return f"Modelo v{self.version} | cambio {self.swap_time_ms:.2f} ms"
@@ -8,63 +8,140 @@ from tensorflow import keras
 from tensorflow.keras import layers
 import pickle
 import os
+import time
+from collections import OrderedDict
+
+
+def configure_threading(intra_op_threads=None, inter_op_threads=None):
+    """
+    Configura los hilos de TensorFlow (debe llamarse antes de crear cualquier modelo)
+    
+    Args:
+        intra_op_threads: Hilos dentro de cada operación (ej. número de núcleos)
+        inter_op_threads: Operaciones independientes en paralelo
+        
+    Returns:
+        True si se aplicó la configuración
+    """
+    try:
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+        return True
+    except RuntimeError as e:
+        print(f"⚠ No se pudo configurar los hilos (TensorFlow ya inicializado): {e}")
+        return False
+
+
+class ThroughputCallback(keras.callbacks.Callback):
+    """Reporta muestras por segundo en cada época"""
+    
+    def __init__(self, num_samples, verbose=True):
+        super().__init__()
+        self.num_samples = num_samples
+        self.verbose = verbose
+        self.samples_per_second = []
+        self.epoch_start = 0.0
+    
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+    
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self.epoch_start
+        rate = self.num_samples / elapsed if elapsed > 0 else 0.0
+        self.samples_per_second.append(rate)
+        if logs is not None:
+            logs['samples_per_second'] = rate
+        if self.verbose:
+            print(f"   ⚡ Época {epoch + 1}: {rate:,.0f} muestras/s ({elapsed:.2f}s)")
+
 
 class NeuralController:
-    def __init__(self, model_path='models/neural_controller.h5'):
+    def __init__(self, model_path='models/neural_controller.h5', input_size=17):
         """
         Inicializa el controlador de red neuronal
         
         Args:
             model_path: Ruta al archivo del modelo entrenado
+            input_size: Tamaño de la entrada (velocidad + sensores)
         """
         self.model_path = model_path
+        self.input_size = input_size
+        self.learning_rate = 0.001
         self.model = None
         self.is_trained = False
         
-        # Intentar cargar modelo existente
+        # Caché de inferencia (desactivada por defecto, ver enable_cache)
+        self.cache = None
+        self.cache_step = 0.01
+        self.cache_max_size = 4096
+        self.cache_validate_interval = 0
+        self.reset_cache_stats()
+        
+        # Intentar cargar modelo existente (solo si coincide el tamaño de entrada)
         if os.path.exists(model_path):
             try:
-                self.model = keras.models.load_model(model_path)
-                self.is_trained = True
-                print(f"✓ Modelo de red neuronal cargado desde {model_path}")
+                # Se compila aquí (no desde el archivo): el estado del optimizador
+                # guardado no siempre es legible entre versiones de Keras
+                self.model = keras.models.load_model(model_path, compile=False)
+                self.set_learning_rate(self.learning_rate)
+                if self.model.input_shape[-1] != input_size:
+                    print(f"⚠ El modelo guardado espera {self.model.input_shape[-1]} entradas, "
+                          f"se creará uno nuevo de {input_size}")
+                    self.create_model()
+                else:
+                    self.is_trained = True
+                    print(f"✓ Modelo de red neuronal cargado desde {model_path}")
             except Exception as e:
                 print(f"⚠ No se pudo cargar el modelo: {e}")
                 self.create_model()
         else:
             self.create_model()
     
-    def create_model(self):
-        """Crea la arquitectura de la red neuronal"""
-        # Entrada: [velocidad_norm, 16 sensores normalizados] = 17 valores
-        inputs = keras.Input(shape=(17,), name='sensor_inputs')
+    def create_model(self, hidden_units=(32, 24, 16), dropout=0.2, learning_rate=None, verbose=True):
+        """
+        Crea la arquitectura de la red neuronal
         
-        # Capa oculta 1: 32 neuronas con activación ReLU (más neuronas para más sensores)
-        x = layers.Dense(32, activation='relu', name='hidden1')(inputs)
-        x = layers.Dropout(0.2)(x)
+        Args:
+            hidden_units: Neuronas de cada capa oculta (ReLU)
+            dropout: Dropout después de cada capa oculta excepto la última
+            learning_rate: Tasa de aprendizaje de Adam (por defecto self.learning_rate)
+            verbose: Imprimir el resumen del modelo
+        """
+        if learning_rate is not None:
+            self.learning_rate = learning_rate
         
-        # Capa oculta 2: 24 neuronas con activación ReLU
-        x = layers.Dense(24, activation='relu', name='hidden2')(x)
-        x = layers.Dropout(0.2)(x)
+        # Entrada: [velocidad_norm, N sensores normalizados] (17 valores con 16 sensores)
+        inputs = keras.Input(shape=(self.input_size,), name='sensor_inputs')
         
-        # Capa oculta 3: 16 neuronas con activación ReLU
-        x = layers.Dense(16, activation='relu', name='hidden3')(x)
+        # Capas ocultas (por defecto 32-24-16 con Dropout(0.2) en las dos primeras)
+        x = inputs
+        for i, units in enumerate(hidden_units):
+            x = layers.Dense(units, activation='relu', name=f'hidden{i + 1}')(x)
+            if dropout > 0 and i < len(hidden_units) - 1:
+                x = layers.Dropout(dropout)(x)
         
         # Salida: 2 neuronas (steering, throttle) con activación tanh para rango [-1, 1]
         outputs = layers.Dense(2, activation='tanh', name='control_outputs')(x)
         
         self.model = keras.Model(inputs=inputs, outputs=outputs, name='CarNeuralController')
+        self.clear_cache()
         
         # Compilar modelo
         self.model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+            optimizer=keras.optimizers.Adam(learning_rate=self.learning_rate),
             loss='mse',
             metrics=['mae']
         )
         
-        print("✓ Arquitectura de red neuronal creada")
-        print(self.model.summary())
+        if verbose:
+            print("✓ Arquitectura de red neuronal creada")
+            print(self.model.summary())
     
-    def train(self, X_train, y_train, X_val=None, y_val=None, epochs=100, batch_size=32):
+    def train(self, X_train, y_train, X_val=None, y_val=None, epochs=100, batch_size=32,
+              fast=False, intra_op_threads=None, inter_op_threads=None, jit_compile=False,
+              base_batch_size=32, verbose=1, sample_weight=None, checkpoint_dir=None):
         """
         Entrena la red neuronal con datos de entrenamiento
         
@@ -75,6 +152,16 @@ class NeuralController:
             y_val: Salidas de validación (opcional)
             epochs: Número de épocas de entrenamiento
             batch_size: Tamaño del lote
+            fast: Modo de alto rendimiento en CPU (pipeline tf.data con caché y prefetch)
+            intra_op_threads: Hilos por operación (modo rápido)
+            inter_op_threads: Operaciones en paralelo (modo rápido)
+            jit_compile: Compilar con XLA (modo rápido)
+            base_batch_size: Lote de referencia para escalar la tasa de aprendizaje
+            verbose: Nivel de detalle de Keras (0 = silencioso)
+            sample_weight: Peso opcional de cada muestra de entrenamiento
+            checkpoint_dir: Directorio de respaldo por época (pesos, optimizador y
+                época). Si contiene un respaldo de una ejecución interrumpida, el
+                entrenamiento continúa desde ahí; se borra al terminar
             
         Returns:
             Historia del entrenamiento
@@ -83,7 +170,33 @@ class NeuralController:
         print(f"   Datos de entrenamiento: {X_train.shape}")
         print(f"   Épocas: {epochs}, Batch size: {batch_size}")
         
+        has_validation = X_val is not None and y_val is not None
+        
+        if fast:
+            configure_threading(intra_op_threads, inter_op_threads)
+            
+            # Lote grande: escalar la tasa de aprendizaje linealmente con el lote
+            learning_rate = self.learning_rate * batch_size / base_batch_size
+            self.model.compile(
+                optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+                loss='mse',
+                metrics=['mae'],
+                jit_compile=jit_compile
+            )
+            print(f"   Modo rápido: lr={learning_rate:.5f}, XLA={'sí' if jit_compile else 'no'}, "
+                  f"hilos intra/inter={intra_op_threads or 'auto'}/{inter_op_threads or 'auto'}")
+            
+            train_data = self._make_dataset(X_train, y_train, batch_size, shuffle=True,
+                                            sample_weight=sample_weight)
+            validation_data = self._make_dataset(X_val, y_val, batch_size) if has_validation else None
+            fit_batch_size = None  # El lote lo define el dataset
+        else:
+            train_data = X_train
+            validation_data = (X_val, y_val) if has_validation else None
+            fit_batch_size = batch_size
+        
         # Callbacks
+        throughput = ThroughputCallback(len(X_train), verbose=verbose > 0)
         callbacks = [
             keras.callbacks.EarlyStopping(
                 monitor='val_loss' if X_val is not None else 'loss',
@@ -95,22 +208,34 @@ class NeuralController:
                 factor=0.5,
                 patience=5,
                 min_lr=0.00001
-            )
+            ),
+            throughput
         ]
         
-        # Entrenar
-        validation_data = (X_val, y_val) if X_val is not None and y_val is not None else None
+        if checkpoint_dir is not None:
+            if os.path.isdir(checkpoint_dir) and os.listdir(checkpoint_dir):
+                print(f"   ♻ Reanudando desde el respaldo en {checkpoint_dir}")
+            callbacks.append(keras.callbacks.BackupAndRestore(backup_dir=checkpoint_dir,
+                                                              save_freq='epoch',
+                                                              delete_checkpoint=True))
         
+        # Entrenar
         history = self.model.fit(
-            X_train, y_train,
+            train_data,
+            y_train if not fast else None,
+            sample_weight=sample_weight if not fast else None,
             validation_data=validation_data,
             epochs=epochs,
-            batch_size=batch_size,
+            batch_size=fit_batch_size,
             callbacks=callbacks,
-            verbose=1
+            verbose=verbose
         )
         
+        if throughput.samples_per_second:
+            print(f"   ⚡ Promedio: {np.mean(throughput.samples_per_second):,.0f} muestras/s")
+        
         self.is_trained = True
+        self.clear_cache()
         
         # Guardar modelo
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
@@ -119,6 +244,46 @@ class NeuralController:
         
         return history
     
+    def swap_model(self, model):
+        """
+        Reemplaza el modelo activo por otro ya cargado y calentado
+        
+        Se cambia solo la referencia (operación atómica): debe llamarse desde
+        el hilo del juego entre frames, nunca durante compute().
+        
+        Args:
+            model: Modelo de Keras con la misma entrada que el controlador
+        """
+        self.model = model
+        self.is_trained = True
+        self.clear_cache()
+    
+    def set_learning_rate(self, learning_rate):
+        """
+        Recompila el modelo con otra tasa de aprendizaje conservando los pesos
+        (ej. para ajuste fino de un modelo ya entrenado)
+        
+        Args:
+            learning_rate: Nueva tasa de aprendizaje de Adam
+        """
+        self.learning_rate = learning_rate
+        self.model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+            loss='mse',
+            metrics=['mae']
+        )
+    
+    def _make_dataset(self, X, y, batch_size, shuffle=False, sample_weight=None):
+        """Pipeline tf.data en memoria: caché, mezcla por época, lotes y prefetch"""
+        tensors = (X.astype(np.float32), y.astype(np.float32))
+        if sample_weight is not None:
+            tensors += (np.asarray(sample_weight, dtype=np.float32),)
+        dataset = tf.data.Dataset.from_tensor_slices(tensors)
+        dataset = dataset.cache()
+        if shuffle:
+            dataset = dataset.shuffle(len(X), reshuffle_each_iteration=True)
+        return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+    
     def compute(self, car):
         """
         Calcula las acciones de control basadas en el estado del auto
@@ -137,17 +302,18 @@ class NeuralController:
             # Obtener vector de estado del auto
             state = car.get_state_vector()
             
-            # Predecir acción (necesita dimensión de batch)
-            state_batch = np.expand_dims(state, axis=0)
-            action = self.model.predict(state_batch, verbose=0)[0]
+            if self.cache is not None:
+                action = self._cached_action(state)
+            else:
+                action = self._predict(state)
             
             # Extraer steering y throttle
             steering = float(action[0])
             throttle = float(action[1])
             
-            # Limitar valores al rango [-1, 1]
-            steering = np.clip(steering, -1, 1)
-            throttle = np.clip(throttle, -1, 1)
+            # Limitar valores al rango [-1, 1] (floats de Python, sin escalares de NumPy)
+            steering = min(max(steering, -1.0), 1.0)
+            throttle = min(max(throttle, -1.0), 1.0)
             
             return steering, throttle
             
@@ -155,6 +321,130 @@ class NeuralController:
             print(f"Error en control neuronal: {e}")
             return 0.0, 0.5
     
+    def _predict(self, state):
+        """Pasada directa de la red para un solo estado"""
+        # Se llama al modelo directamente: predict() arma un pipeline por
+        # cada llamada y es muy lento para un solo estado por frame.
+        # El buffer del auto ya es float32: la vista con eje de lote no copia
+        state_batch = np.asarray(state, dtype=np.float32)[None, :]
+        return self.model(state_batch, training=False).numpy()[0]
+    
+    def enable_cache(self, quantization_step=0.01, max_size=4096, validate_interval=0):
+        """
+        Activa la caché de inferencia
+        
+        Los estados se cuantizan con el paso indicado; estados que caen en la
+        misma celda reutilizan la salida de la red evaluada en el centro de la
+        celda. Cuando se llena, se descarta la entrada usada hace más tiempo (LRU).
+        
+        Args:
+            quantization_step: Tamaño de celda en unidades normalizadas
+            max_size: Número máximo de entradas
+            validate_interval: Cada cuántos aciertos comparar con la red sin
+                caché para medir el error real (0 = nunca)
+        """
+        self.cache = OrderedDict()
+        self.cache_step = quantization_step
+        self.cache_max_size = max_size
+        self.cache_validate_interval = validate_interval
+        self.reset_cache_stats()
+    
+    def disable_cache(self):
+        """Desactiva la caché de inferencia"""
+        self.cache = None
+    
+    def clear_cache(self):
+        """Vacía la caché (necesario si cambian los pesos del modelo)"""
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def reset_cache_stats(self):
+        """Reinicia las estadísticas de la caché"""
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.cache_validations = 0
+        self.cache_max_error = 0.0
+    
+    def _cached_action(self, state):
+        """Acción para un estado usando la caché cuantizada"""
+        cell = np.round(np.asarray(state, dtype=np.float64) / self.cache_step).astype(np.int32)
+        key = cell.tobytes()
+        
+        action = self.cache.get(key)
+        if action is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            
+            # Validación muestreada contra la red sin caché
+            if self.cache_validate_interval and self.cache_hits % self.cache_validate_interval == 0:
+                error = float(np.max(np.abs(self._predict(state) - action)))
+                self.cache_max_error = max(self.cache_max_error, error)
+                self.cache_validations += 1
+            return action
+        
+        self.cache_misses += 1
+        action = self._predict(cell * self.cache_step)
+        self.cache[key] = action
+        if len(self.cache) > self.cache_max_size:
+            self.cache.popitem(last=False)
+            self.cache_evictions += 1
+        return action
+    
+    def get_cache_stats(self):
+        """
+        Estadísticas de la caché de inferencia
+        
+        Returns:
+            Diccionario con aciertos, fallos, tasa de aciertos, tamaño,
+            descartes y error máximo observado en las validaciones
+        """
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'enabled': self.cache is not None,
+            'quantization_step': self.cache_step,
+            'size': len(self.cache) if self.cache is not None else 0,
+            'max_size': self.cache_max_size,
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / lookups if lookups else 0.0,
+            'evictions': self.cache_evictions,
+            'validations': self.cache_validations,
+            'max_error': self.cache_max_error
+        }
+    
+    def check_cache_error(self, states, tolerance=0.02):
+        """
+        Cota de error de la caché frente a la red sin caché
+        
+        Compara, para cada estado, la salida exacta con la que devolvería la
+        caché (red evaluada en el centro de la celda cuantizada). No modifica
+        la caché ni sus estadísticas.
+        
+        Args:
+            states: Array (N, input_size) de estados (ej. de una sesión grabada)
+            tolerance: Error absoluto máximo aceptable en steering/throttle
+            
+        Returns:
+            Diccionario con error máximo, medio, p99 y si cumple la tolerancia
+        """
+        states = np.asarray(states, dtype=np.float32)
+        centers = (np.round(states.astype(np.float64) / self.cache_step) * self.cache_step).astype(np.float32)
+        exact = self.model(states, training=False).numpy()
+        cached = self.model(centers, training=False).numpy()
+        errors = np.abs(exact - cached).max(axis=1)
+        
+        result = {
+            'quantization_step': self.cache_step,
+            'samples': len(states),
+            'unique_cells': len(np.unique(np.round(states / self.cache_step), axis=0)),
+            'max_error': float(errors.max()) if len(errors) else 0.0,
+            'mean_error': float(errors.mean()) if len(errors) else 0.0,
+            'p99_error': float(np.percentile(errors, 99)) if len(errors) else 0.0,
+            'within_tolerance': bool(errors.max() <= tolerance) if len(errors) else True
+        }
+        return result
+    
     def evaluate(self, X_test, y_test):
         """
         Evalúa el desempeño del modelo con datos de prueba
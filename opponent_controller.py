@@ -2,24 +2,49 @@
 Controlador Simple para el Auto Oponente (Auto Rojo - CPU)
 Avanza recto a velocidad moderada con corrección mínima para mantenerse centrado
 """
+import os
+
+import numpy as np
+
+from controller_params import CONFIG_DIR, load_params
+
+# Acelerador constante por dificultad (ajustable con parameter_search.py)
+DEFAULT_PARAMS = {
+    'easy': 0.35,    # 35% velocidad
+    'medium': 0.5,   # 50% velocidad
+    'hard': 0.65     # 65% velocidad
+}
+PARAMS_PATH = os.path.join(CONFIG_DIR, 'opponent_params.json')
+
+# Los valores ajustados se leen una sola vez (se crea un controlador por nivel)
+_loaded_params = {}
+
 
 class OpponentController:
-    def __init__(self, difficulty='medium'):
+    def __init__(self, difficulty='medium', params=None, params_path=PARAMS_PATH):
         """
         Inicializa el controlador del oponente (CPU)
         
         Args:
             difficulty: Nivel de dificultad ('easy', 'medium', 'hard')
+            params: Acelerador por dificultad (sobre DEFAULT_PARAMS); si se indica no se lee params_path
+            params_path: Archivo con valores ajustados (se ignora si no existe)
         """
         self.difficulty = difficulty
         
+        if params is None:
+            if params_path not in _loaded_params:
+                _loaded_params[params_path] = load_params(params_path, DEFAULT_PARAMS)
+            params = _loaded_params[params_path]
+        else:
+            params = {**DEFAULT_PARAMS, **params}
+        
         # Velocidad según dificultad
-        if difficulty == 'easy':
-            self.target_throttle = 0.35  # 35% velocidad
-        elif difficulty == 'medium':
-            self.target_throttle = 0.5  # 50% velocidad
-        else:  # hard
-            self.target_throttle = 0.65  # 65% velocidad
+        self.target_throttle = params.get(difficulty, params['hard'])
+        
+        # Acciones del lote (compute_batch), preasignadas
+        self._steering = None
+        self._throttle = None
         
     def compute(self, car):
         """
@@ -40,3 +65,20 @@ class OpponentController:
         throttle = self.target_throttle
         
         return steering, throttle
+    
+    def compute_batch(self, cars):
+        """
+        Versión por lotes de compute para todos los autos de un CarBatch
+        
+        Args:
+            cars: CarBatch con los oponentes
+            
+        Returns:
+            Tupla (steering, throttle) de arrays (N,). Se reutilizan entre
+            frames: no deben modificarse
+        """
+        if self._steering is None or len(self._steering) != cars.num_cars:
+            self._steering = np.zeros(cars.num_cars)
+            self._throttle = np.full(cars.num_cars, self.target_throttle)
+        
+        return self._steering, self._throttle
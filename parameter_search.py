@@ -0,0 +1,343 @@
+"""
+Búsqueda de parámetros de los controladores en paralelo
+Ajusta los umbrales de FuzzyController o las velocidades de
+OpponentController con una estrategia evolutiva: cada candidato se evalúa
+en carreras sin ventana (RaceSimulator) repartidas en un pool de procesos.
+El fitness se guarda en caché por hash de parámetros y semilla, así repetir
+o continuar una búsqueda no vuelve a correr carreras ya evaluadas. El mejor
+vector se guarda en config/, donde los controladores lo cargan al iniciar.
+"""
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import fuzzy_controller
+import opponent_controller
+from controller_params import save_params
+from race_simulator import RaceSimulator
+from track import Track
+
+# Rango de búsqueda de cada parámetro (los valores por defecto están en cada controlador)
+SEARCH_SPACES = {
+    'fuzzy': {
+        'edge_hard': (8.0, 35.0),
+        'edge_soft': (15.0, 60.0),
+        'steer_hard': (0.3, 1.0),
+        'steer_soft': (0.05, 0.6),
+        'edge_slowdown': (5.0, 35.0),
+        'front_blocked': (20.0, 120.0),
+        'throttle_crashed': (0.0, 0.8),
+        'throttle_edge': (0.1, 1.0),
+        'throttle_blocked': (0.2, 1.0),
+        'steer_penalty': (0.4, 1.0)
+    },
+    'opponent': {
+        'easy': (0.1, 1.0),
+        'medium': (0.1, 1.0),
+        'hard': (0.1, 1.0)
+    }
+}
+
+# Oponente: tiempo del oponente / tiempo del controlador difuso buscado en cada dificultad
+TARGET_TIME_RATIOS = {'easy': 1.5, 'medium': 1.25, 'hard': 1.1}
+
+# Difuso: segundos de penalización por cada choque con el borde
+CRASH_PENALTY = 0.5
+
+# Decimales de los parámetros (candidatos casi iguales comparten la caché)
+PARAM_DECIMALS = 4
+
+# Estado por proceso: pista y controladores se crean una sola vez por worker
+_worker_state = {}
+
+
+def params_hash(target, params, settings):
+    """Hash estable de un candidato (objetivo + parámetros + condiciones de la carrera)"""
+    payload = json.dumps({'target': target, 'params': params, 'settings': settings}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _init_worker(track_length, max_time):
+    """Inicializa un worker del pool (pista y controlador difuso)"""
+    _worker_state['track'] = Track(1200, 800, track_length=track_length)
+    _worker_state['max_time'] = max_time
+    # El controlador difuso tarda en construirse: uno por worker, se le cambian los umbrales
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker_state['fuzzy'] = fuzzy_controller.FuzzyController()
+
+
+def _finish_time(result, index, max_time, num_checkpoints):
+    """Tiempo de llegada; sin llegar, max_time más una penalización por el tramo que faltó"""
+    finish = result['finish_times'][index]
+    if finish is not None:
+        return finish
+    progress = len(result['splits'][index]) / num_checkpoints
+    return max_time * (2.0 - progress)
+
+
+def evaluate_fuzzy(params, seed):
+    """
+    Fitness de umbrales del controlador difuso (menor es mejor)
+
+    Returns:
+        Tiempo de llegada en segundos + CRASH_PENALTY por choque
+    """
+    track = _worker_state['track']
+    max_time = _worker_state['max_time']
+    controller = _worker_state['fuzzy']
+    controller.set_params({**fuzzy_controller.DEFAULT_PARAMS, **params})
+
+    opponent = opponent_controller.OpponentController('medium', params=opponent_controller.DEFAULT_PARAMS)
+    result = RaceSimulator(track, [controller, opponent], max_time=max_time).run(seed)
+    return _finish_time(result, 0, max_time, len(track.checkpoints)) + CRASH_PENALTY * result['crashes'][0]
+
+
+def evaluate_opponent(params, seed, reference_params):
+    """
+    Fitness de las velocidades del oponente (menor es mejor)
+
+    Corre el controlador difuso de referencia contra cada dificultad y
+    compara la proporción de tiempos con TARGET_TIME_RATIOS.
+
+    Returns:
+        Suma de los errores cuadráticos de la proporción por dificultad
+    """
+    track = _worker_state['track']
+    max_time = _worker_state['max_time']
+    controller = _worker_state['fuzzy']
+    controller.set_params(reference_params)
+    num_checkpoints = len(track.checkpoints)
+
+    loss = 0.0
+    for difficulty, target_ratio in TARGET_TIME_RATIOS.items():
+        opponent = opponent_controller.OpponentController(difficulty, params=params)
+        result = RaceSimulator(track, [controller, opponent], max_time=max_time).run(seed)
+        ratio = (_finish_time(result, 1, max_time, num_checkpoints) /
+                 _finish_time(result, 0, max_time, num_checkpoints))
+        loss += (ratio - target_ratio) ** 2
+    return loss
+
+
+def _evaluate(task):
+    """Evalúa un candidato con una semilla dentro de un worker"""
+    key, target, params, seed, settings = task
+    if target == 'fuzzy':
+        return key, evaluate_fuzzy(params, seed)
+    return key, evaluate_opponent(params, seed, settings['reference'])
+
+
+class EvolutionStrategy:
+    def __init__(self, space, start, sigma=0.2, population=None, seed=0):
+        """
+        Estrategia evolutiva (mu/mu_w, lambda) con covarianza diagonal adaptativa
+        (actualización rank-mu de sep-CMA-ES, sin caminos de evolución)
+
+        Busca en el espacio normalizado [0, 1] de cada parámetro.
+
+        Args:
+            space: Diccionario nombre -> (mínimo, máximo)
+            start: Parámetros iniciales (ej. los valores por defecto)
+            sigma: Desvío inicial en el espacio normalizado
+            population: Candidatos por generación (None = 4 + 3 ln(n))
+            seed: Semilla del muestreo
+        """
+        self.names = list(space)
+        self.low = np.array([space[name][0] for name in self.names])
+        self.high = np.array([space[name][1] for name in self.names])
+        n = len(self.names)
+
+        self.mean = self.normalize(start)
+        self.std = np.full(n, sigma)
+        self.min_std = 1e-3
+        self.population = population or 4 + int(3 * math.log(n))
+        self.mu = max(1, self.population // 2)
+
+        weights = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        mu_eff = 1.0 / np.sum(self.weights ** 2)
+        self.learning_rate = min(1.0, mu_eff / (n + mu_eff))
+
+        self.rng = np.random.default_rng(seed)
+
+    def normalize(self, params):
+        """Parámetros -> vector en [0, 1]"""
+        values = np.array([params[name] for name in self.names], dtype=np.float64)
+        return np.clip((values - self.low) / (self.high - self.low), 0.0, 1.0)
+
+    def to_params(self, x):
+        """Vector en [0, 1] -> parámetros (redondeados a PARAM_DECIMALS)"""
+        values = self.low + np.clip(x, 0.0, 1.0) * (self.high - self.low)
+        return {name: round(float(v), PARAM_DECIMALS) for name, v in zip(self.names, values)}
+
+    def ask(self):
+        """
+        Muestrea una generación
+
+        Returns:
+            Array (population, n) de candidatos normalizados
+        """
+        z = self.rng.standard_normal((self.population, len(self.names)))
+        return np.clip(self.mean + self.std * z, 0.0, 1.0)
+
+    def tell(self, candidates, fitnesses):
+        """
+        Actualiza la media y la varianza con los mejores candidatos
+
+        Args:
+            candidates: Array devuelto por ask()
+            fitnesses: Fitness de cada candidato (menor es mejor)
+        """
+        elite = candidates[np.argsort(fitnesses)[:self.mu]]
+        previous = self.mean
+        self.mean = self.weights @ elite
+        variance = self.weights @ (elite - previous) ** 2
+        self.std = np.maximum(np.sqrt((1 - self.learning_rate) * self.std ** 2 +
+                                      self.learning_rate * variance), self.min_std)
+
+
+def load_cache(path):
+    """Caché de fitness: 'hash:semilla' -> fitness"""
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_cache(cache, path):
+    """Guarda la caché de fitness"""
+    with open(path, 'w') as f:
+        json.dump(cache, f)
+
+
+def run_search(target='fuzzy', generations=15, population=None, num_seeds=6, base_seed=0,
+               workers=None, sigma=0.2, track_length=None, max_time=30.0,
+               output_dir='searches', params_path=None):
+    """
+    Ejecuta la búsqueda y guarda el mejor vector de parámetros
+
+    Args:
+        target: 'fuzzy' (umbrales del difuso) u 'opponent' (velocidades por dificultad)
+        generations: Generaciones de la estrategia evolutiva
+        population: Candidatos por generación (None = según la dimensión)
+        num_seeds: Carreras (semillas) por candidato; las mismas para todos
+        base_seed: Semilla inicial de las carreras y del muestreo
+        workers: Número de procesos (None = todos los núcleos)
+        sigma: Desvío inicial en el espacio normalizado
+        track_length: Largo de la pista (None = la del juego)
+        max_time: Tiempo máximo por carrera en segundos
+        output_dir: Carpeta de la caché y del historial
+        params_path: Archivo de parámetros a escribir (None = el que carga el controlador)
+
+    Returns:
+        Tupla (mejores parámetros, su fitness, fitness de los valores por defecto)
+    """
+    module = fuzzy_controller if target == 'fuzzy' else opponent_controller
+    defaults = module.DEFAULT_PARAMS
+    params_path = params_path or module.PARAMS_PATH
+    seeds = [base_seed + i for i in range(num_seeds)]
+
+    settings = {'track_length': track_length, 'max_time': max_time}
+    if target == 'opponent':
+        # Referencia: el difuso tal como lo carga el juego (con umbrales ajustados si existen)
+        with contextlib.redirect_stdout(io.StringIO()):
+            settings['reference'] = fuzzy_controller.FuzzyController().params
+        settings['targets'] = TARGET_TIME_RATIOS
+
+    os.makedirs(output_dir, exist_ok=True)
+    cache_path = os.path.join(output_dir, f"cache_{target}.json")
+    cache = load_cache(cache_path)
+
+    strategy = EvolutionStrategy(SEARCH_SPACES[target], defaults, sigma=sigma,
+                                 population=population, seed=base_seed)
+    workers = workers or os.cpu_count() or 1
+    print(f"\n🧬 Búsqueda '{target}': {len(strategy.names)} parámetros, {strategy.population} candidatos "
+          f"x {generations} generaciones, {num_seeds} carreras por candidato, {workers} procesos")
+
+    def evaluate(pool, param_sets):
+        """Fitness medio de cada candidato (las carreras en caché no se repiten)"""
+        keys = [params_hash(target, params, settings) for params in param_sets]
+        tasks = [(f"{key}:{seed}", target, params, seed, settings)
+                 for key, params in zip(keys, param_sets) for seed in seeds
+                 if f"{key}:{seed}" not in cache]
+        # Evitar correr dos veces la misma carrera dentro de una generación
+        tasks = list({task[0]: task for task in tasks}.values())
+        if tasks:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            cache.update(pool.map(_evaluate, tasks, chunksize=chunksize))
+        return [float(np.mean([cache[f"{key}:{seed}"] for seed in seeds])) for key in keys], len(tasks)
+
+    history = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(track_length, max_time)) as pool:
+        (baseline,), _ = evaluate(pool, [dict(defaults)])
+        best_params, best_fitness = dict(defaults), baseline
+        print(f"   Valores por defecto: fitness {baseline:.4f}")
+
+        for generation in range(1, generations + 1):
+            candidates = strategy.ask()
+            param_sets = [strategy.to_params(x) for x in candidates]
+            fitnesses, races = evaluate(pool, param_sets)
+            strategy.tell(candidates, np.array(fitnesses))
+
+            index = int(np.argmin(fitnesses))
+            if fitnesses[index] < best_fitness:
+                best_params, best_fitness = param_sets[index], fitnesses[index]
+            history.append((generation, min(fitnesses), float(np.mean(fitnesses)),
+                            float(strategy.std.mean()), best_fitness, races))
+            print(f"   Gen {generation:>3}: mejor {min(fitnesses):.4f}  media {np.mean(fitnesses):.4f}  "
+                  f"desvío {strategy.std.mean():.3f}  global {best_fitness:.4f}  ({races} carreras nuevas)")
+            save_cache(cache, cache_path)
+
+    elapsed = time.perf_counter() - start
+    print(f"✓ Búsqueda completada en {elapsed:.1f}s ({len(cache)} evaluaciones en caché)")
+
+    print(f"\n{'Parámetro':<18}{'Por defecto':>12}{'Ajustado':>12}")
+    for name in strategy.names:
+        print(f"{name:<18}{defaults[name]:>12.4f}{best_params[name]:>12.4f}")
+    print(f"{'fitness':<18}{baseline:>12.4f}{best_fitness:>12.4f}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    history_path = os.path.join(output_dir, f"search_{target}_{timestamp}.csv")
+    with open(history_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['generation', 'best', 'mean', 'std', 'best_so_far', 'new_races'])
+        writer.writerows(history)
+    print(f"✓ Historial guardado en {history_path}")
+
+    save_params(params_path, best_params, target=target, fitness=best_fitness,
+                baseline_fitness=baseline, seeds=seeds, generations=generations,
+                track_length=track_length, max_time=max_time)
+    return best_params, best_fitness, baseline
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ajuste de parámetros de los controladores")
+    parser.add_argument('target', choices=sorted(SEARCH_SPACES), help="Controlador a ajustar")
+    parser.add_argument('--generations', type=int, default=15)
+    parser.add_argument('--population', type=int, default=None, help="Candidatos por generación")
+    parser.add_argument('--seeds', type=int, default=6, help="Carreras por candidato")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla inicial")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (por defecto: todos los núcleos)")
+    parser.add_argument('--sigma', type=float, default=0.2, help="Desvío inicial (espacio normalizado)")
+    parser.add_argument('--track-length', type=int, default=None, help="Largo de la pista en px")
+    parser.add_argument('--max-time', type=float, default=30.0, help="Tiempo máximo por carrera (s)")
+    parser.add_argument('--output', default='searches', help="Carpeta de la caché y el historial")
+    parser.add_argument('--params-path', default=None,
+                        help="Archivo de parámetros a escribir (por defecto el que carga el controlador)")
+    args = parser.parse_args()
+
+    run_search(target=args.target, generations=args.generations, population=args.population,
+               num_seeds=args.seeds, base_seed=args.seed, workers=args.workers, sigma=args.sigma,
+               track_length=args.track_length, max_time=args.max_time, output_dir=args.output,
+               params_path=args.params_path)
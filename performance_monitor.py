@@ -0,0 +1,213 @@
+"""
+Monitor de Rendimiento - Mide el tiempo de cada fase del frame
+Temporizadores con nombre, histogramas móviles (p50/p95/p99),
+overlay en pantalla y exportación a CSV/JSON
+"""
+import csv
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pygame
+
+
+class _PhaseTimer:
+    """Temporizador reutilizable para una fase (evita crear objetos por frame)"""
+
+    __slots__ = ('monitor', 'name', 'start')
+
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.monitor.add_sample(self.name, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+
+class PerformanceMonitor:
+    def __init__(self, window=300, max_frames=100000):
+        """
+        Inicializa el monitor de rendimiento
+
+        Args:
+            window: Número de frames usados para los percentiles móviles
+            max_frames: Máximo de frames guardados para la exportación
+        """
+        self.window = window
+        self.enabled = True
+        self.show_overlay = False
+
+        # Muestras móviles por fase (en milisegundos)
+        self.samples = {}
+        self.phase_order = []
+        self._timers = {}
+
+        # Historial por frame para exportar al final de la sesión
+        self.frames = deque(maxlen=max_frames)
+        self.current_frame = {}
+        self.frame_index = 0
+        self.frame_start = 0.0
+
+        # Caché del overlay (se recalcula cada pocos frames)
+        self.overlay_refresh = 15
+        self._overlay_surface = None
+        self._overlay_age = 0
+
+        # Líneas extra que otros sistemas pueden mostrar en el overlay
+        self.extra_lines = {}
+
+    def measure(self, name):
+        """
+        Retorna un temporizador para usar con 'with'
+
+        Args:
+            name: Nombre de la fase (ej. 'fisica', 'draw')
+        """
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = _PhaseTimer(self, name)
+            self._timers[name] = timer
+        return timer
+
+    def add_sample(self, name, elapsed_ms):
+        """Acumula una muestra de tiempo (ms) de una fase en el frame actual"""
+        if not self.enabled:
+            return
+        # Acumular por si la fase se mide varias veces en el mismo frame
+        self.current_frame[name] = self.current_frame.get(name, 0.0) + elapsed_ms
+
+    def begin_frame(self):
+        """Marca el inicio de un frame"""
+        self.frame_start = time.perf_counter()
+        self.current_frame = {}
+
+    def end_frame(self):
+        """Marca el fin de un frame y pasa sus tiempos a los histogramas"""
+        if not self.enabled:
+            return
+        self.current_frame['frame'] = (time.perf_counter() - self.frame_start) * 1000.0
+
+        for name, elapsed_ms in self.current_frame.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = deque(maxlen=self.window)
+                self.samples[name] = samples
+                self.phase_order.append(name)
+            samples.append(elapsed_ms)
+
+        self.current_frame['frame_index'] = self.frame_index
+        self.frames.append(self.current_frame)
+        self.frame_index += 1
+
+    def percentiles(self, name):
+        """
+        Calcula percentiles móviles de una fase
+
+        Returns:
+            Tupla (p50, p95, p99) en milisegundos, o None si no hay datos
+        """
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 95, 99])
+        return float(p50), float(p95), float(p99)
+
+    def get_summary(self):
+        """Retorna un diccionario con percentiles de todas las fases"""
+        summary = {}
+        for name in self.phase_order:
+            stats = self.percentiles(name)
+            if stats is not None:
+                summary[name] = {'p50': stats[0], 'p95': stats[1], 'p99': stats[2]}
+        return summary
+
+    def toggle_overlay(self):
+        """Muestra u oculta el overlay de rendimiento"""
+        self.show_overlay = not self.show_overlay
+        self._overlay_surface = None
+
+    def draw_overlay(self, screen, font, pos=(10, 130)):
+        """
+        Dibuja el overlay de rendimiento
+
+        Args:
+            screen: Superficie de pygame
+            font: Fuente para el texto
+            pos: Esquina superior izquierda del panel
+        """
+        if not self.show_overlay:
+            return
+
+        self._overlay_age += 1
+        if self._overlay_surface is None or self._overlay_age >= self.overlay_refresh:
+            self._overlay_surface = self._render_overlay(font)
+            self._overlay_age = 0
+
+        screen.blit(self._overlay_surface, pos)
+
+    def _render_overlay(self, font):
+        """Compone el panel del overlay en una superficie"""
+        lines = [("RENDIMIENTO (ms)   p50    p95    p99", (255, 255, 100))]
+        for name in self.phase_order:
+            stats = self.percentiles(name)
+            if stats is None:
+                continue
+            color = (255, 120, 120) if name == 'frame' and stats[1] > 1000.0 / 60 else (230, 230, 230)
+            lines.append((f"{name:<16}{stats[0]:6.2f} {stats[1]:6.2f} {stats[2]:6.2f}", color))
+        for key, value in self.extra_lines.items():
+            lines.append((f"{key}: {value}", (150, 220, 255)))
+
+        line_height = font.get_linesize()
+        width = max(font.size(text)[0] for text, _ in lines) + 20
+        height = line_height * len(lines) + 10
+
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+        for i, (text, color) in enumerate(lines):
+            surface.blit(font.render(text, True, color), (10, 5 + i * line_height))
+        return surface
+
+    def _column_names(self):
+        """Columnas de exportación en orden de aparición"""
+        return ['frame_index'] + list(self.phase_order)
+
+    def export_csv(self, filepath):
+        """Exporta los tiempos por frame a un archivo CSV"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        columns = self._column_names()
+        with open(filepath, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for frame in self.frames:
+                writer.writerow([frame.get(col, 0.0) for col in columns])
+        print(f"✓ Tiempos por frame exportados a {filepath}")
+
+    def export_json(self, filepath):
+        """Exporta resumen de percentiles y tiempos por frame a JSON"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        data = {
+            'frames_total': self.frame_index,
+            'window': self.window,
+            'summary': self.get_summary(),
+            'frames': list(self.frames)
+        }
+        with open(filepath, 'w') as f:
+            json.dump(data, f)
+        print(f"✓ Resumen de rendimiento exportado a {filepath}")
+
+    def export_session(self, directory='performance'):
+        """Exporta la sesión completa (CSV + JSON) con timestamp"""
+        if not self.frames:
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.export_csv(os.path.join(directory, f"frames_{timestamp}.csv"))
+        self.export_json(os.path.join(directory, f"frames_{timestamp}.json"))
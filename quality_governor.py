@@ -0,0 +1,120 @@
+"""
+Gobernador de calidad adaptativo
+Observa el tiempo de trabajo de los últimos frames (sin la espera de
+clock.tick) y baja la calidad de dibujo cuando se pasa del presupuesto de
+1/fps; cuando sobra margen de forma sostenida la vuelve a subir. Así el
+juego mantiene los FPS (y la física, que avanza un paso por frame, su
+velocidad) en vez de ralentizarse.
+"""
+from collections import deque
+
+import numpy as np
+
+# Niveles de calidad, de mayor a menor
+#   sensor_ray_step:   dibujar 1 de cada N rayos de sensores
+#   sensor_markers:    círculo en el extremo de cada rayo
+#   hud_interval:      recomponer el HUD cada N frames
+#   track_decorations: flechas y líneas de carril en la pista
+#   rotation_step:     resolución (grados) de las imágenes rotadas de los autos
+QUALITY_LEVELS = (
+    {'name': 'alta', 'sensor_ray_step': 1, 'sensor_markers': True, 'hud_interval': 1,
+     'track_decorations': True, 'rotation_step': 1},
+    {'name': 'media', 'sensor_ray_step': 2, 'sensor_markers': False, 'hud_interval': 2,
+     'track_decorations': True, 'rotation_step': 3},
+    {'name': 'baja', 'sensor_ray_step': 4, 'sensor_markers': False, 'hud_interval': 4,
+     'track_decorations': False, 'rotation_step': 6},
+    {'name': 'mínima', 'sensor_ray_step': 8, 'sensor_markers': False, 'hud_interval': 8,
+     'track_decorations': False, 'rotation_step': 15},
+)
+
+
+class QualityGovernor:
+    def __init__(self, target_fps=60, window=30, downgrade_ratio=0.9, upgrade_ratio=0.5,
+                 downgrade_cooldown=30, upgrade_cooldown=180, levels=QUALITY_LEVELS):
+        """
+        Inicializa el gobernador
+
+        Args:
+            target_fps: FPS objetivo (presupuesto = 1000 / target_fps ms)
+            window: Frames recientes que se evalúan
+            downgrade_ratio: Se baja la calidad si el p90 supera esta fracción del presupuesto
+            upgrade_ratio: Se sube la calidad si el p90 queda por debajo de esta fracción
+            downgrade_cooldown: Frames mínimos entre un cambio y una bajada
+            upgrade_cooldown: Frames mínimos entre un cambio y una subida (más largo:
+                              evita oscilar entre dos niveles)
+            levels: Configuración de cada nivel, de mayor a menor calidad
+        """
+        self.budget_ms = 1000.0 / target_fps
+        self.downgrade_ratio = downgrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.downgrade_cooldown = downgrade_cooldown
+        self.upgrade_cooldown = upgrade_cooldown
+        self.levels = levels
+
+        self.enabled = True
+        self.level = 0
+        self.frame_times = deque(maxlen=window)
+        self.frames_since_change = 0
+        self.changes = 0
+        self.last_p90 = 0.0
+
+    @property
+    def settings(self):
+        """Configuración del nivel actual"""
+        return self.levels[self.level]
+
+    def record(self, frame_ms):
+        """
+        Registra el tiempo de trabajo de un frame y ajusta el nivel si corresponde
+
+        Args:
+            frame_ms: Tiempo del frame en ms (sin la espera de clock.tick)
+
+        Returns:
+            True si el nivel cambió en este frame
+        """
+        self.frame_times.append(frame_ms)
+        self.frames_since_change += 1
+        if not self.enabled or len(self.frame_times) < self.frame_times.maxlen:
+            return False
+
+        self.last_p90 = float(np.percentile(np.fromiter(self.frame_times, dtype=np.float64), 90))
+
+        if (self.last_p90 > self.budget_ms * self.downgrade_ratio and
+                self.level < len(self.levels) - 1 and
+                self.frames_since_change >= self.downgrade_cooldown):
+            self.set_level(self.level + 1)
+            return True
+
+        if (self.last_p90 < self.budget_ms * self.upgrade_ratio and
+                self.level > 0 and
+                self.frames_since_change >= self.upgrade_cooldown):
+            self.set_level(self.level - 1)
+            return True
+
+        return False
+
+    def set_level(self, level):
+        """
+        Fija el nivel de calidad (0 = máxima)
+
+        Args:
+            level: Índice en levels
+        """
+        level = min(max(level, 0), len(self.levels) - 1)
+        if level != self.level:
+            self.changes += 1
+        self.level = level
+        self.frames_since_change = 0
+        # Los tiempos medidos con el nivel anterior ya no sirven para decidir
+        self.frame_times.clear()
+
+    def reset(self):
+        """Vuelve a calidad máxima (ej. al comenzar una carrera)"""
+        self.set_level(0)
+
+    def get_status_text(self):
+        """Texto corto para el overlay de rendimiento"""
+        mode = "auto" if self.enabled else "fija"
+        return (f"{self.settings['name']} ({self.level + 1}/{len(self.levels)}, {mode}) "
+                f"p90 {self.last_p90:.1f}/{self.budget_ms:.1f} ms")
@@ -0,0 +1,169 @@
+"""
+Simulador de Carreras sin ventana (headless)
+Reproduce la lógica de Game.update_game sin dibujar, para evaluar
+controladores a máxima velocidad de CPU
+"""
+import random
+
+import numpy as np
+
+from car import Car
+from track import Track
+
+
+class ManualBaselineController:
+    """
+    Sustituto del modo manual cuando no hay jugador humano:
+    mantiene el acelerador a fondo y no gira (equivale a dejar pulsada la flecha arriba)
+    """
+
+    def reset(self):
+        """No tiene estado interno"""
+        pass
+
+    def compute(self, car):
+        """Retorna (steering, throttle) constantes"""
+        return 0.0, 1.0
+
+
+class RaceSimulator:
+    def __init__(self, track, controllers, fps=60, max_time=60.0,
+                 jitter_x=5.0, jitter_angle=2.0):
+        """
+        Inicializa el simulador
+
+        Args:
+            track: Objeto Track
+            controllers: Lista de controladores, uno por auto (índice 0 = jugador, carril 0)
+            fps: Frames por segundo simulados (para convertir frames a segundos)
+            max_time: Tiempo máximo de carrera en segundos
+            jitter_x: Variación aleatoria máxima de la posición inicial en X (px)
+            jitter_angle: Variación aleatoria máxima del ángulo inicial (grados)
+        """
+        self.track = track
+        self.controllers = controllers
+        self.fps = fps
+        self.max_frames = int(max_time * fps)
+        self.jitter_x = jitter_x
+        self.jitter_angle = jitter_angle
+
+        self.cars = [Car(0, 0, (0, 0, 0), is_player=(i == 0)) for i in range(len(controllers))]
+        self.seed = None
+        self.reset()
+
+    def reset(self, seed=None):
+        """
+        Reinicia la carrera
+
+        Args:
+            seed: Semilla para la posición inicial y el azar de los controladores
+        """
+        self.seed = seed
+        rng = random.Random(seed)
+
+        # El controlador difuso usa el módulo random global en su recuperación
+        random.seed(seed)
+        np.random.seed(None if seed is None else seed % (2 ** 32))
+
+        for lane, (car, controller) in enumerate(zip(self.cars, self.controllers)):
+            x, y, angle = self.track.get_start_position(lane=lane)
+            x += rng.uniform(-self.jitter_x, self.jitter_x)
+            angle += rng.uniform(-self.jitter_angle, self.jitter_angle)
+            car.reset(x, y, angle)
+            car.prev_x = car.x
+            car.prev_y = car.y
+            if hasattr(controller, 'reset'):
+                controller.reset()
+
+        self.frame = 0
+        self.winner = None
+        self.colliding = [False] * len(self.cars)
+        self.crash_counts = [0] * len(self.cars)
+        self.splits = [[] for _ in self.cars]
+        self.finish_frames = [None] * len(self.cars)
+
+    def step(self):
+        """
+        Avanza un frame (mismo orden que Game.update_game)
+
+        Returns:
+            True si la carrera terminó
+        """
+        track = self.track
+
+        # Control y física de cada auto, en orden (los que ya llegaron quedan detenidos)
+        for car, controller, finish in zip(self.cars, self.controllers, self.finish_frames):
+            if finish is not None:
+                continue
+            car.update_sensors(track)
+            steering, throttle = controller.compute(car)
+            car.update_ai_control(steering, throttle)
+            car.apply_physics()
+
+        # Colisiones (se cuenta cada nuevo contacto con el borde)
+        for i, car in enumerate(self.cars):
+            if self.finish_frames[i] is not None:
+                continue
+            if track.check_collision(car):
+                car.crashed = True
+                car.speed *= 0.5
+                # Al cruzar la meta el frente toca el borde inferior: no cuenta como choque
+                if not self.colliding[i] and car.y < track.finish_line_y:
+                    self.crash_counts[i] += 1
+                self.colliding[i] = True
+            else:
+                self.colliding[i] = False
+
+        # Checkpoints y llegada a la meta
+        for i, car in enumerate(self.cars):
+            if self.finish_frames[i] is not None:
+                continue
+            if track.check_checkpoint(car, car.checkpoint_count, (car.prev_x, car.prev_y)):
+                car.checkpoint_count += 1
+                self.splits[i].append((self.frame + 1) / self.fps)
+
+            if self.finish_frames[i] is None and car.y >= track.finish_line_y:
+                self.finish_frames[i] = self.frame + 1
+                # Igual que en Game: el primero en llegar gana (el jugador tiene prioridad en empate)
+                if self.winner is None:
+                    self.winner = i
+
+        self.frame += 1
+        return self.is_done()
+
+    def is_done(self):
+        """La carrera termina cuando todos llegaron a la meta o se agotó el tiempo"""
+        if self.frame >= self.max_frames:
+            return True
+        return all(f is not None for f in self.finish_frames)
+
+    def run(self, seed=None):
+        """
+        Ejecuta una carrera completa
+
+        Args:
+            seed: Semilla de la carrera
+
+        Returns:
+            Diccionario con resultados por auto
+        """
+        self.reset(seed)
+        while not self.step():
+            pass
+        return self.get_results()
+
+    def get_results(self):
+        """Resultados de la carrera actual"""
+        return {
+            'seed': self.seed,
+            'frames': self.frame,
+            'winner': self.winner,
+            'finish_times': [None if f is None else f / self.fps for f in self.finish_frames],
+            'crashes': list(self.crash_counts),
+            'splits': [list(s) for s in self.splits]
+        }
+
+
+def create_default_track():
+    """Crea la pista con el tamaño de ventana del juego"""
+    return Track(1200, 800)
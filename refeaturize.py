@@ -0,0 +1,138 @@
+"""
+Re-featurización masiva de sesiones grabadas
+Recalcula los sensores de todas las sesiones de training_data/ para una
+nueva configuración (cantidad, ángulos o alcance de sensores) a partir de
+la pose cruda guardada (x, y, ángulo), con raycasting vectorizado sobre
+todos los frames a la vez. No hace falta volver a conducir.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+from car_batch import compute_sensor_distances
+from features import FeatureSpec, LABEL_COLUMNS, POSE_COLUMNS
+from track import Track
+
+# Columnas que se conservan tal cual de la sesión original
+CARRIED_COLUMNS = ('velocity',) + LABEL_COLUMNS
+
+
+def load_session(filepath):
+    """
+    Carga una sesión CSV
+
+    Returns:
+        Tupla (columnas, datos) o (columnas, None) si está vacía
+    """
+    with open(filepath, newline='') as f:
+        columns = next(csv.reader(f))
+    data = np.loadtxt(filepath, delimiter=',', skiprows=1, ndmin=2)
+    return columns, (data if data.size else None)
+
+
+def evenly_spaced_angles(num_sensors):
+    """Ángulos de sensores repartidos uniformemente en 360°"""
+    return [i * 360.0 / num_sensors for i in range(num_sensors)]
+
+
+def refeaturize_corpus(input_dir='training_data', output_dir=None, sensor_angles=None,
+                       sensor_length=150, step=5, track=None, chunk_frames=20000):
+    """
+    Recalcula los sensores de todas las sesiones con pose
+
+    Args:
+        input_dir: Directorio con las sesiones originales
+        output_dir: Directorio de salida (se crea con el mismo nombre de archivo)
+        sensor_angles: Ángulos relativos de los nuevos sensores (grados)
+        sensor_length: Alcance de los nuevos sensores
+        step: Paso del rayo en píxeles
+        track: Pista en la que se grabaron las sesiones
+        chunk_frames: Frames por bloque de raycasting (limita la memoria)
+
+    Returns:
+        Número total de frames re-etiquetados
+    """
+    if sensor_angles is None:
+        sensor_angles = evenly_spaced_angles(16)
+    if track is None:
+        track = Track(1200, 800)
+    if output_dir is None:
+        output_dir = f"{input_dir}_s{len(sensor_angles)}_l{sensor_length:g}"
+
+    files = sorted(glob.glob(os.path.join(input_dir, "training_data_*.csv")))
+    print(f"\n📂 {len(files)} sesiones en {input_dir}/")
+
+    # Cargar todas las sesiones que tengan pose cruda
+    sessions = []
+    skipped = 0
+    for filepath in files:
+        columns, data = load_session(filepath)
+        if data is None or not all(c in columns for c in POSE_COLUMNS):
+            skipped += 1
+            continue
+        sessions.append((filepath, columns, data))
+
+    if skipped:
+        print(f"⚠ {skipped} sesiones sin pose (grabadas antes de guardar x/y/ángulo) se omiten")
+    if not sessions:
+        print("❌ No hay sesiones con pose para re-featurizar")
+        return 0
+
+    # Concatenar todos los frames para un único raycasting vectorizado
+    poses = np.vstack([data[:, [columns.index(c) for c in POSE_COLUMNS]]
+                       for _, columns, data in sessions])
+    carried = np.vstack([data[:, [columns.index(c) for c in CARRIED_COLUMNS]]
+                        for _, columns, data in sessions])
+
+    start = time.perf_counter()
+    sensors = np.empty((len(poses), len(sensor_angles)))
+    for i in range(0, len(poses), chunk_frames):
+        block = slice(i, i + chunk_frames)
+        compute_sensor_distances(track, poses[block, 0], poses[block, 1], poses[block, 2],
+                                 sensor_angles, sensor_length, step, out=sensors[block])
+    sensors /= sensor_length
+    elapsed = time.perf_counter() - start
+    print(f"⚡ {len(poses)} frames re-etiquetados en {elapsed:.2f}s "
+          f"({len(poses) / max(elapsed, 1e-9):,.0f} frames/s)")
+
+    # Escribir cada sesión con el mismo formato que DataCollector (orden canónico)
+    os.makedirs(output_dir, exist_ok=True)
+    header = FeatureSpec(len(sensor_angles)).header()
+    offset = 0
+    for filepath, _, data in sessions:
+        n = len(data)
+        rows = np.hstack([carried[offset:offset + n, :1], sensors[offset:offset + n],
+                          carried[offset:offset + n, 1:], poses[offset:offset + n]])
+        offset += n
+        out_path = os.path.join(output_dir, os.path.basename(filepath))
+        with open(out_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows.tolist())
+
+    with open(os.path.join(output_dir, 'sensor_config.json'), 'w') as f:
+        json.dump({'sensor_angles': list(sensor_angles), 'sensor_length': sensor_length,
+                   'step': step, 'source': input_dir}, f, indent=2)
+
+    print(f"✓ {len(sessions)} sesiones escritas en {output_dir}/")
+    return len(poses)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula sensores de las sesiones grabadas")
+    parser.add_argument('--input', default='training_data', help="Directorio de sesiones")
+    parser.add_argument('--output', default=None, help="Directorio de salida")
+    parser.add_argument('--sensors', type=int, default=16, help="Cantidad de sensores (repartidos en 360°)")
+    parser.add_argument('--angles', type=float, nargs='+', default=None, help="Ángulos explícitos de los sensores")
+    parser.add_argument('--length', type=float, default=150, help="Alcance de los sensores (px)")
+    parser.add_argument('--step', type=float, default=5, help="Paso del rayo (px)")
+    args = parser.parse_args()
+
+    angles = args.angles if args.angles else evenly_spaced_angles(args.sensors)
+    refeaturize_corpus(input_dir=args.input, output_dir=args.output, sensor_angles=angles,
+                       sensor_length=args.length, step=args.step)
@@ -0,0 +1,99 @@
+"""
+Costo de dibujo según la resolución interna
+Corre la misma carrera (modo difuso, sensores visibles) con cada escala de
+resolución interna y reporta el tiempo de dibujo del mundo (relleno y blits
+de pista, autos y sensores en la superficie reducida), el de la ampliación a
+la ventana y el total, con scale y con smoothscale.
+
+Sin ventana: python render_benchmark.py --headless
+"""
+import argparse
+import os
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Costo de dibujo por escala de resolución interna")
+    parser.add_argument('--scales', type=float, nargs='+', default=None,
+                        help="Escalas a medir (por defecto las de la tecla [F])")
+    parser.add_argument('--frames', type=int, default=300, help="Frames medidos por escala")
+    parser.add_argument('--opponents', type=int, default=20, help="Cantidad de oponentes")
+    parser.add_argument('--track-length', type=int, default=6000, help="Largo de la pista en px")
+    parser.add_argument('--headless', action='store_true',
+                        help="Usar el driver de video 'dummy' (sin ventana)")
+    return parser.parse_args()
+
+
+def measure_scale(game, scale, smooth, frames):
+    """
+    Mide el dibujo de una carrera con una escala de resolución interna
+
+    Args:
+        game: Game con el controlador difuso ya cargado
+        scale: Escala de la resolución interna
+        smooth: True para ampliar con smoothscale
+        frames: Frames medidos
+
+    Returns:
+        Diccionario fase -> p50 en ms ('dibujo_mundo', 'escalado', 'draw')
+    """
+    game.smooth_scaling = smooth
+    game.set_render_scale(scale)
+    game.control_mode = 'fuzzy'
+    game.reset_race()
+    # Descartar las muestras de la escala anterior
+    for samples in game.perf.samples.values():
+        samples.clear()
+
+    for _ in range(frames):
+        if game.state != 'playing':
+            game.reset_race()
+        game.perf.begin_frame()
+        with game.perf.measure('update'):
+            game.update_game()
+        with game.perf.measure('draw'):
+            game.draw()
+        game.perf.end_frame()
+
+    summary = game.perf.get_summary()
+    return {phase: summary[phase]['p50'] if phase in summary else 0.0
+            for phase in ('dibujo_mundo', 'escalado', 'draw')}
+
+
+def main():
+    args = parse_args()
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+    from game import Game, RENDER_SCALES
+
+    game = Game(num_opponents=args.opponents, track_length=args.track_length)
+    # Esperar toda la precarga: el hilo en segundo plano alteraría las mediciones
+    for name in game.preloader.names:
+        try:
+            game.preloader.get(name)
+        except Exception:
+            pass
+    game.show_sensors = True
+    # Calidad fija: el gobernador no debe cambiar el detalle entre escalas
+    game.quality.enabled = False
+
+    print("=" * 60)
+    print("  COSTO DE DIBUJO POR RESOLUCIÓN INTERNA")
+    print("=" * 60)
+    print(f"Ventana {game.width}x{game.height}, {args.opponents} oponentes, "
+          f"{args.frames} frames por escala (p50 en ms)\n")
+    print(f"{'escala':>7} {'superficie':>11} {'ampliación':>11} {'mundo':>8} {'ampliar':>8} {'total':>8}")
+
+    for scale in args.scales or RENDER_SCALES:
+        for smooth in ((False,) if scale == 1.0 else (False, True)):
+            result = measure_scale(game, scale, smooth, args.frames)
+            size = f"{round(game.width * scale)}x{round(game.height * scale)}"
+            method = '-' if scale == 1.0 else ('smoothscale' if smooth else 'scale')
+            print(f"{scale:>6.2f}x {size:>11} {method:>11} {result['dibujo_mundo']:8.2f} "
+                  f"{result['escalado']:8.2f} {result['draw']:8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
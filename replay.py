@@ -0,0 +1,411 @@
+"""
+Repeticiones (replays) deterministas de carreras
+Graba semilla, posiciones iniciales, entradas de control por frame de cada
+auto y keyframes periódicos del estado completo. Las entradas se codifican
+por diferencias (sobre los bits, sin pérdida) y se comprimen.
+La reproducción re-simula sin ventana a máxima velocidad o salta a
+cualquier frame desde el keyframe más cercano.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pygame
+
+from car import Car
+from car_batch import CarBatch
+from track import Track
+
+REPLAY_VERSION = 1
+
+# Campos del estado completo de un auto guardados en cada keyframe
+STATE_FIELDS = ('x', 'y', 'angle', 'speed', 'prev_x', 'prev_y',
+                'total_distance', 'checkpoint_count', 'crashed')
+
+# Bits de teclas para autos en modo manual
+KEY_UP = 1
+KEY_DOWN = 2
+KEY_LEFT = 4
+KEY_RIGHT = 8
+
+
+def encode_keys(keys):
+    """Codifica las flechas presionadas como máscara de bits"""
+    mask = 0
+    if keys[pygame.K_UP]:
+        mask |= KEY_UP
+    if keys[pygame.K_DOWN]:
+        mask |= KEY_DOWN
+    if keys[pygame.K_LEFT]:
+        mask |= KEY_LEFT
+    if keys[pygame.K_RIGHT]:
+        mask |= KEY_RIGHT
+    return mask
+
+
+class _ReplayKeys:
+    """Imita pygame.key.get_pressed() a partir de una máscara de bits"""
+
+    def __init__(self, mask):
+        self.pressed = {
+            pygame.K_UP: bool(mask & KEY_UP),
+            pygame.K_DOWN: bool(mask & KEY_DOWN),
+            pygame.K_LEFT: bool(mask & KEY_LEFT),
+            pygame.K_RIGHT: bool(mask & KEY_RIGHT)
+        }
+
+    def __getitem__(self, key):
+        return self.pressed.get(key, False)
+
+
+def decode_keys(mask):
+    """Reconstruye el estado de las flechas a partir de una máscara (inverso de encode_keys)"""
+    return _ReplayKeys(mask)
+
+
+def capture_state(cars):
+    """
+    Captura el estado completo de una lista de autos
+
+    Args:
+        cars: Lista de Car o CarBatch (un lote aporta una fila por auto)
+
+    Returns:
+        Array (num_cars, len(STATE_FIELDS)) en float64
+    """
+    rows = []
+    for car in cars:
+        if isinstance(car, CarBatch):
+            rows.append(np.column_stack([getattr(car, field) for field in STATE_FIELDS]).astype(np.float64))
+        else:
+            rows.append([[float(getattr(car, field)) for field in STATE_FIELDS]])
+    return np.vstack(rows)
+
+
+def capture_poses(cars):
+    """
+    Posiciones de una lista de autos (Car o CarBatch)
+
+    Returns:
+        Array (num_cars, 3) con x, y, ángulo
+    """
+    rows = []
+    for car in cars:
+        if isinstance(car, CarBatch):
+            rows.append(np.column_stack((car.x, car.y, car.angle)))
+        else:
+            rows.append([(car.x, car.y, car.angle)])
+    return np.vstack(rows).astype(np.float64)
+
+
+def restore_state(cars, state):
+    """Restaura el estado capturado con capture_state"""
+    for car, values in zip(cars, state):
+        for field, value in zip(STATE_FIELDS, values):
+            if field == 'checkpoint_count':
+                value = int(value)
+            elif field == 'crashed':
+                value = bool(value)
+            setattr(car, field, value)
+
+
+def _delta_encode(values):
+    """Codificación por diferencias sobre la representación entera de float64 (sin pérdida)"""
+    bits = np.ascontiguousarray(values, dtype=np.float64).view(np.int64)
+    return np.diff(bits, axis=0, prepend=np.zeros_like(bits[:1]))
+
+
+def _delta_decode(deltas):
+    """Inverso de _delta_encode"""
+    return np.cumsum(deltas, axis=0, dtype=np.int64).view(np.float64)
+
+
+class Replay:
+    def __init__(self, header, initial_poses, inputs, keyframe_frames, keyframes):
+        """
+        Contenedor de una repetición
+
+        Args:
+            header: Diccionario con semilla, fps, modos de control, pista, etc.
+            initial_poses: Array (num_cars, 3) con x, y, ángulo iniciales
+            inputs: Array (num_frames, num_cars, 2) con las entradas de cada frame
+            keyframe_frames: Array con el índice de frame de cada keyframe
+            keyframes: Array (num_keyframes, num_cars, len(STATE_FIELDS))
+        """
+        self.header = header
+        self.initial_poses = initial_poses
+        self.inputs = inputs
+        self.keyframe_frames = keyframe_frames
+        self.keyframes = keyframes
+
+    @property
+    def num_frames(self):
+        return len(self.inputs)
+
+    @property
+    def num_cars(self):
+        return self.inputs.shape[1] if self.inputs.ndim == 3 else len(self.initial_poses)
+
+    def save(self, filepath):
+        """Guarda la repetición comprimida (.npz)"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        header_bytes = np.frombuffer(json.dumps(self.header).encode('utf-8'), dtype=np.uint8)
+        np.savez_compressed(
+            filepath,
+            header=header_bytes,
+            initial_poses=self.initial_poses,
+            inputs=_delta_encode(self.inputs),
+            keyframe_frames=self.keyframe_frames,
+            keyframes=_delta_encode(self.keyframes)
+        )
+
+    @classmethod
+    def load(cls, filepath):
+        """Carga una repetición guardada con save()"""
+        with np.load(filepath, allow_pickle=False) as data:
+            header = json.loads(data['header'].tobytes().decode('utf-8'))
+            if header.get('version') != REPLAY_VERSION:
+                raise ValueError(f"Versión de replay no soportada: {header.get('version')}")
+            return cls(header, data['initial_poses'], _delta_decode(data['inputs']),
+                       data['keyframe_frames'], _delta_decode(data['keyframes']))
+
+
+class ReplayRecorder:
+    def __init__(self, keyframe_interval=60):
+        """
+        Inicializa el grabador de repeticiones
+
+        Args:
+            keyframe_interval: Frames entre keyframes de estado completo
+        """
+        self.keyframe_interval = keyframe_interval
+        self.is_recording = False
+        self.header = None
+        self.initial_poses = None
+        self.inputs = []
+        self.keyframe_frames = []
+        self.keyframes = []
+        self.frame_index = 0
+
+    def start(self, cars, modes, seed=None, fps=60, track_config=None):
+        """
+        Comienza a grabar una carrera
+
+        Args:
+            cars: Lista de Car o CarBatch (el orden define el índice de cada auto)
+            modes: Modo de cada auto: 'manual' (máscara de teclas) o 'ai' (steering, throttle)
+            seed: Semilla usada en la carrera
+            fps: Frames por segundo de la simulación
+            track_config: Parámetros para reconstruir la pista
+        """
+        self.header = {
+            'version': REPLAY_VERSION,
+            'seed': seed,
+            'fps': fps,
+            'modes': list(modes),
+            'track': track_config or {},
+            'keyframe_interval': self.keyframe_interval,
+            'state_fields': list(STATE_FIELDS),
+            'created': datetime.now().isoformat(timespec='seconds')
+        }
+        self.initial_poses = capture_poses(cars)
+        self.inputs = []
+        self.keyframe_frames = []
+        self.keyframes = []
+        self.frame_index = 0
+        self.is_recording = True
+
+    def begin_frame(self, cars):
+        """Llamar al inicio de cada frame: guarda un keyframe si corresponde"""
+        if not self.is_recording:
+            return
+        if self.frame_index % self.keyframe_interval == 0:
+            self.keyframe_frames.append(self.frame_index)
+            self.keyframes.append(capture_state(cars))
+
+    def end_frame(self, inputs):
+        """
+        Llamar al final de cada frame con las entradas aplicadas a cada auto
+
+        Args:
+            inputs: Tuplas (a, b) por auto, como lista o array (num_cars, 2).
+                    Manual: (máscara_teclas, 0). IA: (steering, throttle)
+        """
+        if not self.is_recording:
+            return
+        self.inputs.append(inputs)
+        self.frame_index += 1
+
+    def stop(self):
+        """
+        Termina la grabación
+
+        Returns:
+            Objeto Replay, o None si no se grabó ningún frame
+        """
+        if not self.is_recording:
+            return None
+        self.is_recording = False
+        if not self.inputs:
+            return None
+
+        num_cars = len(self.initial_poses)
+        self.header['num_frames'] = len(self.inputs)
+        return Replay(self.header,
+                      self.initial_poses,
+                      np.array(self.inputs, dtype=np.float64).reshape(len(self.inputs), num_cars, 2),
+                      np.array(self.keyframe_frames, dtype=np.int64),
+                      np.array(self.keyframes, dtype=np.float64))
+
+    def stop_and_save(self, directory='replays'):
+        """Termina la grabación y la guarda con timestamp"""
+        replay = self.stop()
+        if replay is None:
+            return None
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(directory, f"replay_{timestamp}.npz")
+        replay.save(filepath)
+        print(f"🎞 Repetición guardada: {filepath} ({replay.num_frames} frames)")
+        return filepath
+
+
+class ReplayPlayer:
+    def __init__(self, replay, track=None):
+        """
+        Re-simula una repetición sin ventana
+
+        Args:
+            replay: Objeto Replay
+            track: Pista (por defecto se reconstruye desde la cabecera)
+        """
+        self.replay = replay
+        track_config = replay.header.get('track', {})
+        self.track = track if track is not None else Track(**{'width': 1200, 'height': 800,
+                                                              **track_config})
+        self.modes = replay.header['modes']
+        self.cars = [Car(x, y, (0, 0, 0), is_player=(i == 0))
+                     for i, (x, y, _) in enumerate(replay.initial_poses)]
+        self.frame = 0
+        self.reset()
+
+    def reset(self):
+        """Vuelve al frame 0"""
+        self.seek(0)
+
+    def seek(self, frame):
+        """
+        Salta a un frame restaurando el keyframe anterior más cercano
+
+        Args:
+            frame: Frame destino (estado al inicio de ese frame)
+        """
+        frame = max(0, min(frame, self.replay.num_frames))
+        k = int(np.searchsorted(self.replay.keyframe_frames, frame, side='right')) - 1
+        if k >= 0:
+            restore_state(self.cars, self.replay.keyframes[k])
+            self.frame = int(self.replay.keyframe_frames[k])
+        else:
+            for car, (x, y, angle) in zip(self.cars, self.replay.initial_poses):
+                car.reset(x, y, angle)
+                car.prev_x, car.prev_y = x, y
+            self.frame = 0
+
+        while self.frame < frame:
+            self.step()
+
+    def step(self):
+        """
+        Avanza un frame aplicando las entradas grabadas (mismo orden que Game.update_game)
+
+        Returns:
+            False si ya no quedan frames
+        """
+        if self.frame >= self.replay.num_frames:
+            return False
+
+        track = self.track
+        inputs = self.replay.inputs[self.frame]
+
+        for car, mode, (a, b) in zip(self.cars, self.modes, inputs):
+            if mode == 'manual':
+                car.update_manual(decode_keys(int(a)))
+            else:
+                car.update_ai_control(a, b)
+            car.apply_physics()
+
+        for car in self.cars:
+            if track.check_collision(car):
+                car.crashed = True
+                car.speed *= 0.5
+
+        for car in self.cars:
+            if track.check_checkpoint(car, car.checkpoint_count, (car.prev_x, car.prev_y)):
+                car.checkpoint_count += 1
+
+        self.frame += 1
+        return True
+
+    def run(self):
+        """
+        Re-simula toda la repetición a máxima velocidad
+
+        Returns:
+            Frames simulados por segundo
+        """
+        self.reset()
+        start = time.perf_counter()
+        while self.step():
+            pass
+        elapsed = time.perf_counter() - start
+        return self.replay.num_frames / elapsed if elapsed > 0 else float('inf')
+
+    def verify(self):
+        """
+        Comprueba que la re-simulación coincide con los keyframes grabados
+
+        Returns:
+            Índice del primer keyframe que no coincide, o None si todo coincide
+        """
+        self.reset()
+        for k, frame in enumerate(self.replay.keyframe_frames):
+            while self.frame < frame:
+                self.step()
+            if not np.array_equal(capture_state(self.cars), self.replay.keyframes[k]):
+                return k
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproduce una repetición sin ventana")
+    parser.add_argument('replay', help="Archivo .npz de la repetición")
+    parser.add_argument('--seek', type=int, default=None, help="Saltar a un frame e imprimir el estado")
+    parser.add_argument('--verify', action='store_true', help="Verificar determinismo contra los keyframes")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.replay)
+    player = ReplayPlayer(replay)
+    print(f"🎞 {args.replay}: {replay.num_frames} frames, {replay.num_cars} autos, "
+          f"semilla {replay.header.get('seed')}, modos {replay.header['modes']}")
+
+    fps = player.run()
+    print(f"✓ Re-simulación completa a {fps:,.0f} frames/s")
+    for i, car in enumerate(player.cars):
+        print(f"   Auto {i}: y={car.y:.1f} checkpoints={car.checkpoint_count} choque={car.crashed}")
+
+    if args.seek is not None:
+        start = time.perf_counter()
+        player.seek(args.seek)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"⏩ Frame {player.frame} alcanzado en {elapsed:.2f} ms")
+        for i, car in enumerate(player.cars):
+            print(f"   Auto {i}: x={car.x:.1f} y={car.y:.1f} ángulo={car.angle:.1f} vel={car.speed:.2f}")
+
+    if args.verify:
+        mismatch = player.verify()
+        if mismatch is None:
+            print("✅ La re-simulación coincide con todos los keyframes")
+        else:
+            print(f"❌ Divergencia en el keyframe {mismatch} (frame {replay.keyframe_frames[mismatch]})")
@@ -0,0 +1,521 @@
+"""
+Simulación en un proceso aparte
+La física y el control corren en su propio proceso a ritmo fijo y publican
+el estado de los autos en un doble búfer de memoria compartida
+(multiprocessing.shared_memory). El proceso de pygame lee la última
+instantánea completa a su propio ritmo: un Track.draw lento o una rotación
+de imágenes ya no retrasa la física, y cada lado usa su propio núcleo.
+Los controladores del jugador (y la recarga en caliente del modelo) viven en
+el proceso de simulación: se precargan al iniciarlo, mientras se muestra el menú.
+"""
+import multiprocessing
+import os
+import random
+import threading
+import time
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from car import Car
+from car_batch import CarBatch
+from controller_preloader import CONTROLLER_NAMES, ControllerPreloader
+from opponent_controller import OpponentController
+from replay import decode_keys
+from track import Track
+
+# Campos por auto en cada instantánea (seguidos de las distancias de los sensores)
+SNAPSHOT_FIELDS = ('x', 'y', 'angle', 'speed', 'checkpoint_count', 'crashed')
+SENSOR_COLUMN = len(SNAPSHOT_FIELDS)
+
+# Estado de la carrera en cada instantánea
+# (model_version: versión del modelo neuronal en uso, 0 = sin modelo)
+STATUS_FIELDS = ('race_id', 'frame', 'winner', 'step_ms', 'model_version')
+(STATUS_RACE_ID, STATUS_FRAME, STATUS_WINNER, STATUS_STEP_MS,
+ STATUS_MODEL_VERSION) = range(len(STATUS_FIELDS))
+
+# Códigos de ganador
+WINNER_NONE = 0
+WINNER_PLAYER = 1
+WINNER_OPPONENT = 2
+WINNER_NAMES = {WINNER_PLAYER: 'player', WINNER_OPPONENT: 'opponent'}
+
+# Cabecera (int64): slot publicado, secuencia de cada slot y teclas del jugador
+HEADER_FRONT = 0
+HEADER_SEQUENCE = 1  # 2 valores: uno por slot
+HEADER_KEYS = 3
+HEADER_SIZE = 4
+
+
+class SnapshotBuffer:
+    def __init__(self, num_cars, num_sensors, name=None):
+        """
+        Doble búfer de instantáneas en memoria compartida (un escritor, un lector)
+
+        El escritor llena el slot que no está publicado y lo publica al
+        terminar; cada slot tiene un número de secuencia (impar mientras se
+        escribe) con el que el lector descarta copias a medio escribir.
+
+        Args:
+            num_cars: Autos por instantánea (jugador + oponentes)
+            num_sensors: Sensores por auto
+            name: Nombre del bloque existente a abrir (None = crear uno nuevo)
+        """
+        self.num_cars = num_cars
+        self.row_size = SENSOR_COLUMN + num_sensors
+        slot_size = num_cars * self.row_size + len(STATUS_FIELDS)
+        size = (HEADER_SIZE + 2 * slot_size) * 8
+
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.name = self.shm.name
+
+        self.header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.shm.buf)
+        slots = np.ndarray((2, slot_size), dtype=np.float64, buffer=self.shm.buf, offset=HEADER_SIZE * 8)
+        car_values = num_cars * self.row_size
+        self.cars = [slots[i, :car_values].reshape(num_cars, self.row_size) for i in range(2)]
+        self.status = [slots[i, car_values:] for i in range(2)]
+        if self.owner:
+            self.header[:] = 0
+            slots[:] = 0
+
+        self._back = 0
+
+    def begin_write(self):
+        """
+        Reserva el slot no publicado para escribir la próxima instantánea
+
+        Returns:
+            Tupla (autos, estado): vistas del slot a llenar
+        """
+        self._back = 1 - int(self.header[HEADER_FRONT])
+        self.header[HEADER_SEQUENCE + self._back] += 1  # Impar: escribiendo
+        return self.cars[self._back], self.status[self._back]
+
+    def publish(self):
+        """Publica el slot escrito como la instantánea más reciente"""
+        self.header[HEADER_SEQUENCE + self._back] += 1
+        self.header[HEADER_FRONT] = self._back
+
+    def read(self, cars_out, status_out, retries=4):
+        """
+        Copia la instantánea publicada más reciente
+
+        Args:
+            cars_out: Array (num_cars, row_size) destino
+            status_out: Array de STATUS_FIELDS destino
+            retries: Intentos si el escritor pisa el slot durante la copia
+
+        Returns:
+            True si se copió una instantánea completa
+        """
+        header = self.header
+        for _ in range(retries):
+            front = int(header[HEADER_FRONT])
+            sequence = int(header[HEADER_SEQUENCE + front])
+            if sequence == 0:
+                return False  # Todavía no se publicó nada
+            if sequence & 1:
+                continue
+            np.copyto(cars_out, self.cars[front])
+            np.copyto(status_out, self.status[front])
+            if int(header[HEADER_SEQUENCE + front]) == sequence:
+                return True
+        return False
+
+    def set_keys(self, mask):
+        """Publica las flechas presionadas por el jugador (máscara de replay.encode_keys)"""
+        self.header[HEADER_KEYS] = mask
+
+    def get_keys(self):
+        """Última máscara de teclas publicada por el proceso de dibujo"""
+        return int(self.header[HEADER_KEYS])
+
+    def close(self):
+        """Libera las vistas y el bloque (el creador además lo elimina)"""
+        # Las vistas de NumPy deben soltarse antes de cerrar el bloque
+        self.header = self.cars = self.status = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SimulatedRace:
+    def __init__(self, track, num_opponents):
+        """
+        Carrera de Game sin dibujo: jugador (Car) y oponentes en lote (CarBatch)
+
+        Args:
+            track: Objeto Track
+            num_opponents: Cantidad de oponentes
+        """
+        self.track = track
+        self.player_car = Car(0, 0, (0, 0, 0), is_player=True)
+        self.opponents = CarBatch(num_opponents)
+        self.control_mode = None
+        self.player_controller = None
+        self.opponent_controller = None
+        self.frame = 0
+        self.winner = WINNER_NONE
+
+    def reset(self, control_mode, player_controller, opponent_controller, seed):
+        """
+        Reinicia la carrera en la grilla de salida (igual que Game.reset_race)
+
+        Args:
+            control_mode: 'manual', 'fuzzy' o 'neural'
+            player_controller: Controlador del jugador (None en modo manual)
+            opponent_controller: OpponentController del nivel
+            seed: Semilla de la carrera (azar de los controladores)
+        """
+        grid = self.track.get_grid_positions(self.opponents.num_cars + 1)
+        x, y, angle = grid[0].tolist()
+        self.player_car.reset(x, y, angle)
+        self.player_car.prev_x = x
+        self.player_car.prev_y = y
+        self.opponents.reset(slice(None), grid[1:, 0], grid[1:, 1], grid[1:, 2])
+
+        self.control_mode = control_mode
+        self.player_controller = player_controller
+        self.opponent_controller = opponent_controller
+        if hasattr(player_controller, 'reset'):
+            player_controller.reset()
+
+        random.seed(seed)
+        self.frame = 0
+        self.winner = WINNER_NONE
+
+    def step(self, keys_mask=0):
+        """
+        Avanza un frame (mismo orden que Game.update_game)
+
+        Args:
+            keys_mask: Flechas presionadas (solo en modo manual)
+        """
+        track = self.track
+        player = self.player_car
+
+        player.update_sensors(track)
+        if self.control_mode == 'manual':
+            player.update_manual(decode_keys(keys_mask))
+        else:
+            steering, throttle = self.player_controller.compute(player)
+            player.update_ai_control(steering, throttle)
+        player.apply_physics()
+
+        opponents = self.opponents
+        opponents.update_sensors(track)
+        opp_steering, opp_throttle = self.opponent_controller.compute_batch(opponents)
+        opponents.update_ai_control(opp_steering, opp_throttle)
+        opponents.apply_physics()
+
+        if track.check_collision(player):
+            player.crashed = True
+            player.speed *= 0.5
+        collision = opponents.check_collision(track)
+        opponents.crashed |= collision
+        opponents.speed = np.where(collision, opponents.speed * 0.5, opponents.speed)
+
+        if track.check_checkpoint(player, player.checkpoint_count, (player.prev_x, player.prev_y)):
+            player.checkpoint_count += 1
+        opponents.check_checkpoints(track)
+
+        # El jugador tiene prioridad en empate (igual que Game)
+        if player.y >= track.finish_line_y:
+            self.winner = WINNER_PLAYER
+        elif opponents.y.max() >= track.finish_line_y:
+            self.winner = WINNER_OPPONENT
+
+        self.frame += 1
+
+    def write_snapshot(self, cars, status, race_id, step_ms, model_version=0):
+        """
+        Escribe el estado actual en un slot del búfer
+
+        Args:
+            cars: Array (1 + oponentes, row_size) destino
+            status: Array de STATUS_FIELDS destino
+            race_id: Carrera a la que pertenece la instantánea
+            step_ms: Duración del último paso en ms
+            model_version: Versión del modelo neuronal en uso (0 = sin modelo)
+        """
+        player = self.player_car
+        cars[0, :SENSOR_COLUMN] = (player.x, player.y, player.angle, player.speed,
+                                   player.checkpoint_count, player.crashed)
+        cars[0, SENSOR_COLUMN:] = player.sensor_distances
+
+        opponents = self.opponents
+        rows = cars[1:]
+        rows[:, 0] = opponents.x
+        rows[:, 1] = opponents.y
+        rows[:, 2] = opponents.angle
+        rows[:, 3] = opponents.speed
+        rows[:, 4] = opponents.checkpoint_count
+        rows[:, 5] = opponents.crashed
+        rows[:, SENSOR_COLUMN:] = opponents.sensor_distances
+
+        status[STATUS_RACE_ID] = race_id
+        status[STATUS_FRAME] = self.frame
+        status[STATUS_WINNER] = self.winner
+        status[STATUS_STEP_MS] = step_ms
+        status[STATUS_MODEL_VERSION] = model_version
+
+
+def _build_player_controller(name):
+    """Construye el controlador del jugador dentro del proceso de simulación"""
+    if name == 'fuzzy':
+        from fuzzy_controller import FuzzyController
+        return FuzzyController()
+    if name == 'neural':
+        import tensorflow as tf
+        # Un hilo: el otro núcleo queda para el proceso de dibujo
+        tf.config.threading.set_intra_op_parallelism_threads(1)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+        from neural_controller import NeuralController
+        return NeuralController()
+    return None
+
+
+def _simulation_main(shm_name, track_config, num_opponents, num_sensors, fps, conn, status_conn):
+    """
+    Bucle del proceso de simulación
+
+    Recibe comandos por conn: ('race', race_id, control_mode, difficulty, seed),
+    ('cache', activar), ('stop_race',) y ('quit',). Entre carreras espera
+    bloqueado. Los controladores se precargan en segundo plano al iniciar y
+    cada uno se avisa por status_conn: ('ready', nombre, segundos, error).
+    """
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+    buffer = SnapshotBuffer(num_opponents + 1, num_sensors, name=shm_name)
+    race = SimulatedRace(Track(**{'width': 1200, 'height': 800, **track_config}), num_opponents)
+    period = 1.0 / fps
+
+    def notify_ready(name):
+        try:
+            preloader.get(name, timeout=0)
+            error = None
+        except Exception as e:
+            error = str(e)
+        status_conn.send(('ready', name, preloader.load_times.get(name), error))
+
+    preloader = ControllerPreloader(on_ready=notify_ready,
+                                    builders={name: partial(_build_player_controller, name)
+                                              for name in CONTROLLER_NAMES})
+    preloader.start()
+    watcher = None  # Recarga en caliente del modelo neuronal (desde la primera carrera neuronal)
+
+    race_id = 0
+    running = False
+    next_step = 0.0
+    try:
+        while True:
+            command = None
+            if not running or conn.poll():
+                command = conn.recv()
+
+            if command is not None:
+                if command[0] == 'quit':
+                    break
+                if command[0] == 'stop_race':
+                    running = False
+                    continue
+                if command[0] == 'cache':
+                    neural = preloader.get('neural')
+                    if command[1]:
+                        neural.enable_cache(quantization_step=0.01, validate_interval=50)
+                    else:
+                        neural.disable_cache()
+                    continue
+                _, race_id, control_mode, difficulty, seed = command
+                controller = None if control_mode == 'manual' else preloader.get(control_mode)
+                if control_mode == 'neural' and watcher is None:
+                    from model_watcher import ModelWatcher
+                    watcher = ModelWatcher(controller.model_path, input_size=controller.input_size)
+                    watcher.start()
+                race.reset(control_mode, controller, OpponentController(difficulty), seed)
+                cars, status = buffer.begin_write()
+                race.write_snapshot(cars, status, race_id, 0.0, watcher.version if watcher else 0)
+                buffer.publish()
+                running = True
+                next_step = time.perf_counter()
+                continue
+
+            # Modelo recargado en segundo plano: se cambia aquí, entre pasos
+            if race.control_mode == 'neural':
+                watcher.poll(race.player_controller)
+
+            start = time.perf_counter()
+            race.step(buffer.get_keys())
+            step_ms = (time.perf_counter() - start) * 1000
+            cars, status = buffer.begin_write()
+            race.write_snapshot(cars, status, race_id, step_ms, watcher.version if watcher else 0)
+            buffer.publish()
+            if race.winner != WINNER_NONE:
+                running = False
+                continue
+
+            # Ritmo fijo; si se atrasó más de un paso no intenta recuperar en ráfaga
+            next_step += period
+            delay = next_step - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -period:
+                next_step = time.perf_counter()
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        buffer.close()
+        conn.close()
+        status_conn.close()
+
+
+class SimulationProcess:
+    def __init__(self, track_config, num_opponents, fps=60, on_ready=None):
+        """
+        Inicializa el proceso de simulación (lado de pygame)
+
+        Para el menú hace las veces de ControllerPreloader (is_ready, get,
+        get_status_text): los controladores se cargan en el proceso hijo.
+
+        Args:
+            track_config: Parámetros de la pista (Track.get_config())
+            num_opponents: Cantidad de oponentes
+            fps: Pasos de simulación por segundo
+            on_ready: Función on_ready(name) llamada cuando el proceso termina de
+                      precargar un controlador (con o sin error)
+        """
+        num_sensors = len(Car(0, 0, (0, 0, 0), is_player=False).sensor_angles)
+        self.fps = fps
+        self.buffer = SnapshotBuffer(num_opponents + 1, num_sensors)
+        self.cars = np.zeros((num_opponents + 1, self.buffer.row_size))
+        self.status = np.zeros(len(STATUS_FIELDS))
+        self.race_id = 0
+        self.frame = -1
+        self.inference_cache = False
+
+        # Estado de la precarga en el proceso hijo
+        self.on_ready = on_ready
+        self.load_times = {}
+        self._errors = {}
+        self._events = {name: threading.Event() for name in CONTROLLER_NAMES}
+
+        # 'spawn': el proceso hijo no hereda la ventana ni los hilos de TensorFlow
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self._status_conn, self._child_status_conn = context.Pipe(duplex=False)
+        self._process = context.Process(target=_simulation_main, name='SimulationProcess', daemon=True,
+                                        args=(self.buffer.name, track_config, num_opponents,
+                                              num_sensors, fps, child_conn, self._child_status_conn))
+        self._listener = threading.Thread(target=self._listen, name='SimulationStatus', daemon=True)
+
+    def start(self):
+        """Inicia el proceso de simulación (y la precarga de sus controladores)"""
+        self._process.start()
+        # Solo el hijo escribe en el canal de estado: al terminar, el lector recibe EOF
+        self._child_status_conn.close()
+        self._listener.start()
+        print(f"✓ Simulación en proceso aparte (pid {self._process.pid}, {self.fps} pasos/s)")
+
+    def _listen(self):
+        """Hilo: recibe los avisos de precarga del proceso de simulación"""
+        while True:
+            try:
+                _, name, load_time, error = self._status_conn.recv()
+            except (EOFError, OSError):
+                return
+            if error is None:
+                self.load_times[name] = load_time
+            else:
+                self._errors[name] = error
+            self._events[name].set()
+            if self.on_ready is not None:
+                self.on_ready(name)
+
+    def is_ready(self, name):
+        """True si el proceso terminó de cargar el controlador (con o sin error)"""
+        return self._events[name].is_set()
+
+    def get(self, name, timeout=None):
+        """
+        Espera a que el proceso termine de cargar un controlador
+
+        Args:
+            name: 'fuzzy' o 'neural'
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            None (el controlador vive en el proceso de simulación)
+
+        Raises:
+            TimeoutError: Si no terminó de cargar dentro del tiempo indicado
+            RuntimeError: Con el mensaje del error si la carga falló
+        """
+        if not self._events[name].wait(timeout):
+            raise TimeoutError(f"El controlador '{name}' sigue cargando")
+        if name in self._errors:
+            raise RuntimeError(self._errors[name])
+        return None
+
+    def get_status_text(self, name):
+        """Texto corto para el indicador de carga del menú"""
+        if name in self._errors:
+            return "error al cargar"
+        if self.is_ready(name):
+            return f"listo ({self.load_times[name]:.1f}s)"
+        return "cargando..."
+
+    def set_inference_cache(self, enabled):
+        """Activa o desactiva la caché de inferencia de la red en el proceso de simulación"""
+        self.inference_cache = enabled
+        self._conn.send(('cache', enabled))
+
+    def start_race(self, control_mode, difficulty, seed):
+        """
+        Comienza una carrera nueva en el proceso de simulación
+
+        Args:
+            control_mode: 'manual', 'fuzzy' o 'neural'
+            difficulty: Dificultad de los oponentes
+            seed: Semilla de la carrera
+        """
+        self.race_id += 1
+        self.frame = -1
+        self.buffer.set_keys(0)
+        self._conn.send(('race', self.race_id, control_mode, difficulty, seed))
+
+    def stop_race(self):
+        """Detiene la carrera en curso (ej. al volver al menú)"""
+        self._conn.send(('stop_race',))
+
+    def set_keys(self, mask):
+        """Envía las flechas presionadas (modo manual)"""
+        self.buffer.set_keys(mask)
+
+    def poll(self):
+        """
+        Lee la instantánea más reciente en self.cars / self.status
+
+        Returns:
+            Frames que avanzó la carrera actual desde la lectura anterior
+            (0 = nada nuevo, o todavía es una instantánea de la carrera anterior)
+        """
+        if not self.buffer.read(self.cars, self.status):
+            return 0
+        if int(self.status[STATUS_RACE_ID]) != self.race_id:
+            return 0
+        frame = int(self.status[STATUS_FRAME])
+        advanced = frame - self.frame
+        self.frame = frame
+        return max(advanced, 0)
+
+    def close(self):
+        """Detiene el proceso y libera la memoria compartida"""
+        if self._process.is_alive():
+            self._conn.send(('quit',))
+            self._process.join(timeout=2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._conn.close()
+        self._status_conn.close()
+        self.buffer.close()
@@ -0,0 +1,290 @@
+"""
+Telemetría por frame hacia un consumidor local (UDP)
+Game.update_game escribe cada frame (pose, velocidad, sensores, salidas del
+controlador y tiempos de las fases) en un registro binario de tamaño fijo;
+los registros se agrupan en datagramas y se envían por un socket UDP no
+bloqueante. Si el consumidor es lento o no existe, el envío nunca espera:
+los datagramas que el sistema no acepta quedan en una cola acotada que
+descarta los más viejos.
+
+Consumidor de ejemplo: python telemetry.py --listen
+"""
+import argparse
+import socket
+import struct
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9870
+
+# Cabecera de cada datagrama: magia, versión, sensores por auto, registros,
+# número de secuencia (los huecos indican datagramas perdidos) y oponentes
+MAGIC = b'RCTL'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIH')
+
+# Modos del jugador (índice en el registro)
+CONTROL_MODES = ('manual', 'fuzzy', 'neural')
+
+# Fases de PerformanceMonitor incluidas en cada registro (ms); 'frame' es el
+# tiempo total del frame anterior (el actual todavía no terminó)
+TIMING_FIELDS = ('sensores', 'control_jugador', 'control_oponente', 'fisica',
+                 'colisiones', 'checkpoints', 'frame')
+
+# Bit de 'flags' en el registro
+FLAG_CRASHED = 1
+
+# Tamaño máximo de un datagrama (cabe en un paquete de loopback sin fragmentar)
+MAX_DATAGRAM = 8192
+
+
+def record_dtype(num_sensors, num_opponents):
+    """
+    Formato binario de un frame (little-endian, sin relleno)
+
+    Args:
+        num_sensors: Sensores del jugador
+        num_opponents: Oponentes (x, y, ángulo y velocidad de cada uno)
+
+    Returns:
+        numpy.dtype estructurado; el consumidor decodifica con np.frombuffer
+    """
+    return np.dtype([
+        ('frame', '<u4'),
+        ('time', '<f4'),
+        ('mode', 'u1'),
+        ('flags', 'u1'),
+        ('checkpoint', '<u2'),
+        ('x', '<f4'),
+        ('y', '<f4'),
+        ('angle', '<f4'),
+        ('speed', '<f4'),
+        ('steering', '<f4'),
+        ('throttle', '<f4'),
+        ('timings', '<f4', (len(TIMING_FIELDS),)),
+        ('sensors', '<u2', (num_sensors,)),  # px enteros (los rayos avanzan de a 5 px)
+        ('opponents', '<f4', (num_opponents, 4))
+    ])
+
+
+def parse_address(text):
+    """Convierte 'host:puerto' (o solo 'puerto') en una tupla (host, puerto)"""
+    host, sep, port = text.rpartition(':')
+    return (host if sep and host else DEFAULT_HOST), int(port)
+
+
+def decode_datagram(data):
+    """
+    Decodifica un datagrama de TelemetrySender
+
+    Args:
+        data: Bytes recibidos
+
+    Returns:
+        Tupla (secuencia, registros): registros es un array estructurado de
+        record_dtype, uno por frame
+
+    Raises:
+        ValueError: Si el datagrama no es de telemetría o su versión no coincide
+    """
+    if len(data) < HEADER.size:
+        raise ValueError(f"Datagrama demasiado corto ({len(data)} bytes)")
+    magic, version, num_sensors, count, sequence, num_opponents = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Datagrama desconocido (magia {magic!r}, versión {version})")
+    records = np.frombuffer(data, dtype=record_dtype(num_sensors, num_opponents),
+                            count=count, offset=HEADER.size)
+    return sequence, records
+
+
+class TelemetrySender:
+    def __init__(self, address=(DEFAULT_HOST, DEFAULT_PORT), batch_frames=4, queue_size=64):
+        """
+        Emisor de telemetría por UDP
+
+        Args:
+            address: Tupla (host, puerto) del consumidor
+            batch_frames: Frames por datagrama (menos datagramas, un poco más de retardo)
+            queue_size: Datagramas que esperan si el socket no acepta más
+                        (al llenarse se descartan los más viejos)
+        """
+        self.address = address
+        self.batch_frames = batch_frames
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+        # Registros del datagrama en curso (se crean con el primer frame)
+        self.records = None
+        self.count = 0
+        self.mode_codes = {mode: i for i, mode in enumerate(CONTROL_MODES)}
+
+        self.queue = deque(maxlen=queue_size)
+        self.sequence = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def _allocate(self, num_sensors, num_opponents):
+        """Prepara el buffer de registros para la cantidad de sensores y oponentes"""
+        dtype = record_dtype(num_sensors, num_opponents)
+        capacity = max(1, min(self.batch_frames, (MAX_DATAGRAM - HEADER.size) // dtype.itemsize))
+        self.records = np.zeros(capacity, dtype=dtype)
+        self.count = 0
+
+    def record(self, frame, race_time, mode, car, steering, throttle, opponents, timings, frame_ms):
+        """
+        Agrega un frame al datagrama en curso (se envía al completar el lote)
+
+        Args:
+            frame: Número de frame
+            race_time: Tiempo de carrera en segundos
+            mode: Modo del jugador ('manual', 'fuzzy', 'neural')
+            car: Car del jugador
+            steering, throttle: Salidas del controlador (o equivalentes de las teclas)
+            opponents: CarBatch de los oponentes
+            timings: Tiempos de las fases del frame en curso (PerformanceMonitor.current_frame)
+            frame_ms: Tiempo total del frame anterior
+        """
+        num_sensors = len(car.sensor_distances)
+        if (self.records is None or self.records.dtype['sensors'].shape[0] != num_sensors
+                or self.records.dtype['opponents'].shape[0] != opponents.num_cars):
+            self.flush()
+            self._allocate(num_sensors, opponents.num_cars)
+
+        row = self.records[self.count]
+        row['frame'] = frame
+        row['time'] = race_time
+        row['mode'] = self.mode_codes.get(mode, 0)
+        row['flags'] = FLAG_CRASHED if car.crashed else 0
+        row['checkpoint'] = car.checkpoint_count
+        row['x'] = car.x
+        row['y'] = car.y
+        row['angle'] = car.angle
+        row['speed'] = car.speed
+        row['steering'] = steering
+        row['throttle'] = throttle
+
+        row_timings = row['timings']
+        for i, name in enumerate(TIMING_FIELDS[:-1]):
+            row_timings[i] = timings.get(name, 0.0)
+        row_timings[-1] = frame_ms
+
+        row['sensors'] = car.sensor_distances
+        row_opponents = row['opponents']
+        row_opponents[:, 0] = opponents.x
+        row_opponents[:, 1] = opponents.y
+        row_opponents[:, 2] = opponents.angle
+        row_opponents[:, 3] = opponents.speed
+
+        self.count += 1
+        if self.count == len(self.records):
+            self.flush()
+
+    def flush(self):
+        """Empaqueta los frames pendientes en un datagrama e intenta enviar la cola"""
+        if self.count:
+            dtype = self.records.dtype
+            header = HEADER.pack(MAGIC, VERSION, dtype['sensors'].shape[0], self.count,
+                                 self.sequence & 0xFFFFFFFF, dtype['opponents'].shape[0])
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1  # deque descarta el más viejo al agregar
+            self.queue.append(header + self.records[:self.count].tobytes())
+            self.sequence += 1
+            self.count = 0
+        self._send_queued()
+
+    def _send_queued(self):
+        """Envía lo que el socket acepte sin bloquear; el resto espera al próximo lote"""
+        queue = self.queue
+        while queue:
+            try:
+                self.sock.sendto(queue[0], self.address)
+            except BlockingIOError:
+                return  # Buffer del sistema lleno: reintentar con el próximo datagrama
+            except OSError:
+                # Consumidor inalcanzable u otro error: no vale la pena reintentar
+                self.dropped += 1
+            else:
+                self.sent += 1
+            queue.popleft()
+
+    def get_status_text(self):
+        """Resumen para el overlay de rendimiento"""
+        return (f"{self.address[0]}:{self.address[1]}, {self.sent} enviados, "
+                f"{self.dropped} descartados, {len(self.queue)} en cola")
+
+    def close(self):
+        """Envía lo pendiente (sin esperar) y cierra el socket"""
+        self.flush()
+        self.sock.close()
+        print(f"📡 Telemetría: {self.sent} datagramas enviados, {self.dropped} descartados")
+
+
+def listen(address, duration=None):
+    """
+    Consumidor de ejemplo: imprime un resumen por segundo de la telemetría
+
+    Args:
+        address: Tupla (host, puerto) donde escuchar
+        duration: Segundos de escucha (None = hasta Ctrl+C)
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(address)
+    sock.settimeout(0.5)
+    print(f"📡 Escuchando telemetría en {address[0]}:{address[1]} (Ctrl+C para salir)")
+
+    start = last_report = time.perf_counter()
+    expected = None
+    datagrams = frames = lost = 0
+    last = None
+    try:
+        while duration is None or time.perf_counter() - start < duration:
+            try:
+                data = sock.recv(65535)
+            except socket.timeout:
+                data = None
+
+            if data is not None:
+                try:
+                    sequence, records = decode_datagram(data)
+                except ValueError as e:
+                    print(f"⚠ {e}")
+                    continue
+                if expected is not None and sequence > expected:
+                    lost += sequence - expected
+                expected = sequence + 1
+                datagrams += 1
+                frames += len(records)
+                if len(records):
+                    last = records[-1]
+
+            now = time.perf_counter()
+            if now - last_report >= 1.0 and frames:
+                elapsed = now - last_report
+                timings = ", ".join(f"{name} {value:.2f}" for name, value in zip(TIMING_FIELDS, last['timings']))
+                print(f"frame {last['frame']:>6} t={last['time']:6.2f}s {CONTROL_MODES[last['mode']]:<7}"
+                      f" pos=({last['x']:.0f}, {last['y']:.0f}) vel={last['speed']:.2f}"
+                      f" dir={last['steering']:+.2f} acel={last['throttle']:+.2f}"
+                      f" sensor mín={last['sensors'].min()}{' CHOQUE' if last['flags'] & FLAG_CRASHED else ''}")
+                print(f"   {frames / elapsed:.0f} frames/s en {datagrams / elapsed:.0f} datagramas/s,"
+                      f" {lost} perdidos | ms: {timings}")
+                last_report = now
+                datagrams = frames = 0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consumidor de ejemplo de la telemetría del juego")
+    parser.add_argument('--listen', nargs='?', const=f"{DEFAULT_HOST}:{DEFAULT_PORT}",
+                        default=f"{DEFAULT_HOST}:{DEFAULT_PORT}", metavar='HOST:PUERTO',
+                        help=f"Dirección donde escuchar (por defecto {DEFAULT_HOST}:{DEFAULT_PORT})")
+    parser.add_argument('--duration', type=float, default=None, help="Segundos de escucha")
+    args = parser.parse_args()
+    sys.exit(listen(parse_address(args.listen), args.duration))
@@ -0,0 +1,211 @@
+"""
+Torneo sin ventana - Compara controladores contra los niveles del oponente
+Ejecuta miles de carreras en paralelo con un pool de procesos y agrega
+victorias, tiempos de llegada, choques y parciales por checkpoint
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from opponent_controller import OpponentController
+from race_simulator import RaceSimulator, ManualBaselineController, create_default_track
+
+CONTROLLERS = ('manual', 'fuzzy', 'neural')
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# Estado por proceso: los controladores se crean una sola vez por worker
+_worker_state = {}
+
+
+def _init_worker(max_time):
+    """Inicializa un worker del pool (pista y caché de controladores)"""
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+    _worker_state['track'] = create_default_track()
+    _worker_state['max_time'] = max_time
+    _worker_state['controllers'] = {}
+    _worker_state['simulators'] = {}
+
+
+def _get_player_controller(name):
+    """Crea (o reutiliza) el controlador del jugador dentro del worker"""
+    controllers = _worker_state['controllers']
+    if name not in controllers:
+        if name == 'manual':
+            controllers[name] = ManualBaselineController()
+        elif name == 'fuzzy':
+            from fuzzy_controller import FuzzyController
+            controllers[name] = FuzzyController()
+        elif name == 'neural':
+            import tensorflow as tf
+            # Un hilo por worker: el paralelismo viene del pool de procesos
+            tf.config.threading.set_intra_op_parallelism_threads(1)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+            from neural_controller import NeuralController
+            controllers[name] = NeuralController()
+        else:
+            raise ValueError(f"Controlador desconocido: {name}")
+    return controllers[name]
+
+
+def run_race(task):
+    """
+    Ejecuta una carrera dentro de un worker
+
+    Args:
+        task: Tupla (controller_name, difficulty, seed)
+
+    Returns:
+        Diccionario con el resultado de la carrera
+    """
+    controller_name, difficulty, seed = task
+    key = (controller_name, difficulty)
+
+    simulators = _worker_state['simulators']
+    if key not in simulators:
+        player = _get_player_controller(controller_name)
+        opponent = OpponentController(difficulty=difficulty)
+        simulators[key] = RaceSimulator(_worker_state['track'], [player, opponent],
+                                        max_time=_worker_state['max_time'])
+
+    result = simulators[key].run(seed)
+    result['controller'] = controller_name
+    result['difficulty'] = difficulty
+    return result
+
+
+def aggregate_results(results, num_checkpoints):
+    """
+    Agrega resultados por enfrentamiento (controlador vs dificultad)
+
+    Returns:
+        Lista de diccionarios con estadísticas por enfrentamiento
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault((result['controller'], result['difficulty']), []).append(result)
+
+    summary = []
+    for (controller_name, difficulty), races in sorted(groups.items()):
+        wins = sum(1 for r in races if r['winner'] == 0)
+        finish_times = [r['finish_times'][0] for r in races if r['finish_times'][0] is not None]
+        crashes = [r['crashes'][0] for r in races]
+
+        # Parciales medios por checkpoint (solo carreras que lo alcanzaron)
+        splits = []
+        for cp in range(num_checkpoints):
+            times = [r['splits'][0][cp] for r in races if len(r['splits'][0]) > cp]
+            splits.append(float(np.mean(times)) if times else None)
+
+        summary.append({
+            'controller': controller_name,
+            'difficulty': difficulty,
+            'races': len(races),
+            'win_rate': wins / len(races),
+            'finished': len(finish_times),
+            'finish_time_mean': float(np.mean(finish_times)) if finish_times else None,
+            'finish_time_p95': float(np.percentile(finish_times, 95)) if finish_times else None,
+            'crashes_mean': float(np.mean(crashes)),
+            'splits_mean': splits
+        })
+    return summary
+
+
+def print_summary(summary):
+    """Imprime la tabla de resultados"""
+    print("\n" + "=" * 84)
+    print(f"{'Controlador':<12}{'Dificultad':<12}{'Carreras':>9}{'Victorias':>11}"
+          f"{'T. meta':>10}{'T. p95':>9}{'Choques':>9}  Parciales")
+    print("-" * 84)
+    for row in summary:
+        t_mean = f"{row['finish_time_mean']:.2f}s" if row['finish_time_mean'] is not None else "-"
+        t_p95 = f"{row['finish_time_p95']:.2f}s" if row['finish_time_p95'] is not None else "-"
+        splits = " ".join("-" if s is None else f"{s:.1f}" for s in row['splits_mean'])
+        print(f"{row['controller']:<12}{row['difficulty']:<12}{row['races']:>9}"
+              f"{row['win_rate'] * 100:>10.1f}%{t_mean:>10}{t_p95:>9}{row['crashes_mean']:>9.2f}  {splits}")
+    print("=" * 84)
+
+
+def save_summary(summary, results, output_dir='tournament_results'):
+    """Guarda el resumen (CSV) y los resultados completos (JSON)"""
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    csv_path = os.path.join(output_dir, f"tournament_{timestamp}.csv")
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['controller', 'difficulty', 'races', 'win_rate', 'finished',
+                         'finish_time_mean', 'finish_time_p95', 'crashes_mean', 'splits_mean'])
+        for row in summary:
+            writer.writerow([row['controller'], row['difficulty'], row['races'], row['win_rate'],
+                             row['finished'], row['finish_time_mean'], row['finish_time_p95'],
+                             row['crashes_mean'], ' '.join(str(s) for s in row['splits_mean'])])
+
+    json_path = os.path.join(output_dir, f"tournament_{timestamp}.json")
+    with open(json_path, 'w') as f:
+        json.dump({'summary': summary, 'races': results}, f)
+
+    print(f"✓ Resumen guardado en {csv_path}")
+    print(f"✓ Resultados completos guardados en {json_path}")
+
+
+def run_tournament(controllers=CONTROLLERS, difficulties=DIFFICULTIES, races_per_matchup=100,
+                   base_seed=0, workers=None, max_time=60.0, save=True):
+    """
+    Ejecuta el torneo completo en un pool de procesos
+
+    Args:
+        controllers: Controladores del jugador a evaluar
+        difficulties: Dificultades del oponente
+        races_per_matchup: Carreras por enfrentamiento (cada una con su semilla)
+        base_seed: Semilla inicial
+        workers: Número de procesos (None = todos los núcleos)
+        max_time: Tiempo máximo por carrera en segundos
+        save: Guardar resultados en tournament_results/
+
+    Returns:
+        Lista con el resumen por enfrentamiento
+    """
+    # Agrupar tareas por controlador para que cada worker reutilice su simulador
+    tasks = [(c, d, base_seed + i)
+             for c in controllers for d in difficulties for i in range(races_per_matchup)]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 8))
+
+    print(f"🏁 Torneo: {len(tasks)} carreras en {workers} procesos")
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(max_time,)) as pool:
+        results = list(pool.map(run_race, tasks, chunksize=chunksize))
+
+    elapsed = time.perf_counter() - start
+    print(f"✓ {len(results)} carreras en {elapsed:.1f}s ({len(results) / elapsed:.1f} carreras/s)")
+
+    summary = aggregate_results(results, len(create_default_track().checkpoints))
+    print_summary(summary)
+
+    if save:
+        save_summary(summary, results)
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Torneo headless de controladores")
+    parser.add_argument('--controllers', nargs='+', default=list(CONTROLLERS), choices=CONTROLLERS)
+    parser.add_argument('--difficulties', nargs='+', default=list(DIFFICULTIES), choices=DIFFICULTIES)
+    parser.add_argument('--races', type=int, default=100, help="Carreras por enfrentamiento")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla inicial")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (por defecto: todos los núcleos)")
+    parser.add_argument('--max-time', type=float, default=60.0, help="Tiempo máximo por carrera (s)")
+    args = parser.parse_args()
+
+    run_tournament(controllers=args.controllers, difficulties=args.difficulties,
+                   races_per_matchup=args.races, base_seed=args.seed,
+                   workers=args.workers, max_time=args.max_time)
@@ -1,30 +1,57 @@
 """
-Clase Track - Representa la pista de carreras recta de 2 carriles
+Clase Track - Representa la pista de carreras recta (2 carriles por defecto)
 """
 import pygame
 import math
+from collections import OrderedDict
+
+import numpy as np
+
+# Grilla de salida
+MAX_LANE_WIDTH = 100  # Ancho estándar de carril
+MIN_LANE_WIDTH = 50   # Carril más angosto que admite un auto (40 px de ancho)
+GRID_SPACING = 70     # Separación entre filas de la grilla (auto de 60 px de largo)
+
+# Dibujo por franjas (chunks) para pistas más largas que la ventana
+CHUNK_HEIGHT = 256    # Alto de cada franja rasterizada
+MAX_CHUNKS = 8        # Franjas en caché (LRU): memoria acotada sin importar el largo
+
 
 class Track:
-    def __init__(self, width, height):
+    def __init__(self, width, height, num_lanes=2, grid_rows=1, lane_width=MAX_LANE_WIDTH,
+                 grid_spacing=GRID_SPACING, track_length=None, chunk_height=CHUNK_HEIGHT,
+                 max_chunks=MAX_CHUNKS):
         """
-        Inicializa la pista recta de 2 carriles
+        Inicializa la pista recta
         
         Args:
             width: Ancho de la ventana
             height: Alto de la ventana
+            num_lanes: Cantidad de carriles
+            grid_rows: Filas de la grilla de salida (detrás de la línea de inicio)
+            lane_width: Ancho de cada carril
+            grid_spacing: Separación vertical entre filas de la grilla
+            track_length: Largo de la pista (None = alto de la ventana - 100)
+            chunk_height: Alto de cada franja rasterizada al dibujar
+            max_chunks: Franjas que se conservan en caché
         """
         self.width = width
         self.height = height
         
-        # Pista recta vertical de 2 carriles
-        self.track_width = 200  # Ancho total de la pista (2 carriles)
-        self.lane_width = self.track_width // 2  # Ancho de cada carril
-        self.track_length = height - 100  # Largo de la pista
+        # Pista recta vertical de varios carriles
+        self.num_lanes = num_lanes
+        self.lane_width = lane_width  # Ancho de cada carril
+        self.track_width = lane_width * num_lanes  # Ancho total de la pista
+        self.track_length = track_length if track_length is not None else height - 100
         
         # Posición de la pista (centrada horizontalmente)
         self.track_x = (width - self.track_width) // 2
         self.track_y = 50
         
+        # Grilla de salida: cada fila extra retrasa la línea de inicio
+        self.grid_rows = grid_rows
+        self.grid_spacing = grid_spacing
+        
         # Colores
         self.grass_color = (34, 139, 34)
         self.track_color = (70, 70, 70)
@@ -32,14 +59,74 @@ class Track:
         self.finish_line_color = (255, 215, 0)  # Dorado
         
         # Línea de inicio (parte superior)
-        self.start_line_y = self.track_y + 30
+        self.start_line_y = self.track_y + 30 + (grid_rows - 1) * grid_spacing
         
         # Línea de meta (parte inferior)
         self.finish_line_y = self.track_y + self.track_length - 30
+        if self.start_line_y >= self.finish_line_y:
+            raise ValueError(f"La grilla de {grid_rows} filas no cabe en una pista de {self.track_length} px")
+        
+        # Alto total del mundo (pasto incluido); igual a la ventana con el largo por defecto
+        self.world_height = self.track_y + self.track_length + 50
         
         # Checkpoints para detectar progreso
         self.checkpoints = self.create_checkpoints()
         
+        # Caché LRU de franjas rasterizadas (índice de franja -> Surface)
+        self.chunk_height = chunk_height
+        self.max_chunks = max_chunks
+        self._chunks = OrderedDict()
+        self.chunk_scale = 1.0
+        self.chunks_rendered = 0
+        self._fonts = None
+        self._arrow_sprites = {}
+        
+        # Elementos decorativos (flechas y líneas de carril); el gobernador de calidad los apaga
+        self.decorations = True
+    
+    @classmethod
+    def for_grid(cls, width, height, num_cars, num_lanes=None, track_length=None):
+        """
+        Crea una pista con grilla de salida para una cantidad de autos
+        
+        Sin num_lanes se usan las menos filas posibles: tantos carriles como
+        quepan en la ventana (con carriles de al menos MIN_LANE_WIDTH).
+        Con 2 autos resulta la pista clásica de 2 carriles.
+        
+        Args:
+            width: Ancho de la ventana
+            height: Alto de la ventana
+            num_cars: Autos en la carrera (jugador + oponentes)
+            num_lanes: Cantidad de carriles (None = automática)
+            track_length: Largo de la pista (None = alto de la ventana - 100)
+            
+        Returns:
+            Objeto Track
+        """
+        usable_width = width - 100
+        if num_lanes is None:
+            max_lanes = usable_width // MIN_LANE_WIDTH
+            rows = math.ceil(num_cars / max_lanes)
+            num_lanes = max(2, math.ceil(num_cars / rows))
+        grid_rows = max(1, math.ceil(num_cars / num_lanes))
+        lane_width = min(MAX_LANE_WIDTH, usable_width // num_lanes)
+        if lane_width < MIN_LANE_WIDTH:
+            raise ValueError(f"{num_lanes} carriles no caben en una ventana de {width} px")
+        return cls(width, height, num_lanes=num_lanes, grid_rows=grid_rows, lane_width=lane_width,
+                   track_length=track_length)
+    
+    def get_config(self):
+        """Parámetros para reconstruir la pista (ej. en una repetición)"""
+        return {
+            'width': self.width,
+            'height': self.height,
+            'num_lanes': self.num_lanes,
+            'grid_rows': self.grid_rows,
+            'lane_width': self.lane_width,
+            'grid_spacing': self.grid_spacing,
+            'track_length': self.track_length
+        }
+        
     def create_checkpoints(self):
         """Crea puntos de control en la pista recta"""
         checkpoints = []
@@ -75,6 +162,20 @@ class Track:
         
         return in_x and in_y
     
+    def is_on_track_array(self, xs, ys):
+        """
+        Versión vectorizada de is_on_track para arrays de puntos
+        
+        Args:
+            xs: Array de coordenadas X
+            ys: Array de coordenadas Y (misma forma que xs)
+            
+        Returns:
+            Array booleano con la misma forma
+        """
+        return ((xs >= self.track_x) & (xs <= self.track_x + self.track_width) &
+                (ys >= self.track_y) & (ys <= self.track_y + self.track_length))
+    
     def check_collision(self, car):
         """
         Verifica si un auto colisionó con el borde de la pista
@@ -148,12 +249,50 @@ class Track:
         
         return False
     
-    def get_start_position(self, lane=0):
+    def check_checkpoint_array(self, xs, ys, prev_xs, prev_ys, checkpoint_indices):
+        """
+        Versión vectorizada de check_checkpoint (con posición previa) para varios autos
+        
+        Args:
+            xs, ys: Posiciones actuales
+            prev_xs, prev_ys: Posiciones del frame anterior
+            checkpoint_indices: Índice del siguiente checkpoint de cada auto
+            
+        Returns:
+            Array booleano: True para los autos que cruzaron su checkpoint
+        """
+        tolerance = 25
+        checkpoint_indices = np.asarray(checkpoint_indices)
+        valid = checkpoint_indices < len(self.checkpoints)
+        if not self.checkpoints:
+            return valid
+        
+        # Tabla de checkpoints: x1, y1, x2, y2, vertical
+        table = np.array([(x1, y1, x2, y2, orientation != 'horizontal')
+                          for x1, y1, x2, y2, orientation in self.checkpoints], dtype=np.float64)
+        cp = table[np.minimum(checkpoint_indices, len(self.checkpoints) - 1)]
+        x1, y1, x2, y2, vertical = cp[:, 0], cp[:, 1], cp[:, 2], cp[:, 3], cp[:, 4] > 0
+        
+        # Horizontal: dentro del rango X y cruce de la línea Y
+        in_x = (np.minimum(x1, x2) - tolerance <= xs) & (xs <= np.maximum(x1, x2) + tolerance)
+        cross_y = (((prev_ys < y1 - tolerance) & (ys >= y1 - tolerance)) |
+                   ((prev_ys > y1 + tolerance) & (ys <= y1 + tolerance)))
+        
+        # Vertical: dentro del rango Y y cruce de la línea X
+        in_y = (np.minimum(y1, y2) - tolerance <= ys) & (ys <= np.maximum(y1, y2) + tolerance)
+        cross_x = (((prev_xs < x1 - tolerance) & (xs >= x1 - tolerance)) |
+                   ((prev_xs > x1 + tolerance) & (xs <= x1 + tolerance)))
+        
+        crossed = np.where(vertical, in_y & cross_x, in_x & cross_y)
+        return valid & crossed
+    
+    def get_start_position(self, lane=0, row=0):
         """
         Obtiene la posición inicial para un auto
         
         Args:
-            lane: Carril (0 para jugador izquierdo, 1 para oponente derecho)
+            lane: Carril (0 = izquierdo)
+            row: Fila de la grilla (0 = primera fila, junto a la línea de inicio)
             
         Returns:
             Tupla (x, y, angle)
@@ -161,92 +300,227 @@ class Track:
         # X: Centrado en cada carril
         x = self.track_x + (self.lane_width // 2) + (lane * self.lane_width)
         
-        # Y: Justo después de la línea de inicio
-        y = self.start_line_y + 10
+        # Y: Justo después de la línea de inicio, las filas siguientes más atrás
+        y = self.start_line_y + 10 - row * self.grid_spacing
         
         # Ángulo: 180 grados = mirando hacia abajo (sur)
         angle = 180
         
         return (x, y, angle)
     
-    def draw(self, screen):
-        """Dibuja la pista recta en la pantalla"""
+    def get_grid_positions(self, num_cars):
+        """
+        Posiciones de salida de varios autos, llenando cada fila de izquierda a derecha
+        
+        Args:
+            num_cars: Cantidad de autos
+            
+        Returns:
+            Array (num_cars, 3) con x, y, ángulo
+        """
+        slots = np.arange(num_cars)
+        rows = slots // self.num_lanes
+        if num_cars and rows[-1] >= self.grid_rows:
+            raise ValueError(f"La grilla tiene lugar para {self.num_lanes * self.grid_rows} autos, no {num_cars}")
+        positions = np.empty((num_cars, 3))
+        positions[:, 0] = self.track_x + (self.lane_width // 2) + (slots % self.num_lanes) * self.lane_width
+        positions[:, 1] = self.start_line_y + 10 - rows * self.grid_spacing
+        positions[:, 2] = 180
+        return positions
+    
+    def draw(self, screen, camera=None):
+        """
+        Dibuja la parte visible de la pista
+        
+        La pista se rasteriza por franjas horizontales la primera vez que se
+        necesitan (y una franja antes de que entre en la vista); las franjas
+        que dejan de usarse salen de la caché LRU.
+        
+        Args:
+            screen: Superficie de pygame
+            camera: Camera con el desplazamiento de la vista (None = sin desplazamiento)
+        """
+        offset_y = camera.offset_y if camera is not None else 0
+        view_height = camera.viewport_height if camera is not None else screen.get_height()
+        scale = camera.scale if camera is not None else 1.0
+        if scale != self.chunk_scale:
+            # Las franjas en caché son de otra escala
+            self.chunk_scale = scale
+            self.clear_chunks()
+        
+        first = max(0, offset_y // self.chunk_height)
+        last = (offset_y + view_height - 1) // self.chunk_height
+        
+        top = round(offset_y * scale)
+        for index in range(first, last + 1):
+            screen.blit(self.get_chunk(index), (0, round(index * self.chunk_height * scale) - top))
+        
+        # Prerrasterizar la franja siguiente (los autos avanzan hacia abajo)
+        if (last + 1) * self.chunk_height < self.world_height:
+            self.get_chunk(last + 1)
+    
+    def get_chunk(self, index):
+        """
+        Franja rasterizada de la pista (desde la caché o recién dibujada)
+        
+        Args:
+            index: Índice de la franja (y del mundo / chunk_height)
+            
+        Returns:
+            Surface de width x chunk_height (por chunk_scale)
+        """
+        chunk = self._chunks.get(index)
+        if chunk is not None:
+            self._chunks.move_to_end(index)
+            return chunk
+        
+        chunk = pygame.Surface((self.width, self.chunk_height))
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert()
+        self.rasterize(chunk, index * self.chunk_height)
+        self.chunks_rendered += 1
+        
+        # Resolución interna reducida: se escala una vez al rasterizar (los bordes
+        # se redondean igual que en draw para que no queden huecos entre franjas)
+        if self.chunk_scale != 1.0:
+            top = round(index * self.chunk_height * self.chunk_scale)
+            bottom = round((index + 1) * self.chunk_height * self.chunk_scale)
+            chunk = pygame.transform.smoothscale(chunk, (round(self.width * self.chunk_scale), bottom - top))
+        
+        self._chunks[index] = chunk
+        if len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+        return chunk
+    
+    def set_decorations(self, enabled):
+        """
+        Activa o desactiva los elementos decorativos (vuelve a rasterizar si cambia)
+        
+        Args:
+            enabled: True para dibujar flechas y líneas de carril
+        """
+        if enabled != self.decorations:
+            self.decorations = enabled
+            self.clear_chunks()
+    
+    def clear_chunks(self):
+        """Vacía la caché de franjas (ej. tras cambiar colores)"""
+        self._chunks.clear()
+    
+    def get_chunk_stats(self):
+        """
+        Estadísticas de la caché de franjas
+        
+        Returns:
+            Diccionario con franjas en caché, máximo, rasterizadas y memoria en bytes
+        """
+        memory = sum(chunk.get_bytesize() * chunk.get_width() * chunk.get_height()
+                     for chunk in self._chunks.values())
+        return {
+            'cached': len(self._chunks),
+            'max_chunks': self.max_chunks,
+            'rendered': self.chunks_rendered,
+            'memory_bytes': memory
+        }
+    
+    def rasterize(self, surface, top):
+        """
+        Dibuja la franja del mundo que empieza en y=top (pygame recorta lo que sobra)
+        
+        Args:
+            surface: Superficie destino
+            top: Coordenada Y del mundo que corresponde a la fila 0 de la superficie
+        """
+        bottom = top + surface.get_height()
+        if self._fonts is None:
+            self._fonts = (pygame.font.Font(None, 32), pygame.font.Font(None, 48))
+        font_start, font_finish = self._fonts
+        
         # Fondo de pasto
-        screen.fill(self.grass_color)
+        surface.fill(self.grass_color)
         
         # Pista principal
-        track_rect = pygame.Rect(self.track_x, self.track_y, self.track_width, self.track_length)
-        pygame.draw.rect(screen, self.track_color, track_rect)
+        track_rect = pygame.Rect(self.track_x, self.track_y - top, self.track_width, self.track_length)
+        pygame.draw.rect(surface, self.track_color, track_rect)
         
         # Bordes de la pista (blancos)
-        pygame.draw.rect(screen, self.line_color, track_rect, 4)
+        pygame.draw.rect(surface, self.line_color, track_rect, 4)
         
-        # Línea central divisoria de carriles (discontinua)
+        # Líneas divisorias de carriles (discontinuas), solo las de esta franja
         dash_length = 30
         gap_length = 20
-        center_x = self.track_x + self.lane_width
-        
-        y = self.track_y
-        while y < self.track_y + self.track_length:
-            end_y = min(y + dash_length, self.track_y + self.track_length)
-            pygame.draw.line(screen, self.line_color, (center_x, y), (center_x, end_y), 3)
-            y += dash_length + gap_length
+        period = dash_length + gap_length
+        track_end = self.track_y + self.track_length
+        first_dash = self.track_y + max(0, (top - self.track_y - dash_length) // period) * period
+        for lane in range(1, self.num_lanes if self.decorations else 1):
+            center_x = self.track_x + lane * self.lane_width
+            
+            y = first_dash
+            while y < min(track_end, bottom):
+                end_y = min(y + dash_length, track_end)
+                pygame.draw.line(surface, self.line_color, (center_x, y - top), (center_x, end_y - top), 3)
+                y += period
         
         # Línea de INICIO (patrón de cuadros blanco/negro)
-        checker_size = 10
-        for i in range(self.track_width // checker_size):
-            for j in range(4):  # 4 filas de cuadros
-                x = self.track_x + (i * checker_size)
-                y = self.start_line_y - 20 + (j * checker_size)
-                color = (255, 255, 255) if (i + j) % 2 == 0 else (0, 0, 0)
-                pygame.draw.rect(screen, color, (x, y, checker_size, checker_size))
-        
-        # Texto "INICIO"
-        font_start = pygame.font.Font(None, 32)
-        text_start = font_start.render("INICIO", True, (255, 255, 255))
-        text_rect = text_start.get_rect(center=(self.track_x + self.track_width // 2, self.start_line_y - 40))
-        # Fondo oscuro
-        bg_rect = text_rect.inflate(20, 10)
-        pygame.draw.rect(screen, (50, 50, 50), bg_rect)
-        pygame.draw.rect(screen, (255, 255, 255), bg_rect, 2)
-        screen.blit(text_start, text_rect)
+        if top - 60 <= self.start_line_y <= bottom + 60:
+            checker_size = 10
+            for i in range(self.track_width // checker_size):
+                for j in range(4):  # 4 filas de cuadros
+                    x = self.track_x + (i * checker_size)
+                    y = self.start_line_y - 20 + (j * checker_size) - top
+                    color = (255, 255, 255) if (i + j) % 2 == 0 else (0, 0, 0)
+                    pygame.draw.rect(surface, color, (x, y, checker_size, checker_size))
+            
+            # Texto "INICIO"
+            text_start = font_start.render("INICIO", True, (255, 255, 255))
+            text_rect = text_start.get_rect(center=(self.track_x + self.track_width // 2, self.start_line_y - 40 - top))
+            # Fondo oscuro
+            bg_rect = text_rect.inflate(20, 10)
+            pygame.draw.rect(surface, (50, 50, 50), bg_rect)
+            pygame.draw.rect(surface, (255, 255, 255), bg_rect, 2)
+            surface.blit(text_start, text_rect)
         
         # Línea de META (patrón de cuadros blanco/negro - más grande y dorado)
-        checker_size_finish = 15
-        for i in range(self.track_width // checker_size_finish + 1):
-            for j in range(4):  # 4 filas de cuadros
-                x = self.track_x + (i * checker_size_finish)
-                y = self.finish_line_y - 30 + (j * checker_size_finish)
-                if x < self.track_x + self.track_width:
-                    color = self.finish_line_color if (i + j) % 2 == 0 else (0, 0, 0)
-                    pygame.draw.rect(screen, color, (x, y, checker_size_finish, checker_size_finish))
-        
-        # Texto "META"
-        font_finish = pygame.font.Font(None, 48)
-        text_finish = font_finish.render("META", True, self.finish_line_color)
-        text_rect_finish = text_finish.get_rect(center=(self.track_x + self.track_width // 2, self.finish_line_y + 40))
-        # Fondo oscuro
-        bg_rect_finish = text_rect_finish.inflate(30, 15)
-        pygame.draw.rect(screen, (50, 50, 50), bg_rect_finish)
-        pygame.draw.rect(screen, self.finish_line_color, bg_rect_finish, 3)
-        screen.blit(text_finish, text_rect_finish)
+        if top - 80 <= self.finish_line_y <= bottom + 60:
+            checker_size_finish = 15
+            for i in range(self.track_width // checker_size_finish + 1):
+                for j in range(4):  # 4 filas de cuadros
+                    x = self.track_x + (i * checker_size_finish)
+                    y = self.finish_line_y - 30 + (j * checker_size_finish) - top
+                    if x < self.track_x + self.track_width:
+                        color = self.finish_line_color if (i + j) % 2 == 0 else (0, 0, 0)
+                        pygame.draw.rect(surface, color, (x, y, checker_size_finish, checker_size_finish))
+            
+            # Texto "META"
+            text_finish = font_finish.render("META", True, self.finish_line_color)
+            text_rect_finish = text_finish.get_rect(center=(self.track_x + self.track_width // 2, self.finish_line_y + 40 - top))
+            # Fondo oscuro
+            bg_rect_finish = text_rect_finish.inflate(30, 15)
+            pygame.draw.rect(surface, (50, 50, 50), bg_rect_finish)
+            pygame.draw.rect(surface, self.finish_line_color, bg_rect_finish, 3)
+            surface.blit(text_finish, text_rect_finish)
         
         # Flechas indicadoras de dirección (hacia abajo)
         arrow_color = (255, 255, 100)
         arrow_size = 30
         
-        # Dibujar 3 flechas espaciadas
-        for i in range(3):
-            y_arrow = self.track_y + 150 + (i * 150)
-            if y_arrow < self.finish_line_y - 100:
-                # Flecha en carril izquierdo
-                self.draw_arrow(screen, self.track_x + self.lane_width // 2, y_arrow, 180, arrow_size, arrow_color)
-                # Flecha en carril derecho
-                self.draw_arrow(screen, self.track_x + self.lane_width + self.lane_width // 2, y_arrow, 180, arrow_size, arrow_color)
+        # Una fila de flechas cada 150 px (después de la línea de inicio), solo las de esta franja
+        arrow_spacing = 150
+        first_arrow = self.track_y + arrow_spacing
+        first_arrow += max(0, (top - arrow_size - first_arrow) // arrow_spacing) * arrow_spacing
+        last_arrow = min(math.ceil(self.finish_line_y - 100), bottom + arrow_size + 1)
+        for y_arrow in range(first_arrow, last_arrow, arrow_spacing):
+            if y_arrow <= self.start_line_y + 50 or not self.decorations:
+                continue
+            # Una flecha por carril
+            sprite, extent = self.get_arrow_sprite(180, arrow_size, arrow_color)
+            for lane in range(self.num_lanes):
+                x_arrow = self.track_x + lane * self.lane_width + self.lane_width // 2
+                surface.blit(sprite, (x_arrow - extent, y_arrow - top - extent))
         
         # Checkpoints visibles (opcionales, para debug)
         # for i, (x1, y1, x2, y2, orientation) in enumerate(self.checkpoints):
-        #     pygame.draw.line(screen, (100, 255, 100), (int(x1), int(y1)), (int(x2), int(y2)), 2)
+        #     pygame.draw.line(surface, (100, 255, 100), (int(x1), int(y1) - top), (int(x2), int(y2) - top), 2)
     
     def draw_arrow(self, screen, x, y, angle, size, color):
         """
@@ -284,3 +558,21 @@ class Track:
         # Dibujar flecha con borde
         pygame.draw.polygon(screen, color, rotated_points)
         pygame.draw.polygon(screen, (0, 0, 0), rotated_points, 2)
+    
+    def get_arrow_sprite(self, angle, size, color):
+        """
+        Flecha dibujada una sola vez en su propia superficie
+        
+        Al copiarla con blit el recorte en el borde de una franja es exacto
+        (el contorno de draw.polygon deja artefactos con vértices fuera de la superficie).
+        
+        Returns:
+            Tupla (superficie, distancia del centro al borde de la superficie)
+        """
+        key = (angle, size, color)
+        if key not in self._arrow_sprites:
+            extent = size + 2  # La punta llega a 'size' del centro, más el borde
+            sprite = pygame.Surface((2 * extent, 2 * extent), pygame.SRCALPHA)
+            self.draw_arrow(sprite, extent, extent, angle, size, color)
+            self._arrow_sprites[key] = (sprite, extent)
+        return self._arrow_sprites[key]
@@ -5,47 +5,189 @@ import numpy as np
 import pandas as pd
 import glob
 from data_generator import DataGenerator, split_data
-from neural_controller import NeuralController
+from neural_controller import NeuralController, configure_threading
+from features import FeatureSpec
+from dataset_preprocessing import preprocess_dataset, DEFAULT_QUANTIZATION_STEP
 import matplotlib.pyplot as plt
+import hashlib
+import json
 import os
+import shutil
+from datetime import datetime
 
-def load_real_data():
-    """Carga datos reales capturados del modo manual"""
-    training_files = glob.glob("training_data/training_data_*.csv")
+MODEL_PATH = 'models/neural_controller.h5'
+MANIFEST_PATH = 'models/training_manifest.json'
+CHECKPOINT_DIR = 'models/checkpoints'
+
+def list_sessions(data_dir="training_data"):
+    """Sesiones grabadas de un directorio, en orden cronológico"""
+    return sorted(glob.glob(os.path.join(data_dir, "training_data_*.csv")))
+
+def load_real_data(data_dir="training_data", files=None, return_files=False):
+    """
+    Carga datos reales capturados del modo manual
+    
+    Args:
+        data_dir: Directorio de sesiones (ej. uno generado por refeaturize.py)
+        files: Lista explícita de sesiones a cargar (por defecto todas las de data_dir)
+        return_files: Devolver también las sesiones cargadas (sin las omitidas por esquema)
+    
+    Returns:
+        Tupla (X, y), o (X, y, sesiones cargadas) con return_files
+    """
+    training_files = list_sessions(data_dir) if files is None else files
+    loaded_files = []
     
     if not training_files:
-        return None, None
+        return (None, None, loaded_files) if return_files else (None, None)
     
     print(f"\n📂 Encontrados {len(training_files)} archivos de entrenamiento:")
     
     all_X = []
     all_y = []
+    spec = None
     
     for filepath in training_files:
         print(f"   - {os.path.basename(filepath)}")
         df = pd.read_csv(filepath)
         
-        # Extraer características (16 sensores + velocidad)
-        X = df.iloc[:, :17].values  # Primeras 17 columnas
+        # Validar el esquema y reordenar al orden canónico [velocity, sensores...]
+        # (las sesiones antiguas tienen los sensores antes de la velocidad)
+        if spec is None:
+            spec = FeatureSpec.from_columns(df.columns)
+        try:
+            feature_idx, label_idx = spec.column_indices(df.columns)
+        except ValueError as e:
+            print(f"      ⚠ Sesión omitida: {e}")
+            continue
         
-        # Extraer etiquetas (steering, throttle)
-        y = df.iloc[:, 17:19].values  # Últimas 2 columnas
+        # Extraer características y etiquetas (steering, throttle)
+        X = df.iloc[:, feature_idx].values
+        y = df.iloc[:, label_idx].values
         
         all_X.append(X)
         all_y.append(y)
+        loaded_files.append(filepath)
         
         print(f"      {len(X)} muestras cargadas")
     
+    if not all_X:
+        return (None, None, loaded_files) if return_files else (None, None)
+    
     # Combinar todos los datos
     X = np.vstack(all_X)
     y = np.vstack(all_y)
     
     print(f"\n✓ Total: {len(X)} muestras de datos reales")
     
+    if return_files:
+        return X, y, loaded_files
     return X, y
 
-def train_neural_network(use_real_data=True, combine_with_synthetic=False):
-    """Entrena la red neuronal con datos reales y/o sintéticos"""
+def prepare_checkpoint_dir(mode, config, arrays, model_path=None):
+    """
+    Directorio de respaldo propio de un entrenamiento
+    
+    El nombre lleva un hash del modo, la configuración y los datos (y del
+    modelo de partida en el ajuste fino): un respaldo solo se reanuda en el
+    mismo entrenamiento. Los respaldos de otras claves se conservan hasta que
+    este entrenamiento termine (ver discard_checkpoints).
+    
+    Args:
+        mode: 'full' o 'incremental'
+        config: Diccionario con los hiperparámetros del entrenamiento
+        arrays: Arrays de datos (entrenamiento, validación, pesos; None se ignora)
+        model_path: Modelo del que parte el entrenamiento (ajuste fino)
+    
+    Returns:
+        Ruta del directorio de respaldo
+    """
+    digest = hashlib.sha1(json.dumps({'mode': mode, **config}, sort_keys=True).encode('utf-8'))
+    for array in arrays:
+        if array is not None:
+            digest.update(np.ascontiguousarray(array).tobytes())
+    if model_path is not None and os.path.exists(model_path):
+        with open(model_path, 'rb') as f:
+            digest.update(f.read())
+    return os.path.join(CHECKPOINT_DIR, f"{mode}_{digest.hexdigest()[:16]}")
+
+def discard_checkpoints(mode):
+    """
+    Borra los respaldos que quedan de un modo (tras terminar un entrenamiento
+    de ese modo ya no hay nada que reanudar)
+    
+    Args:
+        mode: 'full' o 'incremental'
+    """
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return
+    for name in os.listdir(CHECKPOINT_DIR):
+        path = os.path.join(CHECKPOINT_DIR, name)
+        if name.startswith(f"{mode}_"):
+            print(f"   🗑 Respaldo de otro entrenamiento descartado: {path}")
+            shutil.rmtree(path, ignore_errors=True)
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Manifiesto del último entrenamiento (None si no existe)"""
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(sessions, mode, samples, data_dir, manifest_path=MANIFEST_PATH):
+    """
+    Registra qué sesiones ya conoce el modelo
+    
+    Args:
+        sessions: Sesiones usadas en este entrenamiento (se agregan a las anteriores)
+        mode: 'full' o 'incremental'
+        samples: Muestras de entrenamiento usadas
+        data_dir: Directorio de las sesiones
+    """
+    previous = load_manifest(manifest_path) or {}
+    known = set(previous.get('sessions', [])) if mode == 'incremental' else set()
+    known.update(os.path.basename(f) for f in sessions)
+    
+    history = previous.get('history', [])
+    history.append({
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'mode': mode,
+        'new_sessions': len(sessions),
+        'samples': int(samples)
+    })
+    
+    manifest = {
+        'model_path': MODEL_PATH,
+        'data_dir': data_dir,
+        'updated': history[-1]['date'],
+        'sessions': sorted(known),
+        'history': history
+    }
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✓ Manifiesto actualizado: {manifest_path} ({len(known)} sesiones)")
+
+def train_neural_network(use_real_data=True, combine_with_synthetic=False, data_dir="training_data",
+                         fast=False, threads=None, inter_threads=None, jit_compile=False, batch_size=None,
+                         dedup=False, dedup_step=DEFAULT_QUANTIZATION_STEP, rebalance=False,
+                         cap_mass=False, seed=0):
+    """
+    Entrena la red neuronal con datos reales y/o sintéticos
+    
+    Args:
+        fast: Modo de alto rendimiento en CPU (tf.data, lote grande, lr escalada)
+        threads: Hilos intra-op de TensorFlow (ej. número de núcleos)
+        inter_threads: Hilos inter-op de TensorFlow
+        jit_compile: Compilar el modelo con XLA
+        batch_size: Tamaño de lote (por defecto 32, o 256 en modo rápido)
+        dedup: Eliminar casi-duplicados (con peso por fila: conserva la distribución)
+        dedup_step: Celda de cuantización para detectar casi-duplicados
+        rebalance: Submuestrear las celdas de steering x throttle con demasiadas filas
+        cap_mass: Limitar el peso de las celdas de acción dominantes (más peso a las correcciones)
+        seed: Semilla de los datos sintéticos y de la división (un entrenamiento
+              interrumpido se reanuda solo si sus datos son los mismos)
+    """
     
     print("="*60)
     print("🧠 ENTRENAMIENTO DE RED NEURONAL")
@@ -55,8 +197,9 @@ def train_neural_network(use_real_data=True, combine_with_synthetic=False):
     X_synth, y_synth = None, None
     
     # Intentar cargar datos reales
+    loaded_sessions = []
     if use_real_data:
-        X_real, y_real = load_real_data()
+        X_real, y_real, loaded_sessions = load_real_data(data_dir, return_files=True)
         
         if X_real is None:
             print("\n⚠ No se encontraron datos reales en training_data/")
@@ -76,8 +219,16 @@ def train_neural_network(use_real_data=True, combine_with_synthetic=False):
             print(f"   Cargando datos sintéticos de {data_path}...")
             X_synth, y_synth = generator.load_training_data(data_path)
         else:
+            np.random.seed(seed)
             X_synth, y_synth = generator.generate_training_data(num_samples=5000)
     
+    # Los sintéticos tienen el ancho fijo del juego: no se mezclan con sesiones de otro esquema
+    if X_real is not None and X_synth is not None and X_real.shape[1] != X_synth.shape[1]:
+        print(f"\n❌ Las sesiones de {data_dir} tienen {X_real.shape[1]} entradas y los datos"
+              f" sintéticos {X_synth.shape[1]}: no se pueden combinar")
+        print("   Entrena sin --combined (solo datos reales) o usa sesiones con el esquema por defecto")
+        return
+    
     # Combinar datos
     if X_real is not None and X_synth is not None:
         print("\n🔀 Combinando datos reales y sintéticos...")
@@ -98,24 +249,58 @@ def train_neural_network(use_real_data=True, combine_with_synthetic=False):
         return
     
     # Dividir datos
+    np.random.seed(seed)
     X_train, y_train, X_val, y_val, X_test, y_test = split_data(X, y, 
                                                                   train_ratio=0.8, 
                                                                   val_ratio=0.1)
     
+    # Preprocesar solo el entrenamiento: validación y prueba mantienen la
+    # distribución original para comparar la calidad con y sin recorte
+    sample_weight = None
+    if dedup or rebalance or cap_mass:
+        X_train, y_train, sample_weight, _ = preprocess_dataset(
+            X_train, y_train, quantization_step=dedup_step if dedup else None,
+            rebalance=rebalance, cap_mass=cap_mass)
+    
+    # Los hilos de TensorFlow se fijan antes de crear el modelo
+    if fast:
+        configure_threading(threads, inter_threads)
+    if batch_size is None:
+        batch_size = 256 if fast else 32
+    
+    # Respaldo por época: solo se reanuda un entrenamiento con la misma configuración y datos
+    checkpoint_dir = prepare_checkpoint_dir(
+        'full',
+        {'epochs': 100, 'batch_size': batch_size, 'fast': fast, 'jit_compile': jit_compile,
+         'dedup': dedup, 'dedup_step': dedup_step, 'rebalance': rebalance, 'cap_mass': cap_mass,
+         'seed': seed},
+        (X_train, y_train, X_val, y_val, sample_weight))
+    
     # Crear y entrenar modelo
-    controller = NeuralController(model_path='models/neural_controller.h5')
+    controller = NeuralController(model_path=MODEL_PATH, input_size=X.shape[1])
     
     history = controller.train(
         X_train, y_train,
         X_val, y_val,
         epochs=100,
-        batch_size=32
+        batch_size=batch_size,
+        fast=fast,
+        intra_op_threads=threads,
+        inter_op_threads=inter_threads,
+        jit_compile=jit_compile,
+        sample_weight=sample_weight,
+        checkpoint_dir=checkpoint_dir
     )
+    discard_checkpoints('full')
     
     # Evaluar modelo
     print("\n📊 Evaluando modelo con datos de prueba...")
     controller.evaluate(X_test, y_test)
     
+    # Registrar las sesiones que ya conoce el modelo (para el modo incremental)
+    # (solo las sesiones cargadas: las omitidas por esquema no se aprendieron)
+    save_manifest(loaded_sessions, 'full', len(X_train), data_dir)
+    
     # Graficar resultados del entrenamiento
     plot_training_history(history)
     
@@ -129,6 +314,91 @@ def train_neural_network(use_real_data=True, combine_with_synthetic=False):
     print("📁 Gráficas guardadas en: models/")
     print("\n💡 Ahora puedes ejecutar el juego con: python main.py")
 
+def fine_tune_incremental(data_dir="training_data", replay_ratio=1.0, epochs=20, learning_rate=0.0003,
+                          batch_size=32, seed=0):
+    """
+    Ajuste fino del modelo actual solo con las sesiones nuevas
+    
+    Usa las sesiones que no están en el manifiesto del último entrenamiento,
+    mezcladas con una muestra de las sesiones anteriores (replay) para que
+    la red no olvide lo ya aprendido.
+    
+    Args:
+        data_dir: Directorio de sesiones
+        replay_ratio: Muestras antiguas por cada muestra nueva
+        epochs: Épocas máximas de ajuste fino
+        learning_rate: Tasa de aprendizaje del ajuste fino (menor que la inicial)
+        batch_size: Tamaño de lote
+        seed: Semilla de la muestra de replay y de la división de datos
+    """
+    print("="*60)
+    print("🧠 AJUSTE FINO INCREMENTAL")
+    print("="*60)
+    
+    manifest = load_manifest()
+    if manifest is None or not os.path.exists(MODEL_PATH):
+        print("\n⚠ No hay modelo entrenado con manifiesto: se hace un entrenamiento completo")
+        return train_neural_network(data_dir=data_dir, seed=seed)
+    
+    sessions = list_sessions(data_dir)
+    known = set(manifest.get('sessions', []))
+    new_files = [f for f in sessions if os.path.basename(f) not in known]
+    old_files = [f for f in sessions if os.path.basename(f) in known]
+    
+    print(f"\n📋 Último entrenamiento: {manifest.get('updated')}")
+    print(f"   Sesiones conocidas: {len(old_files)}, nuevas: {len(new_files)}")
+    if not new_files:
+        print("\n✓ No hay sesiones nuevas: el modelo ya está al día")
+        return
+    
+    X_new, y_new, loaded_new = load_real_data(data_dir, files=new_files, return_files=True)
+    if X_new is None:
+        print("\n❌ Las sesiones nuevas no tienen datos válidos")
+        return
+    
+    # Replay: muestra aleatoria de las sesiones ya aprendidas
+    X, y = X_new, y_new
+    if old_files and replay_ratio > 0:
+        X_old, y_old = load_real_data(data_dir, files=old_files)
+        if X_old is not None:
+            rng = np.random.default_rng(seed)
+            count = min(len(X_old), int(replay_ratio * len(X_new)))
+            idx = rng.choice(len(X_old), count, replace=False)
+            X = np.vstack([X_new, X_old[idx]])
+            y = np.vstack([y_new, y_old[idx]])
+            print(f"\n🔁 Replay: {count} muestras antiguas + {len(X_new)} nuevas")
+    
+    np.random.seed(seed)
+    X_train, y_train, X_val, y_val, X_test, y_test = split_data(X, y, train_ratio=0.8, val_ratio=0.1)
+    
+    # Partir de los pesos actuales con una tasa de aprendizaje menor
+    controller = NeuralController(model_path=MODEL_PATH, input_size=X.shape[1])
+    if not controller.is_trained:
+        print("\n❌ No se pudo usar el modelo actual (no se cargó o su entrada no coincide con los datos)")
+        print("   Entrena desde cero con: python train_network.py")
+        return
+    controller.set_learning_rate(learning_rate)
+    
+    print("\n📊 Antes del ajuste fino:")
+    controller.evaluate(X_test, y_test)
+    
+    checkpoint_dir = prepare_checkpoint_dir(
+        'incremental',
+        {'epochs': epochs, 'batch_size': batch_size, 'learning_rate': learning_rate, 'seed': seed},
+        (X_train, y_train, X_val, y_val), model_path=MODEL_PATH)
+    controller.train(X_train, y_train, X_val, y_val, epochs=epochs, batch_size=batch_size,
+                     checkpoint_dir=checkpoint_dir)
+    discard_checkpoints('incremental')
+    
+    print("\n📊 Después del ajuste fino:")
+    controller.evaluate(X_test, y_test)
+    
+    save_manifest(loaded_new, 'incremental', len(X_train), data_dir)
+    
+    print("\n" + "="*60)
+    print("✓ AJUSTE FINO COMPLETADO")
+    print("="*60)
+
 def plot_training_history(history):
     """Grafica la historia del entrenamiento"""
     
@@ -235,7 +505,36 @@ if __name__ == "__main__":
     print("   python train_network.py              # Solo datos reales")
     print("   python train_network.py --combined   # Reales + sintéticos")
     print("   python train_network.py --synthetic-only  # Solo sintéticos")
+    print("   python train_network.py --data-dir DIR    # Sesiones re-featurizadas")
+    print("   python train_network.py --fast [--threads N] [--xla] [--batch N]  # Alto rendimiento CPU")
+    print(f"   python train_network.py --dedup [--dedup-step {DEFAULT_QUANTIZATION_STEP}]  # Sin duplicados")
+    print("   python train_network.py --dedup --rebalance [--cap-mass]  # Además rebalancea por acción")
+    print("   python train_network.py --incremental [--replay-ratio 1.0] [--epochs 20]  # Solo sesiones nuevas")
+    print("   python train_network.py ... --seed N   # Semilla de la división (reanudar exige la misma)")
     print()
     
-    train_neural_network(use_real_data=use_real_data, 
-                        combine_with_synthetic=combine_with_synthetic)
+    def get_arg(name, default=None, cast=str):
+        """Valor de una opción '--nombre valor' de la línea de comandos"""
+        if name in sys.argv:
+            return cast(sys.argv[sys.argv.index(name) + 1])
+        return default
+    
+    if '--incremental' in sys.argv:
+        fine_tune_incremental(data_dir=get_arg('--data-dir', "training_data"),
+                              replay_ratio=get_arg('--replay-ratio', 1.0, float),
+                              epochs=get_arg('--epochs', 20, int),
+                              seed=get_arg('--seed', 0, int))
+    else:
+        train_neural_network(use_real_data=use_real_data, 
+                            combine_with_synthetic=combine_with_synthetic,
+                            data_dir=get_arg('--data-dir', "training_data"),
+                            fast='--fast' in sys.argv,
+                            threads=get_arg('--threads', None, int),
+                            inter_threads=get_arg('--inter-threads', None, int),
+                            jit_compile='--xla' in sys.argv,
+                            batch_size=get_arg('--batch', None, int),
+                            dedup='--dedup' in sys.argv,
+                            dedup_step=get_arg('--dedup-step', DEFAULT_QUANTIZATION_STEP, float),
+                            rebalance='--rebalance' in sys.argv,
+                            cap_mass='--cap-mass' in sys.argv,
+                            seed=get_arg('--seed', 0, int))
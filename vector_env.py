@@ -0,0 +1,210 @@
+"""
+Entorno vectorizado estilo Gym sobre Car y Track
+Ejecuta N carreras independientes en paralelo (lockstep) con arrays de NumPy:
+reset(seed) y step(actions) devuelven observaciones, recompensas, fin e info
+"""
+import time
+
+import numpy as np
+
+from car_batch import CarBatch
+from opponent_controller import OpponentController
+from track import Track
+
+
+class VectorRaceEnv:
+    def __init__(self, num_envs, track=None, opponent_difficulty=None, max_steps=1000,
+                 crash_penalty=1.0, finish_bonus=10.0, jitter_x=5.0, jitter_angle=2.0):
+        """
+        Inicializa el entorno vectorizado
+
+        Args:
+            num_envs: Número de carreras independientes
+            track: Objeto Track (por defecto la pista del juego de 1200x800)
+            opponent_difficulty: 'easy', 'medium', 'hard' o None para correr sin oponente
+            max_steps: Pasos máximos por episodio (truncado)
+            crash_penalty: Penalización por cada nuevo contacto con el borde
+            finish_bonus: Recompensa extra al cruzar la meta
+            jitter_x: Variación aleatoria de la posición inicial en X (px)
+            jitter_angle: Variación aleatoria del ángulo inicial (grados)
+        """
+        self.num_envs = num_envs
+        self.track = track if track is not None else Track(1200, 800)
+        self.max_steps = max_steps
+        self.crash_penalty = crash_penalty
+        self.finish_bonus = finish_bonus
+        self.jitter_x = jitter_x
+        self.jitter_angle = jitter_angle
+
+        # Auto controlado por la política (carril 0)
+        self.cars = CarBatch(num_envs)
+        self.observation_size = 1 + len(self.cars.sensor_angles)
+        self.action_size = 2  # (steering, throttle)
+
+        # Oponente opcional (carril 1), controlado por OpponentController
+        self.opponent_controller = None
+        self.opponents = None
+        if opponent_difficulty is not None:
+            self.opponent_controller = OpponentController(difficulty=opponent_difficulty)
+            self.opponents = CarBatch(num_envs)
+
+        # Buffers preasignados
+        self._obs = np.zeros((num_envs, self.observation_size), dtype=np.float32)
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self.episode_returns = np.zeros(num_envs)
+        self._colliding = np.zeros(num_envs, dtype=bool)
+        self._rng = np.random.default_rng()
+
+        # Medición de rendimiento
+        self.total_steps = 0
+        self._step_time = 0.0
+
+    def _reset_envs(self, mask):
+        """Reinicia las carreras indicadas por la máscara"""
+        count = int(mask.sum())
+        if count == 0:
+            return
+
+        x, y, angle = self.track.get_start_position(lane=0)
+        self.cars.reset(mask,
+                        x + self._rng.uniform(-self.jitter_x, self.jitter_x, count),
+                        y,
+                        angle + self._rng.uniform(-self.jitter_angle, self.jitter_angle, count))
+        self.cars.update_sensors(self.track, active=mask)
+
+        if self.opponents is not None:
+            ox, oy, oangle = self.track.get_start_position(lane=1)
+            self.opponents.reset(mask, ox, oy, oangle)
+
+        self.episode_steps[mask] = 0
+        self.episode_returns[mask] = 0
+        self._colliding[mask] = False
+
+    def reset(self, seed=None):
+        """
+        Reinicia todas las carreras
+
+        Args:
+            seed: Semilla del generador de posiciones iniciales
+
+        Returns:
+            Observaciones (num_envs, observation_size) en float32
+        """
+        self._rng = np.random.default_rng(seed)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.cars.get_state_vectors(out=self._obs).copy()
+
+    def step(self, actions):
+        """
+        Avanza un paso en todas las carreras
+
+        Args:
+            actions: Array (num_envs, 2) con (steering, throttle) en [-1, 1]
+
+        Returns:
+            Tupla (obs, reward, done, info). Las carreras terminadas se reinician
+            automáticamente: obs ya es la observación inicial del nuevo episodio y
+            la observación final queda en info['final_observation']
+        """
+        start = time.perf_counter()
+        track = self.track
+        actions = np.clip(np.asarray(actions, dtype=np.float64), -1, 1)
+        cars = self.cars
+
+        # Auto de la política: control + física
+        prev_y = cars.y.copy()
+        cars.update_ai_control(actions[:, 0], actions[:, 1])
+        cars.apply_physics()
+
+        # Oponente: velocidad constante, sin dirección
+        if self.opponents is not None:
+            steering, throttle = self.opponent_controller.compute_batch(self.opponents)
+            self.opponents.update_ai_control(steering, throttle)
+            self.opponents.apply_physics()
+
+        # Colisiones (igual que Game: marca el choque y reduce la velocidad a la mitad)
+        collision = cars.check_collision(track)
+        cars.crashed |= collision
+        cars.speed = np.where(collision, cars.speed * 0.5, cars.speed)
+        if self.opponents is not None:
+            opp_collision = self.opponents.check_collision(track)
+            self.opponents.crashed |= opp_collision
+            self.opponents.speed = np.where(opp_collision, self.opponents.speed * 0.5,
+                                            self.opponents.speed)
+
+        # Checkpoints y meta
+        cars.check_checkpoints(track)
+        finished = cars.y >= track.finish_line_y
+        new_crash = collision & ~self._colliding & ~finished
+        self._colliding = collision
+
+        # Recompensa: avance hacia la meta (en unidades de velocidad máxima)
+        reward = (cars.y - prev_y) / cars.max_speed
+        reward -= self.crash_penalty * new_crash
+        reward += self.finish_bonus * finished
+
+        self.episode_steps += 1
+        self.episode_returns += reward
+
+        lost = np.zeros(self.num_envs, dtype=bool)
+        if self.opponents is not None:
+            self.opponents.check_checkpoints(track)
+            lost = (self.opponents.y >= track.finish_line_y) & ~finished
+
+        truncated = self.episode_steps >= self.max_steps
+        done = finished | lost | truncated
+
+        # Observación del paso (antes del reinicio automático)
+        cars.update_sensors(track)
+        obs = cars.get_state_vectors(out=self._obs)
+
+        info = {
+            'checkpoints': cars.checkpoint_count.copy(),
+            'crashed': cars.crashed.copy(),
+            'finished': finished,
+            'lost': lost,
+            'truncated': truncated & ~finished & ~lost,
+            'episode_steps': self.episode_steps.copy(),
+            'episode_return': self.episode_returns.copy()
+        }
+
+        if done.any():
+            info['final_observation'] = obs.copy()
+            self._reset_envs(done)
+            obs = cars.get_state_vectors(out=self._obs)
+
+        self.total_steps += self.num_envs
+        self._step_time += time.perf_counter() - start
+
+        return obs.copy(), reward, done, info
+
+    @property
+    def steps_per_second(self):
+        """Pasos de entorno por segundo medidos (num_envs pasos por llamada a step)"""
+        if self._step_time == 0:
+            return 0.0
+        return self.total_steps / self._step_time
+
+    def sample_actions(self):
+        """Acciones aleatorias uniformes en [-1, 1] (útil para pruebas)"""
+        return self._rng.uniform(-1, 1, (self.num_envs, self.action_size))
+
+
+def benchmark(num_envs=256, num_steps=500, seed=0):
+    """
+    Mide el rendimiento del entorno con acciones aleatorias
+
+    Returns:
+        Pasos de entorno por segundo
+    """
+    env = VectorRaceEnv(num_envs, opponent_difficulty='medium')
+    env.reset(seed)
+    for _ in range(num_steps):
+        env.step(env.sample_actions())
+    print(f"⚡ {num_envs} entornos x {num_steps} pasos: {env.steps_per_second:,.0f} pasos/s")
+    return env.steps_per_second
+
+
+if __name__ == "__main__":
+    for n in (1, 16, 256, 1024):
+        benchmark(num_envs=n, num_steps=200)